@@ -12,7 +12,7 @@ from application.api.controllers import monitor_attributes
 from application.api.controllers import monitor_faults
 from application.api.controllers import properties
 from application.common import logger
-from application.common.decorators import verified_required
+from application.common.decorators import agent_permission_required, verified_required
 from application.models.agent import Agents
 from application.models.agent_friend_member import AgentFriendMembers
 from application.models.agent_group_member import AgentGroupMembers
@@ -35,6 +35,17 @@ class AgentLogsBackendApi(MethodView):
     def __init__(self, model):
         self.model = model
 
+    @login_required
+    @verified_required
+    @agent_permission_required
+    def get(self, agent_id):
+        cursor = request.args.get("cursor", None)
+
+        try:
+            return jsonify(agent_logs.get_all_agent_logs(agent_id, cursor=cursor))
+        except ValueError:
+            return "Invalid cursor.", 400
+
     @login_required
     @verified_required
     def delete(self, agent_id):
@@ -158,7 +169,7 @@ class GameServerControlBackendApi(MethodView):
     @login_required
     @verified_required
     def post(self, command):
-        command_success = False
+        command_id = None
 
         if command not in self.valid_commands:
             logger.error(
@@ -167,15 +178,18 @@ class GameServerControlBackendApi(MethodView):
             return "Error!", 400
 
         if command == "startup":
-            command_success = agent_control.startup(request)
+            command_id = agent_control.startup(request)
         elif command == "shutdown":
-            command_success = agent_control.shutdown(request)
+            command_id = agent_control.shutdown(request)
         elif command == "restart":
-            command_success = agent_control.restart(request)
+            command_id = agent_control.restart(request)
         elif command == "update":
-            command_success = agent_control.update(request)
+            command_id = agent_control.update(request)
+
+        if command_id is None:
+            return "Error!", 500
 
-        return ("Success", 204) if command_success else ("Error!", 500)
+        return jsonify({"command_id": command_id}), 200
 
 
 class AgentFriendMembersBackendApi(MethodView):
@@ -303,6 +317,12 @@ backend.add_url_rule(
     methods=["DELETE"],
 )
 
+backend.add_url_rule(
+    "/agent/logs/<int:agent_id>",
+    view_func=AgentLogsBackendApi.as_view("agent_logs_page_api", AgentLog),
+    methods=["GET"],
+)
+
 backend.add_url_rule(
     "/monitor/<int:agent_id>/<string:monitor_type>",
     view_func=MonitorsBackendApi.as_view("agent_monitor_api", Monitor),
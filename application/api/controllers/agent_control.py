@@ -1,10 +1,10 @@
 import json
 
-from flask import current_app
 from flask_login import current_user
 
 from application.api.controllers.agent_logs import create_agent_log
-from application.common import logger, toolbox
+from application.common import logger, game_commands
+from application.common.constants import GameCommandTypes
 from application.models.agent import Agents
 from application.workers.game_server_control import restart_game_server
 from application.workers.game_server_control import startup_game_server
@@ -12,7 +12,10 @@ from application.workers.game_server_control import shutdown_game_server
 from application.workers.game_server_control import update_game_server
 
 
-def startup(request):
+# Record the command in the game command journal and hand it to a worker. The worker pushes the
+# command's progress to the user, so there is nothing to wait on here. Returns the command's ID, so
+# the page can ask after it should a push never arrive, or None if the command was not run.
+def _run_game_command(request, command_type: GameCommandTypes, task, label: str) -> int:
     data = request.json
     json_data = json.loads(data)
 
@@ -21,160 +24,46 @@ def startup(request):
         game_name = json_data["game_name"]
 
     except KeyError:
-        logger.error("Startup Game Server: Missing Form Input Data")
-        return False
+        logger.error(f"{label} Game Server: Missing Form Input Data")
+        return None
 
     agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
 
     if agent_obj is None:
-        logger.error(f"Startup Game Server: Agent ID {agent_id} does not exist!")
-        return False
-
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-    verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
-
-    logger.debug("Running startup game server command via celery...")
-
-    startup_game_server.apply_async(
-        [
-            hostname,
-            str(agent_obj.port),
-            verbose,
-            agent_obj.access_token,
-            agent_obj.ssl_public_cert,
-            game_name,
-        ]
-    )
-
-    log_message = f"Manual Startup: {game_name}"
-    if not create_agent_log(current_user.user_id, agent_id, log_message):
-        logger.error(f"Failed to create agent log for {agent_id}!")
-        return False
-
-    return True
-
+        logger.error(f"{label} Game Server: Agent ID {agent_id} does not exist!")
+        return None
 
-def shutdown(request):
-    data = request.json
-    json_data = json.loads(data)
-
-    try:
-        agent_id = json_data["agent_id"]
-        game_name = json_data["game_name"]
-
-    except KeyError:
-        logger.error("Shutdown Game Server: Missing Form Input Data")
-        return False
-
-    agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
-
-    if agent_obj is None:
-        logger.error(f"Shutdown Game Server: Agent ID {agent_id} does not exist!")
-        return False
-
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-    verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
-
-    logger.debug("Shutdown startup game server command via celery...")
-
-    shutdown_game_server.apply_async(
-        [
-            hostname,
-            str(agent_obj.port),
-            verbose,
-            agent_obj.access_token,
-            agent_obj.ssl_public_cert,
-            game_name,
-        ]
+    command_id = game_commands.create_game_command(
+        current_user.user_id, agent_obj.agent_id, game_name, command_type
     )
 
-    log_message = f"Manual Shutdown: {game_name}"
-    if not create_agent_log(current_user.user_id, agent_id, log_message):
-        logger.error(f"Failed to create agent log for {agent_id}!")
-        return False
-
-    return True
+    if command_id is None:
+        logger.error(f"{label} Game Server: Could not record the command!")
+        return None
 
+    logger.debug(f"Running {label.lower()} game server command {command_id} via celery...")
 
-def restart(request):
-    data = request.json
-    json_data = json.loads(data)
+    task.apply_async([agent_obj.agent_id, game_name, command_id])
 
-    try:
-        agent_id = json_data["agent_id"]
-        game_name = json_data["game_name"]
-
-    except KeyError:
-        logger.error("Restart Game Server: Missing Form Input Data")
-        return False
-
-    agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
-
-    if agent_obj is None:
-        logger.error(f"Restart Game Server: Agent ID {agent_id} does not exist!")
-        return False
-
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-    verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
-
-    logger.debug("Restart startup game server command via celery...")
-
-    restart_game_server.apply_async(
-        [
-            hostname,
-            str(agent_obj.port),
-            verbose,
-            agent_obj.access_token,
-            agent_obj.ssl_public_cert,
-            game_name,
-        ]
-    )
-
-    log_message = f"Manual Restart: {game_name}"
+    log_message = f"Manual {label}: {game_name}"
     if not create_agent_log(current_user.user_id, agent_id, log_message):
         logger.error(f"Failed to create agent log for {agent_id}!")
-        return False
+        return None
 
-    return True
+    return command_id
 
 
-def update(request):
-    data = request.json
-    json_data = json.loads(data)
+def startup(request):
+    return _run_game_command(request, GameCommandTypes.STARTUP, startup_game_server, "Startup")
 
-    try:
-        agent_id = json_data["agent_id"]
-        game_name = json_data["game_name"]
 
-    except KeyError:
-        logger.error("Restart Game Server: Missing Form Input Data")
-        return False
+def shutdown(request):
+    return _run_game_command(request, GameCommandTypes.SHUTDOWN, shutdown_game_server, "Shutdown")
 
-    agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
 
-    if agent_obj is None:
-        logger.error(f"Restart Game Server: Agent ID {agent_id} does not exist!")
-        return False
-
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-    verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
-
-    logger.debug("Updating startup game server command via celery...")
-
-    update_game_server.apply_async(
-        [
-            hostname,
-            str(agent_obj.port),
-            verbose,
-            agent_obj.access_token,
-            agent_obj.ssl_public_cert,
-            game_name,
-        ]
-    )
+def restart(request):
+    return _run_game_command(request, GameCommandTypes.RESTART, restart_game_server, "Restart")
 
-    log_message = f"Manual Update: {game_name}"
-    if not create_agent_log(current_user.user_id, agent_id, log_message):
-        logger.error(f"Failed to create agent log for {agent_id}!")
-        return False
 
-    return True
+def update(request):
+    return _run_game_command(request, GameCommandTypes.UPDATE, update_game_server, "Update")
@@ -1,7 +1,9 @@
 from datetime import datetime, timezone
 from flask_login import current_user
+from sqlalchemy.orm import joinedload
 
 from application.common import timezones, logger, constants
+from application.common.pagination import KeysetPagination
 from application.extensions import DATABASE
 from application.models.agent import Agents
 from application.models.agent_log import AgentLog
@@ -63,8 +65,9 @@ def get_recent_agent_logs(agent_id: int) -> list[dict]:
     return [log.to_dict(format_str, user_timezone) for log in recent_agent_logs]
 
 
-# A function to get all agent logs
-def get_all_agent_logs(agent_id: int) -> list[dict]:
+# A function to get all agent logs, a page at a time. Returns the log dictionaries along with the
+# cursor for the next page, which is None on the last page.
+def get_all_agent_logs(agent_id: int, cursor: str = None) -> dict:
     # User properties to determine whether or not to apply offset
     user_properties = current_user.properties
     format_str = timezones._apply_time_log_format_preference(user_properties)
@@ -75,38 +78,42 @@ def get_all_agent_logs(agent_id: int) -> list[dict]:
     else:
         user_timezone = timezones.tz_label_to_timezone(constants.DEFAULT_USER_TIMEZONE)
 
-    # Get all agent logs
-    all_agent_logs = (
-        AgentLog.query.filter_by(agent_id=agent_id).order_by(AgentLog.timestamp.desc()).all()
-    )
+    # The usernames are joined in, rather than queried per log.
+    agent_logs_qry = AgentLog.query.filter_by(agent_id=agent_id).options(joinedload(AgentLog.user))
 
     if current_user.subscribed:
-        all_agent_logs_qry = AgentLog.query.filter_by(agent_id=agent_id).order_by(
-            AgentLog.timestamp.desc()
+        # Seek on the (agent_id, timestamp) index instead of loading every log at once.
+        page = KeysetPagination.paginate(
+            agent_logs_qry,
+            [AgentLog.timestamp, AgentLog.log_id],
+            constants.AGENT_LOGS_PAGE_SIZE,
+            cursor=cursor,
+            with_count=False,
         )
+        all_agent_logs = page.items
+        next_cursor = page.next_cursor
     else:
-        all_agent_logs_qry = (
-            AgentLog.query.filter_by(agent_id=agent_id)
-            .order_by(AgentLog.timestamp.desc())
+        all_agent_logs = (
+            agent_logs_qry.order_by(AgentLog.timestamp.desc())
             .limit(constants.DEFAULT_AGENT_LOGS_PER_AGENT_FREE)
+            .all()
         )
+        next_cursor = None
 
-    all_agent_logs = all_agent_logs_qry.all()
-
-    return [log.to_dict(format_str, user_timezone) for log in all_agent_logs]
+    return {
+        "items": [log.to_dict(format_str, user_timezone) for log in all_agent_logs],
+        "next_cursor": next_cursor,
+    }
 
 
 # A function to delete all logs for a given agent
 def delete_all_agent_logs(agent_id: int) -> bool:
-    # Get all agent logs
-    all_agent_logs = AgentLog.query.filter_by(agent_id=agent_id).all()
-
-    # Delete all agent logs
+    # Delete all agent logs in a single statement, without loading them.
     try:
-        for log in all_agent_logs:
-            DATABASE.session.delete(log)
+        AgentLog.query.filter_by(agent_id=agent_id).delete(synchronize_session=False)
         DATABASE.session.commit()
     except Exception as e:
+        DATABASE.session.rollback()
         logger.error(f"Error deleting agent logs: {e}")
         return False
 
@@ -1,17 +1,23 @@
 from flask import flash, url_for
 from flask_login import current_user
+from sqlalchemy import func, or_, select, union
 
-from application.api.controllers import friends as friend_control
 from application.api.controllers import groups as group_control
 from application.api.controllers import messages as message_control
 from application.api.controllers import users as user_control
 from application.common import constants, logger
 from application.common.exceptions import InvalidUsage
 from application.extensions import DATABASE
-from application.models.agent import Agents
+from application.models.agent import Agents, get_agent_user_ids
 from application.models.agent_group_member import AgentGroupMembers
 from application.models.agent_friend_member import AgentFriendMembers
+from application.models.friend import Friends
+from application.models.game_command import GameCommand
+from application.models.group import Groups
+from application.models.group_member import GroupMembers
 from application.models.monitor import Monitor
+from application.models.server_operation import ServerOperation
+from application.models.user import UserSql
 
 
 def get_agent_by_id(agent_id: int, as_obj: bool = False) -> dict:
@@ -24,6 +30,46 @@ def get_agent_by_id(agent_id: int, as_obj: bool = False) -> dict:
     return agent_qry.first() if as_obj else agent_dict["items"]
 
 
+# Gather the sharing limit, user count, and group count for many agents with a fixed number of
+# queries, rather than several queries per agent.
+def _get_agent_stats(agent_items: list) -> dict:
+    agent_ids = [item["agent_id"] for item in agent_items]
+    owner_ids = {item["owner_id"] for item in agent_items}
+
+    owners = UserSql.query.filter(UserSql.user_id.in_(owner_ids)).all()
+    owners = {owner.user_id: owner for owner in owners}
+
+    group_counts = dict(
+        DATABASE.session.query(AgentGroupMembers.agent_id, func.count())
+        .filter(AgentGroupMembers.agent_id.in_(agent_ids))
+        .group_by(AgentGroupMembers.agent_id)
+        .all()
+    )
+
+    agent_users = get_agent_user_ids(agent_ids)
+
+    stats = {}
+
+    for item in agent_items:
+        owner_obj = owners[item["owner_id"]]
+        agent_share_limit = (
+            constants.DEFAULT_USERS_PER_AGENT_FREE
+            if not owner_obj.subscribed
+            else constants.DEFAULT_USERS_PER_AGENT_PAID
+        )
+        # Do not count the agent owner.
+        num_users = len(agent_users[item["agent_id"]] - {item["owner_id"]})
+
+        stats[item["agent_id"]] = {
+            "owner": owner_obj,
+            "agent_share_limit": agent_share_limit,
+            "num_users": num_users,
+            "num_groups": group_counts.get(item["agent_id"], 0),
+        }
+
+    return stats
+
+
 def get_agents_by_owner(owner_id: int) -> []:
     owner_agents_qry = Agents.query.filter_by(owner_id=owner_id)
 
@@ -36,90 +82,61 @@ def get_agents_by_owner(owner_id: int) -> []:
     )
 
     agent_items = owner_agents["items"]
+    agent_stats = _get_agent_stats(agent_items)
 
     for item in agent_items:
-        owner_id = item["owner_id"]
-        owner_obj = user_control.get_user_by_id(owner_id)
-        agent_share_limit = (
-            constants.DEFAULT_USERS_PER_AGENT_FREE
-            if not owner_obj.subscribed
-            else constants.DEFAULT_USERS_PER_AGENT_PAID
-        )
-        agent_obj = Agents.query.filter_by(agent_id=item["agent_id"]).first()
-        item["agent_share_limit"] = agent_share_limit
-        item["num_users"] = agent_obj.num_users
-        item["num_groups"] = agent_obj.groups_with_access.count()
+        stats = agent_stats[item["agent_id"]]
+        item["agent_share_limit"] = stats["agent_share_limit"]
+        item["num_users"] = stats["num_users"]
+        item["num_groups"] = stats["num_groups"]
 
     return agent_items
 
 
 def get_associated_agents() -> dict:
-    # Get groups, that user belongs to.
-    associated_groups = group_control.get_associated_groups()
-
-    # Build agent id list from groups
-    combined_agent_list = []
-
-    for group in associated_groups:
-        membership_objs = AgentGroupMembers.query.filter_by(group_member_id=group["group_id"]).all()
-        for membership in membership_objs:
-            agent_id = membership.agent_id
-            this_agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
-            is_own_agent = this_agent_obj.owner_id == current_user.user_id
-            if agent_id not in combined_agent_list and not is_own_agent:
-                combined_agent_list.append(membership.agent_id)
-
-    # Check on direct agents from friends. Build list first, get the agents owned by friends,
-    # and finally check for agent relationships.
-    friend_id_list = []
-    friends_list = friend_control.get_my_friends()
-
-    for friend in friends_list:
-        if current_user.user_id == friend["initiator_id"]:
-            friend_id_list.append(friend["receiver_id"])
-        else:
-            friend_id_list.append(friend["initiator_id"])
-
-    # Get IDs of agent belonging to each friend.
-    agents_owned_by_friends = Agents.query.filter(Agents.owner_id.in_(friend_id_list)).all()
-
-    # Finally see if you have any relationship to share any agent owned by any of your friends.
-    for agent in agents_owned_by_friends:
-        # In this case, the friend member id is the current user.
-        membership_objs = AgentFriendMembers.query.filter_by(
-            agent_id=agent.agent_id, friend_member_id=current_user.user_id
-        ).all()
-        for membership in membership_objs:
-            agent_id = membership.agent_id
-            this_agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
-            is_own_agent = this_agent_obj.owner_id == current_user.user_id
-            if agent_id not in combined_agent_list and not is_own_agent:
-                combined_agent_list.append(membership.agent_id)
-
-    # Get all agents with ids matching the list.
-    agent_qry = Agents.query.filter(Agents.agent_id.in_(combined_agent_list))
+    user_id = current_user.user_id
+
+    # Agents shared with groups that the user belongs to, but does not own.
+    group_agent_ids = (
+        select(AgentGroupMembers.agent_id)
+        .join(GroupMembers, GroupMembers.group_id == AgentGroupMembers.group_member_id)
+        .join(Groups, Groups.group_id == GroupMembers.group_id)
+        .where(GroupMembers.member_id == user_id, Groups.owner_id != user_id)
+    )
+
+    # The user's friends, regardless of who initiated the friendship.
+    friend_ids = union(
+        select(Friends.receiver_id).where(Friends.initiator_id == user_id),
+        select(Friends.initiator_id).where(Friends.receiver_id == user_id),
+    )
+
+    # Agents owned by any of the user's friends and shared directly with the user.
+    friend_agent_ids = (
+        select(AgentFriendMembers.agent_id)
+        .join(Agents, Agents.agent_id == AgentFriendMembers.agent_id)
+        .where(AgentFriendMembers.friend_member_id == user_id, Agents.owner_id.in_(friend_ids))
+    )
+
+    # Get all agents from either source, leaving out the user's own agents.
+    agent_qry = Agents.query.filter(
+        or_(Agents.agent_id.in_(group_agent_ids), Agents.agent_id.in_(friend_agent_ids)),
+        Agents.owner_id != user_id,
+    )
 
     agents_dict = Agents.to_collection_dict(
         agent_qry, constants.DEFAULT_PAGE, constants.DEFAULT_PER_PAGE_MAX, "", ignore_links=True
     )
 
     agent_items = agents_dict["items"]
+    agent_stats = _get_agent_stats(agent_items)
 
     # Pack in the user information.
     for agent in agent_items:
-        agents_obj = get_agent_by_id(agent["agent_id"], as_obj=True)
-        owner_id = agent["owner_id"]
-        owner_obj = user_control.get_user_by_id(owner_id)
-        agent["owner"] = owner_obj.to_dict()
-        agent_share_limit = (
-            constants.DEFAULT_USERS_PER_AGENT_FREE
-            if not owner_obj.subscribed
-            else constants.DEFAULT_USERS_PER_AGENT_PAID
-        )
-        agent_obj = Agents.query.filter_by(agent_id=agent["agent_id"]).first()
-        agent["agent_share_limit"] = agent_share_limit
-        agent["num_users"] = agents_obj.num_users
-        agent["num_groups"] = agent_obj.groups_with_access.count()
+        stats = agent_stats[agent["agent_id"]]
+        agent["owner"] = stats["owner"].to_dict()
+        agent["agent_share_limit"] = stats["agent_share_limit"]
+        agent["num_users"] = stats["num_users"]
+        agent["num_groups"] = stats["num_groups"]
 
     return agent_items
 
@@ -275,6 +292,10 @@ def deactivate_agent(object_id: int) -> bool:
         for friend in agent_friends:
             DATABASE.session.delete(friend)
 
+        # Delete game commands, then the server operations they point to
+        GameCommand.query.filter_by(agent_id=object_id).delete(synchronize_session=False)
+        ServerOperation.query.filter_by(agent_id=object_id).delete(synchronize_session=False)
+
         DATABASE.session.delete(agent_obj)  # Agent
         DATABASE.session.commit()
     except Exception as error:
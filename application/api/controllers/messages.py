@@ -5,20 +5,19 @@ from flask import current_app, render_template
 from flask_login import current_user
 from kombu.exceptions import OperationalError
 
-from application.common import logger
+from application.common import logger, message_count_cache, settings_cache
 from application.common.constants import MessageCategories
 from application.extensions import DATABASE
+from application.models.default_property import DefaultProperty
 from application.models.message import Messages
+from application.models.property import Property
 from application.models.user import UserSql
-from application.models.setting import SettingsSql
 from application.workers.email import send_global_email, send_email
 
 
 # Determine if the admin has enabled the system for email notifications.
 def is_email_enabled() -> bool:
-    setting = SettingsSql.query.filter_by(name="APP_ENABLE_EMAIL").first()
-    setting_test = setting.value.lower()
-    return True if setting_test == "true" else False
+    return settings_cache.is_setting_true("APP_ENABLE_EMAIL")
 
 
 def _create_message(
@@ -48,28 +47,45 @@ def _create_message(
         logger.critical(error)
         traceback.print_exc()
         DATABASE.session.rollback()
+        return
+
+    if is_global:
+        message_count_cache.invalidate_global()
+
+
+# The user property that, when present, turns off each kind of notification for a category.
+_CATEGORY_DISABLE_PROPERTIES = {
+    (MessageCategories.SOCIAL, False): "NOTIFICATION_DM_SOCIAL_ENABLED",
+    (MessageCategories.SOCIAL, True): "NOTIFICATION_EMAIL_SOCIAL_ENABLED",
+    (MessageCategories.MONITOR, False): "NOTIFICATION_DM_MONITOR_ENABLED",
+    (MessageCategories.MONITOR, True): "NOTIFICATION_EMAIL_MONITOR_ENABLED",
+}
 
 
 def _is_user_category_disabled(user_id: int, category: MessageCategories, is_email=False) -> bool:
-    is_disabled = False
+    property_name = _CATEGORY_DISABLE_PROPERTIES.get((category, is_email))
+
+    if property_name is None:
+        return False
 
     user = UserSql.query.filter_by(user_id=user_id).first()
-    user_properties = user.properties
+    return property_name in user.properties
 
-    if category == MessageCategories.SOCIAL and not is_email:
-        if "NOTIFICATION_DM_SOCIAL_ENABLED" in user_properties:
-            is_disabled = True
-    elif category == MessageCategories.SOCIAL and is_email:
-        if "NOTIFICATION_EMAIL_SOCIAL_ENABLED" in user_properties:
-            is_disabled = True
-    elif category == MessageCategories.MONITOR and not is_email:
-        if "NOTIFICATION_DM_MONITOR_ENABLED" in user_properties:
-            is_disabled = True
-    elif category == MessageCategories.MONITOR and is_email:
-        if "NOTIFICATION_EMAIL_MONITOR_ENABLED" in user_properties:
-            is_disabled = True
 
-    return is_disabled
+# For many users at once, get which of the given properties each user has set, in one query.
+def _get_users_with_properties(user_ids: list, property_names: list) -> dict:
+    rows = (
+        DATABASE.session.query(Property.user_id, DefaultProperty.property_name)
+        .join(DefaultProperty, DefaultProperty.default_property_id == Property.default_property_id)
+        .filter(Property.user_id.in_(user_ids), DefaultProperty.property_name.in_(property_names))
+        .all()
+    )
+
+    users_with_properties = {user_id: set() for user_id in user_ids}
+    for user_id, property_name in rows:
+        users_with_properties[user_id].add(property_name)
+
+    return users_with_properties
 
 
 def create_global_message(message, subject) -> None:
@@ -162,17 +178,55 @@ def create_direct_message(
 def message_user_list(
     sender_id: int, user_id_list: list, message: str, subject: str, category: MessageCategories
 ) -> None:
+    dm_property = _CATEGORY_DISABLE_PROPERTIES.get((category, False))
+    email_property = _CATEGORY_DISABLE_PROPERTIES.get((category, True))
+
+    # Load every recipient and their notification preferences up front, rather than a handful of
+    # queries per recipient.
+    users = UserSql.query.filter(UserSql.user_id.in_(user_id_list)).all()
+    users = {user.user_id: user for user in users}
+    user_properties = _get_users_with_properties(
+        list(users.keys()), [name for name in [dm_property, email_property] if name is not None]
+    )
+
+    timestamp = datetime.now(timezone.utc)
+    new_messages = []
     final_user_list = []
-    # First send out, one by one, direct messages to each user, if they're enabled.
+
     for recipient_id in user_id_list:
-        if not _is_user_category_disabled(recipient_id, category):
-            _create_message(sender_id, recipient_id, message, subject, is_global=False)
+        user = users.get(recipient_id)
+
+        if user is None:
+            logger.error(f"Message User List: User ID {recipient_id} does not exist.")
+            continue
+
+        if dm_property not in user_properties[recipient_id]:
+            new_messages.append(
+                Messages(
+                    message=message,
+                    subject=subject,
+                    sender_id=sender_id,
+                    recipient_id=recipient_id,
+                    is_global=False,
+                    timestamp=timestamp,
+                )
+            )
 
         # Determine, who on the list has email enabled in this loop.
-        if not _is_user_category_disabled(recipient_id, category, is_email=True):
-            user = UserSql.query.filter_by(user_id=recipient_id).first()
+        if email_property not in user_properties[recipient_id]:
             final_user_list.append(user.email)
 
+    # Enter all the direct messages into the database at once.
+    if len(new_messages) > 0:
+        try:
+            DATABASE.session.add_all(new_messages)
+            DATABASE.session.commit()
+        except Exception as error:
+            logger.critical("Unable to create direct messages")
+            logger.critical(error)
+            traceback.print_exc()
+            DATABASE.session.rollback()
+
     # If the final user list is empty, we don't need to send out any emails.
     if len(final_user_list) == 0:
         logger.debug("No users to send email to.")
@@ -13,6 +13,17 @@ def _get_monitor_id(agent_id, monitor_type):
     return monitor_obj.monitor_id
 
 
+# Drop the attributes cached on the monitor object, if the session holds one, so the next read
+# sees the change. Looks in the identity map only, since loading the monitor just to drop its cache
+# would be a wasted query.
+def _invalidate_monitor_attributes(monitor_id):
+    identity_key = DATABASE.session.identity_key(Monitor, monitor_id)
+    monitor_obj = DATABASE.session.identity_map.get(identity_key)
+
+    if monitor_obj is not None:
+        monitor_obj.invalidate_attributes()
+
+
 def attach_attribute_to_monitor(agent_id, monitor_type, payload):
     logger.info(f"Attaching attribute to monitor {monitor_type} on agent {agent_id}")
 
@@ -45,6 +56,8 @@ def attach_attribute_to_monitor(agent_id, monitor_type, payload):
         logger.error(e)
         return False
 
+    _invalidate_monitor_attributes(monitor_id)
+
     logger.info(
         f"Attached attribute {attribute_name} to monitor {monitor_id} with value {attribute_value}"
     )
@@ -92,6 +105,8 @@ def update_monitor_attribute(agent_id, monitor_type, payload):
             logger.error(e)
             return False
 
+        _invalidate_monitor_attributes(monitor_id)
+
     logger.info(
         f"Updating attribute {attribute_name} to monitor {monitor_id} with value {attribute_value}"
     )
@@ -133,5 +148,7 @@ def remove_attribute_from_monitor(agent_id, monitor_type, payload):
         logger.error(e)
         return False
 
+    _invalidate_monitor_attributes(monitor_id)
+
     logger.info(f"Removing attribute {attribute_name} from monitor {monitor_id}")
     return True
@@ -1,10 +1,9 @@
+from datetime import datetime, timezone
+
 from application.common import logger, constants
 from application.extensions import DATABASE
 from application.models.monitor import Monitor
 from application.workers import celery_utils
-from application.workers.monitor_agent import agent_health_monitor
-from application.workers.monitor_dedicated_server import dedicated_server_monitor
-from application.workers.monitor_dedicated_server_updates import dedicated_server_update_monitor
 
 
 def create_monitor(agent_id, monitor_type):
@@ -15,6 +14,14 @@ def create_monitor(agent_id, monitor_type):
     monitor_type_str = monitor_type
     monitor_type = constants.monitor_type_from_string(monitor_type)
 
+    if monitor_type == constants.MonitorTypes.NOT_SET:
+        logger.critical(f"Monitor type {monitor_type_str} not supported.")
+        return False
+
+    # The monitor scheduler dispatches the monitor as soon as next_check comes due, so setting it
+    # to now kicks off the first check right away.
+    now = datetime.now(timezone.utc)
+
     if monitor_obj is not None:
         logger.debug(f"Monitor already exists for agent {agent_id} with type {monitor_type_str}")
 
@@ -23,8 +30,9 @@ def create_monitor(agent_id, monitor_type):
             logger.error(f"Monitor for agent {agent_id} with type {monitor_type_str} has a fault.")
             return False
 
-        # Update the monitor record to be active
-        update_dict = {"active": True}
+        # Update the monitor record to be active. Bumping the generation makes sure no leftover
+        # run from before the monitor was disabled can act on it.
+        update_dict = {"active": True, "next_check": now, "generation": Monitor.generation + 1}
         monitor_qry.update(update_dict)
     else:
         # Create a new Monitor record
@@ -32,6 +40,7 @@ def create_monitor(agent_id, monitor_type):
             agent_id=agent_id,
             monitor_type=monitor_type_str,
             active=True,
+            next_check=now,
         )
         DATABASE.session.add(monitor_obj)
 
@@ -42,36 +51,6 @@ def create_monitor(agent_id, monitor_type):
         logger.error(e)
         return False
 
-    monitor_id = monitor_obj.monitor_id
-    new_task = None
-
-    # Now kick off the monitor that was just created and/or enabled.
-    if monitor_type == constants.MonitorTypes.AGENT:
-        # This is the Agent Health Monitor
-        new_task = agent_health_monitor.apply_async([monitor_obj.monitor_id])
-    elif monitor_type == constants.MonitorTypes.DEDICATED_SERVER:
-        # This is the dedicated server health monitor
-        new_task = dedicated_server_monitor.apply_async([monitor_obj.monitor_id])
-    elif monitor_type == constants.MonitorTypes.UPDATES:
-        # This is the updates monitor which checks for server updates
-        new_task = dedicated_server_update_monitor.apply_async([monitor_obj.monitor_id])
-    else:
-        logger.critical(f"Monitor type {monitor_type_str} not supported.")
-        return False
-
-    if new_task:
-        try:
-            monitor_obj.task_id = new_task.id
-            DATABASE.session.commit()
-        except Exception as e:
-            logger.error(f"Failed to update task_id for monitor {monitor_id}")
-            logger.error(e)
-            DATABASE.session.rollback()
-            return False
-    else:
-        logger.critical(f"Failed to create task for monitor {monitor_id}")
-        return False
-
     return True
 
 
@@ -98,8 +77,15 @@ def disable_monitor(agent_id, monitor_type):
     # some operation. Check if the monitor has any active faults.
     has_fault = True if len(monitor_obj.faults()) > 0 else False
 
-    # Set active False, and next check is None because there will not be another check.
-    update_dict = {"active": False, "next_check": None, "has_fault": has_fault, "task_id": None}
+    # Set active False, and next check is None because there will not be another check. The
+    # generation bump marks any run still in flight as stale.
+    update_dict = {
+        "active": False,
+        "next_check": None,
+        "has_fault": has_fault,
+        "task_id": None,
+        "generation": Monitor.generation + 1,
+    }
 
     monitor_qry.update(update_dict)
 
@@ -2,7 +2,7 @@ import json
 
 from flask_login import current_user
 
-from application.common import logger
+from application.common import logger, property_cache
 from application.extensions import DATABASE
 from application.models.default_property import DefaultProperty
 from application.models.property import Property
@@ -60,6 +60,8 @@ def create_property(user_id, property_name, payload):
         logger.error(f"Error creating property: {e}")
         return False
 
+    property_cache.invalidate(user_id)
+
     return True
 
 
@@ -101,6 +103,8 @@ def update_property(user_id, property_name, payload):
         logger.error(f"Error updating property: {e}")
         return False
 
+    property_cache.invalidate(user_id)
+
     return True
 
 
@@ -128,4 +132,6 @@ def delete_property(user_id, property_name):
         logger.error(f"Error deleting property: {e}")
         return False
 
+    property_cache.invalidate(user_id)
+
     return True
@@ -20,7 +20,7 @@ from application.api.controllers import messages
 from application.api.controllers import monitors
 from application.api.controllers import properties
 from application.api.controllers import users
-from application.common import logger, constants, toolbox, timezones
+from application.common import logger, constants, message_count_cache, toolbox, timezones
 from application.common.decorators import admin_required
 from application.common.decorators import agent_permission_required
 from application.common.decorators import verified_required
@@ -281,13 +281,15 @@ def system_agent_logs(agent_id: int):
         "agent_owner_id": agent_obj.owner_id,
     }
 
-    agent_logs_list = agent_logs.get_all_agent_logs(agent_id)
+    # Only the first page is rendered. The page fetches the rest from the backend on demand.
+    agent_logs_page = agent_logs.get_all_agent_logs(agent_id)
 
     return render_template(
         "protected/system_agent_logs.html",
         pretty_name=current_app.config["APP_PRETTY_NAME"],
         agent_info=agent_info,
-        agent_logs=agent_logs_list,
+        agent_logs=agent_logs_page["items"],
+        next_cursor=agent_logs_page["next_cursor"],
     )
 
 
@@ -626,6 +628,10 @@ def user_messages():
             usr_qry.update({"last_message_read_time": datetime.now()})
             DATABASE.session.commit()
 
+            # Everything up to the new read time is read. Read the time back as stored, so the
+            # counts are cached under the same key the navbar will look them up with.
+            message_count_cache.reset(current_user.user_id, current_user.last_message_read_time)
+
     # Messages: Un-read and of type global and direct.
     global_message_list = messages.get_global_messages()
     direct_message_list = messages.get_direct_messages()
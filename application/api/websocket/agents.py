@@ -8,15 +8,14 @@ Docs:
 """
 
 from flask import current_app
-from flask_socketio import emit
+from flask_login import current_user
+from flask_socketio import emit, join_room
 
-from application.common import logger, toolbox
+from application.common import logger, operator_pool, game_commands
 from application.extensions import SOCKETIO
 from application.models.agent import Agents
 from application.models.user import UserSql
 
-from operator_client import Operator
-
 
 @SOCKETIO.on("message")
 def handle_message(data):
@@ -39,17 +38,9 @@ def get_agent_status(input_dict):
         logger.critical("Agent ID Does not exist... cannot contact agent.")
         response.update({"status": "Error"})
 
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-
     verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
 
-    client = Operator(
-        hostname,
-        agent_obj.port,
-        verbose,
-        token=agent_obj.access_token,
-        certificate=agent_obj.ssl_public_cert,
-    )
+    client = operator_pool.get_agent_client(agent_obj, verbose)
 
     client_response = client.architect.get_health(secure_version=True)
 
@@ -79,18 +70,9 @@ def get_agent_info(input_dict):
         logger.critical("Agent ID Does not exist... cannot contact agent.")
         response.update({"agent_info": "Error"})
 
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-
     verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
 
-    client = Operator(
-        hostname,
-        agent_obj.port,
-        verbose,
-        token=agent_obj.access_token,
-        certificate=agent_obj.ssl_public_cert,
-        timeout=10,
-    )
+    client = operator_pool.get_agent_client(agent_obj, verbose, timeout=10)
 
     client_response = client.architect.get_agent_info()
 
@@ -107,106 +89,28 @@ def get_agent_info(input_dict):
     emit("respond_agent_info", response, json=True, namespace="/system/agent/info")
 
 
-@SOCKETIO.on("get_action_result", namespace="/system/agent/info")
-def get_action_result(input_dict):
-    response = {}
-
-    if "agent_id" not in input_dict:
-        logger.critical("Agent ID not provided...")
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
-        return
-
-    if "action" not in input_dict:
-        logger.critical("Action not provided...")
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
-        return
-
-    if "game_name" not in input_dict:
-        logger.critical("Game Server Name not provided...")
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
-        return
-
-    if "attempt_number" not in input_dict:
-        logger.critical("Need to know which attempt this is...")
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
+# Join the room that the user's game command changes are published to.
+@SOCKETIO.on("subscribe_game_commands", namespace=game_commands.COMMAND_NAMESPACE)
+def subscribe_game_commands():
+    if not current_user.is_authenticated:
         return
 
-    response.update(
-        {
-            "agent_id": input_dict["agent_id"],
-            "action": input_dict["action"],
-            "game_name": input_dict["game_name"],
-            "attempt_number": input_dict["attempt_number"],
-        }
-    )
+    join_room(game_commands.get_user_room(current_user.user_id))
 
-    command_action = input_dict["action"]
-    game_name = input_dict["game_name"]
 
-    # Ensure the command action supplied is valid.
-    if command_action not in ["startup", "shutdown", "restart", "update"]:
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
+# Send a user one of their game commands as it stands. The page asks for this when the command's
+# changes have not arrived for a while, e.g. when workers cannot reach Socket.IO.
+@SOCKETIO.on("get_game_command", namespace=game_commands.COMMAND_NAMESPACE)
+def get_game_command(input_dict):
+    if not current_user.is_authenticated or "command_id" not in input_dict:
         return
 
-    agent_obj = Agents.query.filter_by(agent_id=input_dict["agent_id"]).first()
+    command_info = game_commands.get_command_info(input_dict["command_id"], current_user.user_id)
 
-    if agent_obj is None:
-        logger.critical("Agent ID Does not exist... cannot contact agent.")
-        response.update({"result": "Error"})
-        emit("respond_action_result", response, json=True, namespace="/system/agent/info")
+    if command_info is None:
+        logger.error(f"Game Command {input_dict['command_id']} not found for this user.")
         return
 
-    hostname = toolbox.format_url_prefix(agent_obj.hostname)
-
-    verbose = current_app.config["OPERATOR_CLIENT_VERBOSE"]
-
-    client = Operator(
-        hostname,
-        agent_obj.port,
-        verbose,
-        token=agent_obj.access_token,
-        certificate=agent_obj.ssl_public_cert,
+    emit(
+        game_commands.COMMAND_STATUS_EVENT, command_info, namespace=game_commands.COMMAND_NAMESPACE
     )
-
-    if command_action in ["startup", "shutdown", "restart"]:
-        client_response = client.game.get_game_status(input_dict["game_name"])
-
-        if client_response is None:
-            logger.error("Contacted agent, but it did not respond.")
-            response.update({"result": "Error"})
-        else:
-            response.update({"result": client_response})
-    else:
-        client_response = client.game.get_game_by_name(input_dict["game_name"])
-        action = client_response["actions"][0]
-        if action["type"] != "updating":
-            response.update({"result": "Error"})
-        else:
-            thread_ident = action["result"]
-            thread_alive = client.app.is_thread_alive(thread_ident)
-            update_state = {"status": "updating"} if thread_alive else {"status": "complete"}
-
-            if not thread_alive:
-                # Get the game now, that it's been updated, and update the agent so that it
-                # knows what the current build id is.
-                game_data = client.game.get_game_by_name(game_name)
-                game_id = game_data["items"][0]["game_id"]
-                steam_id = game_data["items"][0]["game_steam_id"]
-                game_install_path = game_data["items"][0]["game_install_dir"]
-                steam_install_dir = client.app.get_setting_by_name("steam_install_dir")
-
-                steam_build_id = client.steam.get_steam_app_build_id(
-                    steam_install_dir, game_install_path, steam_id
-                )
-
-                if steam_build_id:
-                    client.game.update_game_data(game_id, game_steam_build_id=steam_build_id)
-
-            response.update({"result": update_state})
-
-    emit("respond_action_result", response, json=True, namespace="/system/agent/info")
@@ -1,11 +1,34 @@
 from flask_login import current_user
-from flask_socketio import emit
+from flask_socketio import emit, join_room
 
-from application.common import logger, constants, timezones
+from application.common import logger, constants, monitor_events, timezones
 from application.extensions import SOCKETIO
+from application.models.agent import Agents, get_agent_user_ids
 from application.models.monitor import Monitor
 
 
+# Join the room that monitor changes for the agent are published to. Only the owner and the users
+# the agent is shared with may join.
+@SOCKETIO.on("subscribe_monitor_status", namespace=monitor_events.MONITOR_NAMESPACE)
+def subscribe_monitor_status(input_dict):
+    if not current_user.is_authenticated or "agent_id" not in input_dict:
+        return
+
+    agent_id = int(input_dict["agent_id"])
+    agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
+
+    if agent_obj is None:
+        logger.critical(f"Agent ID {agent_id} does not exist... cannot subscribe.")
+        return
+
+    if agent_obj.owner_id != current_user.user_id:
+        if current_user.user_id not in get_agent_user_ids([agent_id])[agent_id]:
+            logger.warning(f"User {current_user.user_id} may not subscribe to agent {agent_id}.")
+            return
+
+    join_room(monitor_events.get_agent_room(agent_id))
+
+
 @SOCKETIO.on("get_monitor_status", namespace="/system/agent/monitor")
 def get_monitor_status(input_dict):
     logger.debug(f"Received get_monitor_status request: {input_dict}")
@@ -0,0 +1,99 @@
+"""
+This module buffers automated agent logs and writes them in batches.
+
+Monitors log every auto-restart and auto-update. Writing each log as it happens costs a user and
+agent lookup plus a commit inside the monitor run. Logs added here are instead held in memory and
+written with a single multi-row insert once AGENT_LOG_BUFFER_MAX_RECORDS are pending or the oldest
+has waited AGENT_LOG_BUFFER_FLUSH_SECONDS. The monitor tasks flush whatever is left when they
+finish, and the worker flushes on shutdown, so logs are not left behind in an idle process.
+
+Logs created on behalf of a user should keep using agent_logs.create_agent_log, which validates
+the user and agent and reports whether the log was written.
+"""
+
+import threading
+import time
+
+from datetime import datetime, timezone
+from sqlalchemy import insert
+
+from application.common import logger, constants
+from application.extensions import DATABASE
+from application.models.agent_log import AgentLog
+
+_BUFFER_LOCK = threading.Lock()
+_BUFFER = {"records": [], "oldest": None}
+
+
+# Insert the records in one statement. Should that fail, e.g. because an agent was deleted while
+# its log sat in the buffer, fall back to one insert per record so the others are still written.
+def _write_records(records: list) -> int:
+    try:
+        DATABASE.session.execute(insert(AgentLog), records)
+        DATABASE.session.commit()
+        return len(records)
+    except Exception as e:
+        DATABASE.session.rollback()
+        logger.error(f"Error writing {len(records)} buffered agent log(s): {e}")
+
+    num_written = 0
+
+    for record in records:
+        try:
+            DATABASE.session.execute(insert(AgentLog), [record])
+            DATABASE.session.commit()
+            num_written += 1
+        except Exception as e:
+            DATABASE.session.rollback()
+            logger.error(f"Dropping agent log for Agent ID {record['agent_id']}: {e}")
+
+    return num_written
+
+
+def add(user_id: int, agent_id: int, message: str, is_automated: bool = True) -> None:
+    """
+    Buffer an agent log. The log is timestamped now, not when it is written.
+
+    Flushes the buffer once it is full, or once the oldest pending log is due.
+    """
+    record = {
+        "agent_id": agent_id,
+        "user_id": user_id,
+        "message": message,
+        "timestamp": datetime.now(timezone.utc),
+        "is_automated": is_automated,
+    }
+    now = time.monotonic()
+
+    with _BUFFER_LOCK:
+        _BUFFER["records"].append(record)
+
+        if _BUFFER["oldest"] is None:
+            _BUFFER["oldest"] = now
+
+        is_full = len(_BUFFER["records"]) >= constants.AGENT_LOG_BUFFER_MAX_RECORDS
+        is_due = now - _BUFFER["oldest"] >= constants.AGENT_LOG_BUFFER_FLUSH_SECONDS
+
+    if is_full or is_due:
+        flush()
+
+
+def flush() -> int:
+    """Write every pending log. Returns the number of logs written."""
+    with _BUFFER_LOCK:
+        records = _BUFFER["records"]
+        _BUFFER["records"] = []
+        _BUFFER["oldest"] = None
+
+    if len(records) == 0:
+        return 0
+
+    logger.debug(f"Flushing {len(records)} buffered agent log(s).")
+
+    return _write_records(records)
+
+
+def pending() -> int:
+    """Get the number of logs waiting to be written."""
+    with _BUFFER_LOCK:
+        return len(_BUFFER["records"])
@@ -17,6 +17,22 @@ class FriendRequestStates(Enum):
     CANCELED = 3
 
 
+# Game server commands requested by users, as tracked in the game command journal. These are stored
+# by name.
+class GameCommandTypes(Enum):
+    STARTUP = 0
+    SHUTDOWN = 1
+    RESTART = 2
+    UPDATE = 3
+
+
+class GameCommandStates(Enum):
+    QUEUED = 0
+    RUNNING = 1
+    COMPLETED = 2
+    FAILED = 3
+
+
 class GroupInviteStates(Enum):
     PENDING = 0
     ACCEPTED = 1
@@ -44,6 +60,24 @@ class ServerStates(Enum):
     UNKNOWN = 4
 
 
+# Multi-step operations on a dedicated server, driven one short step at a time by a worker. These
+# are stored by name.
+class ServerOperationTypes(Enum):
+    START = 0
+    RESTART = 1
+    UPDATE = 2
+    STOP = 3
+
+
+class ServerOperationStates(Enum):
+    STOPPING = 0
+    UPDATING = 1
+    WAITING_FOR_UPDATE = 2
+    STARTING = 3
+    COMPLETED = 4
+    FAILED = 5
+
+
 # Conversion functions between strings and Enums can go in this file.
 
 
@@ -105,10 +139,37 @@ DEFAULT_PER_PAGE_MAX = 100000
 # Misc Application Constants
 DEFAULT_SESSION_HOURS = 6
 DEFAULT_EMAIL_DELAY_SECONDS = 10
+# SES accepts at most this many destinations per send call.
+SES_MAX_RECIPIENTS = 50
+# Emails per second sent by a single worker process, and how many SES calls may be in flight.
+SES_MAX_SEND_RATE = 10
+SES_SEND_CONCURRENCY = 4
+# Rebuild the SES client this long before its temporary credentials expire.
+SES_CREDENTIAL_REFRESH_SECONDS = 5 * 60
 # https://docs.aws.amazon.com/AmazonECS/latest/developerguide/task-metadata-endpoint-v2.html
 CONTAINER_CREDENTIALS_API_IP = "169.254.170.2"
+# Task role credentials are refreshed in the background once they are within the refresh window of
+# expiring, and are never handed out within the margin of expiring.
+CREDENTIALS_API_TIMEOUT = 2  # seconds
+CREDENTIALS_REFRESH_AHEAD = 5 * 60  # seconds
+CREDENTIALS_EXPIRY_MARGIN = 60  # seconds
 AGENT_SMITH_DEFAULT_PORT = 3000
 NO_SESSION_ID = "NO_SESSION_ID"
+# Operator clients are kept per agent, per process, so connections to an agent get reused. Idle
+# clients are dropped after this long, and the least recently used go first past the cap.
+OPERATOR_POOL_IDLE_SECONDS = 300
+OPERATOR_POOL_MAX_CLIENTS = 256
+# Every process checks whether the system settings changed this often, and reloads them if so.
+# Admin edits invalidate the cache of the process that handled the edit right away.
+SETTINGS_CACHE_CHECK_SECONDS = 5
+# Every process checks whether a user's properties changed this often, and reloads them if so.
+# Property edits invalidate the cache of the process that handled the edit right away.
+USER_PROPERTIES_CACHE_CHECK_SECONDS = 5
+USER_PROPERTIES_CACHE_MAX_USERS = 10000
+# Unread message counts are cached per process for this long, so a new message can take this long
+# to show up in the count.
+UNREAD_MESSAGES_CACHE_TTL_SECONDS = 30
+UNREAD_MESSAGES_CACHE_MAX_ENTRIES = 20000
 
 # Logging
 DEFAULT_LOG_LEVEL = logging.NOTSET
@@ -136,13 +197,41 @@ AGENT_SMITH_TIMEOUT = 10  # seconds
 # These are the invalid statuses that can be returned from the agent. If Agent Smith ever
 # alters what these status are, then this will become broken.
 AGENT_SMITH_INVALID_HEALTH = ["InvalidAccessToken", "SSLError", "SSLCertMissing", None]
+# Upper bound on the number of agents probed at the same time by a single worker process.
+AGENT_HEALTH_PROBE_CONCURRENCY = 32
 DEFAULT_MONITOR_TESTING_INTERVAL = 60  # seconds
 DEFAULT_MONITOR_INTERVAL = 60 * SECONDS_PER_MINUTE  # 1 Hours
+# The scheduler wakes up on this interval and dispatches, at most, a batch worth of due monitors.
+MONITOR_SCHEDULER_INTERVAL = 10  # seconds
+MONITOR_SCHEDULER_BATCH_SIZE = 500
+# Due monitors are split into batches of this size, each evaluated by a single task.
+MONITOR_RUN_BATCH_SIZE = 50
+# A dispatched monitor holds its lease this long. If the run never completes (e.g. the worker
+# restarted), the monitor becomes due again once the lease expires.
+MONITOR_LEASE_SECONDS = 60 * SECONDS_PER_MINUTE
+# Server operations that have not advanced for this long, e.g. because the worker running them
+# restarted, are picked back up by a sweep running on this interval.
+SERVER_OPERATION_STALL_SECONDS = 5 * SECONDS_PER_MINUTE
+SERVER_OPERATION_SWEEP_INTERVAL = SECONDS_PER_MINUTE
 
 # Pricing Model Related Constants
 DEFAULT_USERS_PER_AGENT_FREE = 2
 DEFAULT_USERS_PER_AGENT_PAID = 10
 DEFAULT_AGENT_LOGS_PER_AGENT_FREE = 3
+# Subscribed users get agent logs a page at a time, newest first.
+AGENT_LOGS_PAGE_SIZE = 100
+# Automated agent logs older than this, by the agent owner's tier, are purged by the retention
+# worker. These are the defaults of the system settings of the same name.
+AGENT_LOG_RETENTION_DAYS_FREE = 30
+AGENT_LOG_RETENTION_DAYS_PAID = 365
+AGENT_LOG_RETENTION_INTERVAL = SECONDS_PER_HOUR
+# Each purge deletes at most this many logs per statement, and at most this many chunks per run.
+AGENT_LOG_RETENTION_CHUNK_SIZE = 1000
+AGENT_LOG_RETENTION_MAX_CHUNKS = 100
+# Automated agent logs are buffered and written once this many are pending or the oldest has
+# waited this long, whichever comes first.
+AGENT_LOG_BUFFER_MAX_RECORDS = 100
+AGENT_LOG_BUFFER_FLUSH_SECONDS = 5
 DEFAULT_AGENTS_PER_USER_FREE = 1
 DEFAULT_AGENTS_PER_USER_PAID = 6
 
@@ -232,6 +321,19 @@ SYSTEM_SETTINGS = {
         "category": "monitor",
         "type": "bool",
     },
+    # Agent Logs
+    "AGENT_LOG_RETENTION_DAYS_FREE": {
+        "pretty": "Agent Log Retention (Free)",
+        "description": "Days to keep automated agent logs of free users' agents.",
+        "category": "retention",
+        "type": "int",
+    },
+    "AGENT_LOG_RETENTION_DAYS_PAID": {
+        "pretty": "Agent Log Retention (Paid)",
+        "description": "Days to keep automated agent logs of subscribed users' agents.",
+        "category": "retention",
+        "type": "int",
+    },
     # Google Signin
     "GOOGLE_SIGNUP_ENABLED": {
         "pretty": "Google Signup Enabled",
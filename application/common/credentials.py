@@ -1,13 +1,27 @@
 import os
 import requests
+import threading
 
+from datetime import datetime, timezone, timedelta
 from flask import current_app
 
 from application.common import logger
-from application.common.constants import CONTAINER_CREDENTIALS_API_IP
+from application.common.constants import (
+    CONTAINER_CREDENTIALS_API_IP,
+    CREDENTIALS_API_TIMEOUT,
+    CREDENTIALS_EXPIRY_MARGIN,
+    CREDENTIALS_REFRESH_AHEAD,
+)
 
 _LOCAL_DEBUG = False
 
+# Keep-alive session for the container credentials API.
+_SESSION = requests.Session()
+
+# Task role credentials are cached until shortly before they expire.
+_CACHE_LOCK = threading.Lock()
+_CACHE = {"credentials": None, "expires_at": None, "is_refreshing": False}
+
 
 def get_credentials():
     task_credentials = get_task_credentials()
@@ -45,26 +59,93 @@ def get_user_provided_credentials():
     return credentials
 
 
+def get_expiration(credentials: dict) -> datetime:
+    """Parse the Expiration field of temporary credentials, or None if there is not one."""
+    expiration = credentials.get("Expiration")
+
+    if expiration is None:
+        return None
+
+    try:
+        return datetime.fromisoformat(expiration.replace("Z", "+00:00"))
+    except ValueError:
+        logger.warning(f"Unable to parse credential expiration: {expiration}")
+        return None
+
+
+def _fetch_task_credentials(endpoint_url: str):
+    try:
+        resp = _SESSION.get(endpoint_url, timeout=CREDENTIALS_API_TIMEOUT)
+    except requests.RequestException as error:
+        logger.error(f"Unable to reach the credentials API: {error}")
+        return None
+
+    if resp.status_code != 200:
+        logger.error(
+            f"Unable to retrieve any information from API. Status Code: {resp.status_code}"
+        )
+        return None
+
+    credentials = resp.json()
+
+    # Only temporary credentials with a known expiration get cached.
+    expires_at = get_expiration(credentials)
+
+    if expires_at is not None:
+        with _CACHE_LOCK:
+            _CACHE["credentials"] = credentials
+            _CACHE["expires_at"] = expires_at
+
+    return credentials
+
+
+def _refresh_task_credentials(endpoint_url: str) -> None:
+    try:
+        _fetch_task_credentials(endpoint_url)
+    finally:
+        with _CACHE_LOCK:
+            _CACHE["is_refreshing"] = False
+
+
 def get_task_credentials():
     creds_uri = os.environ.get("AWS_CONTAINER_CREDENTIALS_RELATIVE_URI", "")
-    credentials = None
 
     if creds_uri == "":
         logger.warning("AWS_CONTAINER_CREDENTIALS_RELATIVE_URI is Not Set")
+        return None
+
+    # Don't want to configure this via env. It's just for local testing.
+    if _LOCAL_DEBUG:
+        endpoint_url = "http://{}{}".format("localhost:8888", creds_uri)
     else:
-        # Don't want to configure this via env. It's just for local testing.
-        if _LOCAL_DEBUG:
-            endpoint_url = "http://{}{}".format("localhost:8888", creds_uri)
-        else:
-            endpoint_url = "http://{}{}".format(CONTAINER_CREDENTIALS_API_IP, creds_uri)
-
-        logger.info(f"AWS Relative Endpoint: {endpoint_url}")
-        resp = requests.get(endpoint_url)
-        if resp.status_code == 200:
-            credentials = resp.json()
-        else:
-            logger.error(
-                f"Unable to retrieve any information from API. Status Code: {resp.status_code}"
-            )
+        endpoint_url = "http://{}{}".format(CONTAINER_CREDENTIALS_API_IP, creds_uri)
 
-    return credentials
+    now = datetime.now(timezone.utc)
+
+    # Serve cached credentials while they are still good. Once they enter the refresh window, new
+    # ones are fetched in the background so that callers never wait on the API.
+    with _CACHE_LOCK:
+        credentials = _CACHE["credentials"]
+        expires_at = _CACHE["expires_at"]
+        start_refresh = False
+
+        if credentials is not None:
+            if now < expires_at - timedelta(seconds=CREDENTIALS_EXPIRY_MARGIN):
+                refresh_at = expires_at - timedelta(seconds=CREDENTIALS_REFRESH_AHEAD)
+
+                if now >= refresh_at and not _CACHE["is_refreshing"]:
+                    _CACHE["is_refreshing"] = True
+                    start_refresh = True
+            else:
+                credentials = None
+
+    if start_refresh:
+        threading.Thread(
+            target=_refresh_task_credentials, args=(endpoint_url,), daemon=True
+        ).start()
+
+    if credentials is not None:
+        return dict(credentials)
+
+    logger.info(f"AWS Relative Endpoint: {endpoint_url}")
+    return _fetch_task_credentials(endpoint_url)
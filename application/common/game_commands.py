@@ -0,0 +1,190 @@
+"""
+This module keeps the journal of game server commands and pushes their progress to the user.
+
+Starting, stopping, restarting, or updating a game server from the agent page is recorded as a
+GameCommand. The worker carrying the command out updates its row as it goes, and every change is
+emitted to the Socket.IO room of the user who asked for it, so the page hears when the command is
+done rather than asking the agent over and over. As with monitor changes, emits from workers reach
+the page through the Socket.IO message queue.
+"""
+
+from datetime import datetime, timezone
+
+from application.common import logger
+from application.common.constants import GameCommandStates, GameCommandTypes
+from application.common.constants import ServerOperationStates
+from application.extensions import DATABASE, SOCKETIO
+from application.models.game_command import GameCommand
+
+COMMAND_NAMESPACE = "/system/agent/info"
+COMMAND_STATUS_EVENT = "game_command_changed"
+
+
+def get_user_room(user_id: int) -> str:
+    """Get the name of the room that receives the game command changes for a user."""
+    return f"game_commands_{user_id}"
+
+
+def _get_command_info(command: GameCommand, progress: str = None) -> dict:
+    return {
+        "command_id": command.command_id,
+        "agent_id": command.agent_id,
+        "user_id": command.user_id,
+        "game_name": command.game_name,
+        "command_type": command.command_type,
+        "status": command.status,
+        "message": command.message,
+        "progress": progress,
+    }
+
+
+def get_command_info(command_id: int, user_id: int) -> dict:
+    """
+    Get where a game command got to, for the page to check on should its changes not arrive.
+
+    Args:
+        command_id: The command to look up.
+        user_id: The user asking. Only the user who sent the command may see it.
+
+    Returns:
+        The command, as published with its changes, or None if the user has no such command.
+    """
+    command = GameCommand.query.filter_by(command_id=command_id, user_id=user_id).first()
+
+    if command is None:
+        return None
+
+    return _get_command_info(command)
+
+
+def publish_command_changes(command_infos: list) -> None:
+    """
+    Publish changed game commands to the users who asked for them. Publishing is best effort; a
+    command never fails because its change could not be published.
+
+    Args:
+        command_infos: The changed commands, as returned by track_operation.
+    """
+    # Socket.IO is not set up, e.g. in a standalone script. There is no one to publish to.
+    if SOCKETIO.server is None:
+        return
+
+    for command_info in command_infos:
+        try:
+            SOCKETIO.emit(
+                COMMAND_STATUS_EVENT,
+                command_info,
+                namespace=COMMAND_NAMESPACE,
+                to=get_user_room(command_info["user_id"]),
+            )
+        except Exception as error:
+            logger.error(
+                f"Game Command {command_info['command_id']} - Unable to publish change: {error}"
+            )
+
+
+def create_game_command(
+    user_id: int, agent_id: int, game_name: str, command_type: GameCommandTypes
+) -> int:
+    """
+    Record a game server command that is about to be handed to a worker.
+
+    Returns:
+        The ID of the new command, or None if it could not be recorded.
+    """
+    now = datetime.now(timezone.utc)
+
+    command = GameCommand(
+        agent_id=agent_id,
+        user_id=user_id,
+        game_name=game_name,
+        command_type=command_type.name,
+        status=GameCommandStates.QUEUED.name,
+        created_at=now,
+        updated_at=now,
+    )
+
+    try:
+        DATABASE.session.add(command)
+        DATABASE.session.commit()
+    except Exception as error:
+        logger.critical(error)
+        DATABASE.session.rollback()
+        return None
+
+    return command.command_id
+
+
+def update_game_command(
+    command_id: int, status: GameCommandStates, message: str = None, operation_id: int = None
+) -> bool:
+    """
+    Record how a game server command is going, and let the user who asked for it know.
+
+    Args:
+        command_id: The command to update.
+        status: Where the command got to.
+        message: Details for the user, e.g. why the command failed.
+        operation_id: The server operation now carrying out the command, if any.
+
+    Returns:
+        True if the command was updated, False otherwise.
+    """
+    command = GameCommand.query.filter_by(command_id=command_id).first()
+
+    if command is None:
+        logger.error(f"Game Command {command_id} not found.")
+        return False
+
+    command.status = status.name
+    command.message = message
+    command.updated_at = datetime.now(timezone.utc)
+
+    if operation_id is not None:
+        command.operation_id = operation_id
+
+    command_info = _get_command_info(command)
+
+    try:
+        DATABASE.session.commit()
+    except Exception as error:
+        logger.critical(error)
+        DATABASE.session.rollback()
+        return False
+
+    publish_command_changes([command_info])
+
+    return True
+
+
+def track_operation(operation) -> list:
+    """
+    Bring the commands carried out by a server operation up to date with it. Call this before the
+    operation is committed, so the commands are written along with it, then pass the result to
+    publish_command_changes once the commit is done.
+
+    Args:
+        operation: The server operation that moved along.
+
+    Returns:
+        The changed commands, to publish.
+    """
+    commands = GameCommand.query.filter_by(operation_id=operation.operation_id).all()
+
+    if operation.state == ServerOperationStates.COMPLETED.name:
+        status = GameCommandStates.COMPLETED
+    elif operation.state == ServerOperationStates.FAILED.name:
+        status = GameCommandStates.FAILED
+    else:
+        status = GameCommandStates.RUNNING
+
+    now = datetime.now(timezone.utc)
+    command_infos = []
+
+    for command in commands:
+        command.status = status.name
+        command.message = operation.message
+        command.updated_at = now
+        command_infos.append(_get_command_info(command, progress=operation.state))
+
+    return command_infos
@@ -0,0 +1,52 @@
+"""
+This module caches each user's unread message counts.
+
+The navbar shows the number of unread direct and global messages on every protected page, and
+each count is a COUNT over the messages table. Counts are held per process, keyed by user and by
+the user's last_message_read_time, for UNREAD_MESSAGES_CACHE_TTL_SECONDS. Marking messages as read
+moves last_message_read_time, which on its own makes the old counts miss. New messages are
+mostly sent by the workers, whose caches the web processes cannot see, so a new message shows up
+in the count once the cached count expires. A new global message also drops every cached global
+count of the process that sent it.
+"""
+
+from application.common import constants
+from application.common.ttl_cache import TTLCache
+
+DIRECT = "direct"
+GLOBAL = "global"
+
+_CACHE = TTLCache(
+    constants.UNREAD_MESSAGES_CACHE_TTL_SECONDS, constants.UNREAD_MESSAGES_CACHE_MAX_ENTRIES
+)
+
+
+def get(user_id: int, kind: str, last_read_time) -> int:
+    """Get a cached unread count, or None when it needs to be counted."""
+    entry = _CACHE.get((user_id, kind))
+
+    if entry is None:
+        return None
+
+    count, read_time = entry
+
+    if read_time != last_read_time:
+        return None
+
+    return count
+
+
+def put(user_id: int, kind: str, last_read_time, count: int) -> None:
+    """Cache a freshly counted unread count."""
+    _CACHE.put((user_id, kind), (count, last_read_time))
+
+
+def invalidate_global() -> None:
+    """Drop every cached global count, after a new global message."""
+    _CACHE.pop_matching(lambda key: key[1] == GLOBAL)
+
+
+def reset(user_id: int, last_read_time) -> None:
+    """Cache zero unread messages for a user who just read everything."""
+    put(user_id, DIRECT, last_read_time, 0)
+    put(user_id, GLOBAL, last_read_time, 0)
@@ -0,0 +1,67 @@
+"""
+This module publishes monitor state changes to the agent info page.
+
+Rather than the page asking for the full monitor status over and over, monitors publish what
+changed (check times, new faults, the fault flag, being disabled) as it happens. Each agent has a
+Socket.IO room that the agent info page joins; changes are emitted to that room only. Workers have
+no socket connections of their own, so their emits go through the Socket.IO message queue (Redis),
+from which the web tier relays them to the room. Without a message queue, only changes made in the
+web process itself reach the page.
+"""
+
+from datetime import datetime
+
+from application.common import logger
+from application.extensions import SOCKETIO
+
+MONITOR_NAMESPACE = "/system/agent/monitor"
+MONITOR_STATUS_EVENT = "monitor_status_changed"
+
+
+def get_agent_room(agent_id: int) -> str:
+    """Get the name of the room that receives the monitor changes for an agent."""
+    return f"agent_monitors_{agent_id}"
+
+
+def get_monitor_info(monitor) -> dict:
+    """
+    Get what a published change needs to know about the monitor. Take this before committing, as
+    reading the monitor after a commit reloads it from the database.
+    """
+    return {
+        "agent_id": monitor.agent_id,
+        "monitor_id": monitor.monitor_id,
+        "monitor_type": monitor.monitor_type,
+    }
+
+
+def publish_monitor_change(monitor_info: dict, **changes) -> None:
+    """
+    Publish changes to a monitor to everyone viewing its agent.
+
+    Publishing is best effort. A monitor run never fails because the change could not be published;
+    the page still gets the full status the next time it asks.
+
+    Args:
+        monitor_info: The monitor that changed, from get_monitor_info.
+        **changes: The changed fields and their new values.
+    """
+    # Socket.IO is not set up, e.g. in a standalone script. There is no one to publish to.
+    if SOCKETIO.server is None:
+        return
+
+    payload = dict(monitor_info)
+    payload["changes"] = {
+        key: value.isoformat() if isinstance(value, datetime) else value
+        for key, value in changes.items()
+    }
+
+    try:
+        SOCKETIO.emit(
+            MONITOR_STATUS_EVENT,
+            payload,
+            namespace=MONITOR_NAMESPACE,
+            to=get_agent_room(monitor_info["agent_id"]),
+        )
+    except Exception as error:
+        logger.error(f"Monitor ID {monitor_info['monitor_id']} - Unable to publish change: {error}")
@@ -0,0 +1,118 @@
+"""
+This module keeps a process-wide pool of Operator clients.
+
+Building a new Operator client for every call to an agent means a new connection, and a new TLS
+handshake against the agent's certificate, every time. Clients here are kept per agent, keyed by
+hostname, port, and certificate fingerprint, so repeated calls to the same agent reuse the client
+and its keep-alive connections. Clients idle for longer than OPERATOR_POOL_IDLE_SECONDS are
+dropped, and past OPERATOR_POOL_MAX_CLIENTS the least recently used client is dropped.
+"""
+
+import hashlib
+import threading
+import time
+
+from collections import OrderedDict
+from flask import current_app, has_app_context
+
+from application.common import constants, toolbox
+
+from operator_client import Operator
+
+_POOL_LOCK = threading.Lock()
+_POOL = OrderedDict()
+
+
+class _PooledClient:
+    def __init__(self, client: Operator, verbose: bool, token: str) -> None:
+        self.client = client
+        self.verbose = verbose
+        self.token = token
+        self.last_used = time.monotonic()
+
+
+def _get_cert_fingerprint(certificate: str) -> str:
+    if certificate is None:
+        return None
+
+    return hashlib.sha256(certificate.encode("utf-8")).hexdigest()
+
+
+# Drop clients that have gone unused for too long. Caller must hold the pool lock.
+def _evict_idle(now: float) -> None:
+    expired = [
+        key
+        for key, entry in _POOL.items()
+        if now - entry.last_used > constants.OPERATOR_POOL_IDLE_SECONDS
+    ]
+
+    for key in expired:
+        del _POOL[key]
+
+
+def get_client(
+    hostname: str,
+    port: str,
+    verbose: bool,
+    token: str = None,
+    certificate: str = None,
+    timeout: int = None,
+) -> Operator:
+    """
+    Get an Operator client for an agent, reusing a pooled one when possible.
+
+    Takes the same arguments as Operator. The hostname is expected to already be formatted with
+    toolbox.format_url_prefix. A pooled client whose token no longer matches, e.g. because the
+    agent was re-registered, is replaced.
+    """
+    key = (hostname, str(port), _get_cert_fingerprint(certificate), timeout)
+    now = time.monotonic()
+
+    with _POOL_LOCK:
+        _evict_idle(now)
+
+        entry = _POOL.get(key)
+
+        if entry is not None and entry.token == token and entry.verbose == verbose:
+            entry.last_used = now
+            _POOL.move_to_end(key)
+            return entry.client
+
+        client_kwargs = {"token": token, "certificate": certificate}
+
+        if timeout is not None:
+            client_kwargs["timeout"] = timeout
+
+        client = Operator(hostname, port, verbose, **client_kwargs)
+
+        _POOL[key] = _PooledClient(client, verbose, token)
+        _POOL.move_to_end(key)
+
+        while len(_POOL) > constants.OPERATOR_POOL_MAX_CLIENTS:
+            _POOL.popitem(last=False)
+
+        return client
+
+
+def get_agent_client(agent_obj, verbose: bool = None, timeout: int = None) -> Operator:
+    """
+    Get a pooled Operator client for an agent object. Unless given, verbose follows the
+    OPERATOR_CLIENT_VERBOSE setting, so every caller shares the same client for an agent.
+    """
+    if verbose is None:
+        verbose = has_app_context() and current_app.config["OPERATOR_CLIENT_VERBOSE"]
+
+    return get_client(
+        toolbox.format_url_prefix(agent_obj.hostname),
+        agent_obj.port,
+        verbose,
+        token=agent_obj.access_token,
+        certificate=agent_obj.ssl_public_cert,
+        timeout=timeout,
+    )
+
+
+def clear() -> None:
+    """Drop every pooled client."""
+    with _POOL_LOCK:
+        _POOL.clear()
@@ -1,5 +1,8 @@
+import base64
+import json
 import sqlalchemy as db
 
+from datetime import datetime
 from flask import url_for
 from math import ceil
 
@@ -40,9 +43,143 @@ class Pagination(object):
         return data
 
 
+class KeysetPagination(object):
+    """
+    Cursor based pagination.
+
+    Rather than counting rows and skipping over an offset, each page seeks directly to the rows
+    after (or before) the cursor on an indexed key, such as (timestamp, id), so fetching a page
+    costs the same no matter how deep into the results it is. The cursors are opaque strings
+    that encode the key values of the first and last items of the page.
+    """
+
+    has_next = False
+    has_prev = False
+    items = None
+    next_cursor = None
+    prev_cursor = None
+    per_page = None
+    total = None
+
+    @staticmethod
+    def encode_cursor(values: list) -> str:
+        encoded = []
+
+        for value in values:
+            if isinstance(value, datetime):
+                encoded.append({"dt": value.isoformat()})
+            else:
+                encoded.append(value)
+
+        raw = json.dumps(encoded, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(raw).decode("ascii")
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> list:
+        try:
+            raw = base64.urlsafe_b64decode(cursor.encode("ascii"))
+            encoded = json.loads(raw)
+        except (ValueError, UnicodeError):
+            raise ValueError("Invalid pagination cursor.")
+
+        if not isinstance(encoded, list):
+            raise ValueError("Invalid pagination cursor.")
+
+        values = []
+
+        for value in encoded:
+            if isinstance(value, dict) and "dt" in value:
+                values.append(datetime.fromisoformat(value["dt"]))
+            else:
+                values.append(value)
+
+        return values
+
+    def paginate(
+        query,
+        keys: list,
+        per_page: int,
+        cursor: str = None,
+        direction: str = "next",
+        descending: bool = True,
+        with_count: bool = True,
+    ):
+        """
+        Get one page of a query, seeking on the given key columns.
+
+        Args:
+            query: The query to paginate. It must not already be ordered.
+            keys: The columns to seek on, most significant first. Together they must be unique,
+                e.g. (timestamp, primary key), and should be covered by an index.
+            per_page: The number of items per page.
+            cursor: A cursor from a previous page, or None for the first page.
+            direction: Whether to get the page "next" (after) or "prev" (before) the cursor.
+            descending: Whether the items are ordered newest/largest first.
+            with_count: Whether to count the total number of items. Skipping the count avoids a
+                full scan of the matching rows; total is then None.
+        """
+        data = KeysetPagination()
+        data.per_page = per_page
+
+        if direction not in ["next", "prev"]:
+            raise ValueError(f"Invalid pagination direction: {direction}")
+
+        is_prev = cursor is not None and direction == "prev"
+
+        # Walking backwards flips the order, and the items are put back in order afterwards.
+        is_descending = descending != is_prev
+
+        if with_count:
+            data.total = query.count()
+
+        if cursor is not None:
+            values = KeysetPagination.decode_cursor(cursor)
+
+            if len(values) != len(keys):
+                raise ValueError("Invalid pagination cursor.")
+
+            if is_descending:
+                query = query.filter(db.tuple_(*keys) < db.tuple_(*values))
+            else:
+                query = query.filter(db.tuple_(*keys) > db.tuple_(*values))
+
+        order = [key.desc() if is_descending else key.asc() for key in keys]
+
+        # Get one extra item to find out whether there is anything beyond this page.
+        items = query.order_by(*order).limit(per_page + 1).all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
+
+        if is_prev:
+            items.reverse()
+            data.has_prev = has_more
+            data.has_next = True
+        else:
+            data.has_prev = cursor is not None
+            data.has_next = has_more
+
+        data.items = items
+
+        if len(items) > 0:
+            if data.has_next:
+                data.next_cursor = KeysetPagination.encode_cursor(
+                    [getattr(items[-1], key.key) for key in keys]
+                )
+            if data.has_prev:
+                data.prev_cursor = KeysetPagination.encode_cursor(
+                    [getattr(items[0], key.key) for key in keys]
+                )
+
+        return data
+
+
 class PaginatedApi(object):
     @staticmethod
     def to_collection_dict(query, page, per_page, endpoint, **kwargs):
+        # Passing cursor_keys switches to cursor based pagination, where page is unused.
+        if kwargs.get("cursor_keys") is not None:
+            return PaginatedApi.to_cursor_collection_dict(query, per_page, endpoint, **kwargs)
+
         resources = Pagination.paginate(query, page, per_page, False)
 
         ignore_links = kwargs.get("ignore_links", False)
@@ -82,6 +219,67 @@ class PaginatedApi(object):
 
         return data
 
+    @staticmethod
+    def to_cursor_collection_dict(query, per_page, endpoint, **kwargs):
+        """
+        Same as to_collection_dict, but paginated with cursors. See KeysetPagination.paginate.
+
+        The keyword arguments cursor_keys, cursor, direction, descending, and with_count are
+        passed on to KeysetPagination.paginate. The cursors are always returned under _meta, since
+        callers that ignore links still need them to ask for the next page.
+        """
+        ignore_links = kwargs.pop("ignore_links", False)
+        cursor_keys = kwargs.pop("cursor_keys")
+        cursor = kwargs.pop("cursor", None)
+        direction = kwargs.pop("direction", "next")
+        descending = kwargs.pop("descending", True)
+        with_count = kwargs.pop("with_count", True)
+
+        resources = KeysetPagination.paginate(
+            query,
+            cursor_keys,
+            per_page,
+            cursor=cursor,
+            direction=direction,
+            descending=descending,
+            with_count=with_count,
+        )
+
+        data = {
+            "items": [item.to_dict() for item in resources.items],
+            "_meta": {
+                "per_page": per_page,
+                "total_items": resources.total,
+                "next_cursor": resources.next_cursor,
+                "prev_cursor": resources.prev_cursor,
+            },
+        }
+
+        if not ignore_links:
+            data["_links"] = {
+                "self": url_for(
+                    endpoint, cursor=cursor, direction=direction, per_page=per_page, **kwargs
+                ),
+                "next": (
+                    url_for(endpoint, cursor=resources.next_cursor, per_page=per_page, **kwargs)
+                    if resources.has_next
+                    else None
+                ),
+                "prev": (
+                    url_for(
+                        endpoint,
+                        cursor=resources.prev_cursor,
+                        direction="prev",
+                        per_page=per_page,
+                        **kwargs,
+                    )
+                    if resources.has_prev
+                    else None
+                ),
+            }
+
+        return data
+
     @classmethod
     def convert_from_strings(cls, inDict):
         # go through columsn
@@ -0,0 +1,85 @@
+"""
+This module caches each user's typed properties.
+
+User properties are read many times per page render, and by the workers for every alert, but only
+change when the user edits them. Within a request they are memoized on flask.g. Across requests they
+are held per process. Every USER_PROPERTIES_CACHE_CHECK_SECONDS, the next read of a user's
+properties checks their version, i.e. how many properties the user has and when the latest change
+was made, and only reloads them when that has moved. An edit made by any process therefore reaches
+every other process within USER_PROPERTIES_CACHE_CHECK_SECONDS. The properties controller also
+invalidates a user's entry right away in the process that made the edit.
+"""
+
+from flask import g, has_request_context
+from sqlalchemy import func
+
+from application.common import constants
+from application.common.ttl_cache import TTLCache
+from application.extensions import DATABASE
+from application.models.property import Property
+
+_CACHE = TTLCache(
+    constants.USER_PROPERTIES_CACHE_CHECK_SECONDS, constants.USER_PROPERTIES_CACHE_MAX_USERS
+)
+
+
+def _get_request_cache() -> dict:
+    if not has_request_context():
+        return None
+
+    if "user_properties" not in g:
+        g.user_properties = {}
+
+    return g.user_properties
+
+
+# Any insert, update, or delete of one of the user's properties changes this.
+def _get_version(user_id: int) -> tuple:
+    num_properties, last_updated = (
+        DATABASE.session.query(func.count(Property.property_id), func.max(Property.updated_at))
+        .filter(Property.user_id == user_id)
+        .one()
+    )
+
+    return (num_properties, last_updated)
+
+
+def get_properties(user_id: int, load_properties) -> dict:
+    """
+    Get the properties of a user, loading them only when they are not cached or have changed.
+
+    Args:
+        user_id: The user whose properties to get.
+        load_properties: Called with no arguments to load the properties from the database.
+    """
+    request_cache = _get_request_cache()
+
+    if request_cache is not None and user_id in request_cache:
+        return request_cache[user_id]
+
+    cached = _CACHE.get(user_id)
+
+    if cached is None:
+        # Time to check in with the database. Keep the properties already held if nothing changed.
+        version = _get_version(user_id)
+        cached = _CACHE.peek(user_id)
+
+        if cached is None or cached["version"] != version:
+            cached = {"properties": load_properties(), "version": version}
+
+        _CACHE.put(user_id, cached)
+
+    if request_cache is not None:
+        request_cache[user_id] = cached["properties"]
+
+    return cached["properties"]
+
+
+def invalidate(user_id: int) -> None:
+    """Drop the cached properties of a user so the next read goes to the database."""
+    _CACHE.pop(user_id)
+
+    request_cache = _get_request_cache()
+
+    if request_cache is not None:
+        request_cache.pop(user_id, None)
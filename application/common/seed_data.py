@@ -2,9 +2,8 @@ from flask import current_app, Flask
 from werkzeug.security import generate_password_hash
 
 from application.extensions import DATABASE, OAUTH_CLIENT
-from application.common import logger
+from application.common import logger, settings_cache
 from application.common.constants import SYSTEM_SETTINGS, SYSTEM_DEFAULT_PROPERTIES
-from application.common.toolbox import _get_setting
 from application.models.default_property import DefaultProperty
 from application.models.setting import SettingsSql
 from application.models.user import UserSql
@@ -38,6 +37,9 @@ def _handle_default_records(flask_app: Flask) -> None:
         if seeded_settings_obj is None:
             # System settings mirror config.py items.
             seed_system_settings(flask_app.config)
+        else:
+            # Settings added since the database was seeded are not there yet.
+            seed_missing_system_settings(flask_app.config)
 
         # Override the app name from the settings database.
         app_name = SettingsSql.query.filter_by(name="APP_NAME").first()
@@ -47,23 +49,29 @@ def _handle_default_records(flask_app: Flask) -> None:
         seed_system_default_properties()
 
 
+def _create_setting(setting, configuration) -> SettingsSql:
+    new_setting = SettingsSql()
+
+    if setting in configuration.keys():
+        value = str(configuration[setting])
+    else:
+        value = ""
+
+    new_setting.name = setting
+    new_setting.pretty_name = SYSTEM_SETTINGS[setting]["pretty"]
+    new_setting.description = SYSTEM_SETTINGS[setting]["description"]
+    new_setting.category = SYSTEM_SETTINGS[setting]["category"]
+    new_setting.data_type = SYSTEM_SETTINGS[setting]["type"]
+    new_setting.value = value
+
+    return new_setting
+
+
 def seed_system_settings(configuration):
     system_settings = SYSTEM_SETTINGS.keys()
 
     for setting in system_settings:
-        new_setting = SettingsSql()
-
-        if setting in configuration.keys():
-            value = str(configuration[setting])
-        else:
-            value = ""
-
-        new_setting.name = setting
-        new_setting.pretty_name = SYSTEM_SETTINGS[setting]["pretty"]
-        new_setting.description = SYSTEM_SETTINGS[setting]["description"]
-        new_setting.category = SYSTEM_SETTINGS[setting]["category"]
-        new_setting.data_type = SYSTEM_SETTINGS[setting]["type"]
-        new_setting.value = value
+        new_setting = _create_setting(setting, configuration)
 
         setting_qry = SettingsSql.query.filter_by(name=setting)
 
@@ -71,10 +79,32 @@ def seed_system_settings(configuration):
             DATABASE.session.add(new_setting)
 
     DATABASE.session.commit()
+    settings_cache.invalidate()
 
     configuration["IS_SEEDED"] = True
 
 
+def seed_missing_system_settings(configuration):
+    existing_settings = {name for (name,) in DATABASE.session.query(SettingsSql.name).all()}
+
+    missing_settings = [setting for setting in SYSTEM_SETTINGS if setting not in existing_settings]
+
+    if len(missing_settings) == 0:
+        return
+
+    for setting in missing_settings:
+        logger.info(f"Adding new system setting {setting}.")
+        DATABASE.session.add(_create_setting(setting, configuration))
+
+    try:
+        DATABASE.session.commit()
+    except Exception as error:
+        logger.error(error)
+        DATABASE.session.rollback()
+
+    settings_cache.invalidate()
+
+
 def seed_system_default_properties():
     for default_property in SYSTEM_DEFAULT_PROPERTIES:
         query = DefaultProperty.query.filter_by(property_name=default_property["property_name"])
@@ -108,14 +138,13 @@ def seed_system_default_properties():
 def update_system_settings():
     system_settings = SYSTEM_SETTINGS.keys()
 
-    # One DB Access per request minimizes number of accesses.
-    setting_objs = SettingsSql.query.all()
+    # Served from the settings cache, so most requests never touch the database.
+    setting_values = settings_cache.get_settings()
 
     for setting in system_settings:
         dtype = SYSTEM_SETTINGS[setting]["type"]
 
-        # TODO - Nested for loop.  Would be better to have O(n) instead we have O(n^2)
-        value = _get_setting(setting, setting_objs)
+        value = setting_values.get(setting)
 
         if value is None:
             logger.error(f"Setting {setting} not found in the database.")
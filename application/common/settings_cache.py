@@ -0,0 +1,70 @@
+"""
+This module keeps a process-local cache of the system settings.
+
+The settings are read on nearly every request, and by the workers on every monitor run and email,
+but only change when an admin edits them. They are loaded with a single query and held in memory.
+Every SETTINGS_CACHE_CHECK_SECONDS, the next read checks the version of the settings table, i.e.
+how many settings there are and when the latest change was made, and only reloads the settings
+when that has moved. An edit made by any process, web or worker, therefore reaches every other
+process within SETTINGS_CACHE_CHECK_SECONDS. Edits made through the admin panel also invalidate the
+cache right away in the process that made them.
+"""
+
+from sqlalchemy import func
+
+from application.common import constants
+from application.common.ttl_cache import TTLCache
+from application.extensions import DATABASE
+from application.models.setting import SettingsSql
+
+_SETTINGS_KEY = "settings"
+
+_CACHE = TTLCache(constants.SETTINGS_CACHE_CHECK_SECONDS)
+
+
+# Any insert, update, or delete of a setting changes this.
+def _get_version() -> tuple:
+    num_settings, last_updated = DATABASE.session.query(
+        func.count(SettingsSql.setting_id), func.max(SettingsSql.updated_at)
+    ).one()
+
+    return (num_settings, last_updated)
+
+
+def get_settings() -> dict:
+    """Get all system settings as a dictionary of setting name to raw string value."""
+    cached = _CACHE.get(_SETTINGS_KEY)
+
+    if cached is not None:
+        return cached["settings"]
+
+    # Time to check in with the database. Keep the settings already held if nothing changed.
+    version = _get_version()
+    cached = _CACHE.peek(_SETTINGS_KEY)
+
+    if cached is not None and cached["version"] == version:
+        _CACHE.put(_SETTINGS_KEY, cached)
+        return cached["settings"]
+
+    setting_objs = SettingsSql.query.all()
+    settings = {setting.name: setting.value for setting in setting_objs}
+
+    _CACHE.put(_SETTINGS_KEY, {"settings": settings, "version": version})
+
+    return settings
+
+
+def get_setting(setting_name: str) -> str:
+    """Get the raw string value of a single system setting, or None if it does not exist."""
+    return get_settings().get(setting_name)
+
+
+def is_setting_true(setting_name: str) -> bool:
+    """Determine whether a boolean system setting is set to true."""
+    value = get_setting(setting_name)
+    return value is not None and value.lower() == "true"
+
+
+def invalidate() -> None:
+    """Drop the cached settings so the next read goes to the database."""
+    _CACHE.clear()
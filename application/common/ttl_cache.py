@@ -0,0 +1,82 @@
+"""
+This module provides the process-local cache used by the settings, user property, and unread message
+count caches.
+"""
+
+import threading
+import time
+
+
+class TTLCache:
+    """
+    A thread-safe, process-local cache whose entries expire ttl_seconds after they are put.
+
+    Once max_entries are cached, expired entries are dropped to make room. Should every entry still
+    be live, new entries are not cached at all rather than evicting live ones.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = None) -> None:
+        self._ttl_seconds = ttl_seconds
+        self._max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def _is_expired(self, loaded_at: float, now: float) -> bool:
+        return now - loaded_at > self._ttl_seconds
+
+    def get(self, key):
+        """Get the cached value for the key, or None if it is missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+        if entry is None:
+            return None
+
+        value, loaded_at = entry
+
+        if self._is_expired(loaded_at, time.monotonic()):
+            return None
+
+        return value
+
+    def peek(self, key):
+        """Get the cached value for the key even if it has expired, or None if it is missing."""
+        with self._lock:
+            entry = self._entries.get(key)
+
+        return None if entry is None else entry[0]
+
+    def put(self, key, value) -> None:
+        """Cache a value for the key, starting its time to live over."""
+        now = time.monotonic()
+
+        with self._lock:
+            if self._max_entries is not None and len(self._entries) >= self._max_entries:
+                expired = [
+                    cached_key
+                    for cached_key, (_, loaded_at) in self._entries.items()
+                    if self._is_expired(loaded_at, now)
+                ]
+                for cached_key in expired:
+                    del self._entries[cached_key]
+
+                if len(self._entries) >= self._max_entries and key not in self._entries:
+                    return
+
+            self._entries[key] = (value, now)
+
+    def pop(self, key) -> None:
+        """Drop the cached value for the key, if any."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def pop_matching(self, predicate) -> None:
+        """Drop the cached value of every key for which predicate(key) is true."""
+        with self._lock:
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._entries.clear()
@@ -41,12 +41,20 @@ class DefaultConfig:
     CELERY_BACKED_BY = "REDIS"
     CELERY_SQS_PREDEFINED_QUEUE = None
 
+    # Socket.IO message queue, through which the workers push monitor changes to the web tier.
+    # When not set and Celery is backed by Redis, the Celery broker is used.
+    SOCKETIO_MESSAGE_QUEUE = None
+
     # Log/Verbosity Settings
     OPERATOR_CLIENT_VERBOSE = False
 
     # Monitor Settings
     MONITOR_TEST_MODE = False
 
+    # Agent Log Settings
+    AGENT_LOG_RETENTION_DAYS_FREE = constants.AGENT_LOG_RETENTION_DAYS_FREE
+    AGENT_LOG_RETENTION_DAYS_PAID = constants.AGENT_LOG_RETENTION_DAYS_PAID
+
     ######################################################################
     # Non - Re-Configurable Settings
     ######################################################################
@@ -7,12 +7,13 @@ from flask_wtf.csrf import CSRFProtect
 from oauthlib.oauth2 import WebApplicationClient
 
 task_modules = [
-    "application.workers.monitor_agent",
-    "application.workers.monitor_dedicated_server",
-    "application.workers.monitor_dedicated_server_updates",
+    "application.workers.agent_log_retention",
+    "application.workers.monitor_batch",
+    "application.workers.monitor_scheduler",
     "application.workers.monitor_test_task",
     "application.workers.email",
     "application.workers.game_server_control",
+    "application.workers.server_operations",
 ]
 
 ADMIN = Admin(template_mode="bootstrap3")
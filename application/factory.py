@@ -6,13 +6,14 @@ import traceback
 
 from alembic import command
 from alembic.config import Config
+from celery.signals import worker_process_shutdown, worker_shutdown
 from flask import Flask, send_from_directory, render_template, request, redirect, flash, url_for
 from flask_admin.contrib.sqla import ModelView
 from flask_admin.menu import MenuLink
 from flask_wtf.csrf import CSRFError
 from kombu.utils.url import safequote
 
-from application.common import logger, constants
+from application.common import logger, constants, agent_log_buffer
 from application.common.credentials import get_credentials
 from application.common.user_loader import load_user  # noqa: F401
 from application.common.toolbox import MyAdminIndexView, _get_application_path
@@ -107,6 +108,37 @@ def _configure_celery(config: dict) -> None:
 
     CELERY.conf.update(config)
 
+    # Periodic tasks run by celery beat.
+    CELERY.conf.beat_schedule = {
+        "dispatch-due-monitors": {
+            "task": "application.workers.monitor_scheduler.dispatch_due_monitors",
+            "schedule": constants.MONITOR_SCHEDULER_INTERVAL,
+        },
+        "purge-expired-agent-logs": {
+            "task": "application.workers.agent_log_retention.purge_expired_agent_logs",
+            "schedule": constants.AGENT_LOG_RETENTION_INTERVAL,
+        },
+        "resume-stalled-server-operations": {
+            "task": "application.workers.server_operations.resume_stalled_server_operations",
+            "schedule": constants.SERVER_OPERATION_SWEEP_INTERVAL,
+        },
+    }
+
+
+# The workers publish through the message queue, and the web tier relays what they publish to the
+# connected clients. Both must point at the same queue.
+def _get_socketio_message_queue(config: dict) -> str:
+    if config["TESTING"]:
+        return None
+
+    if config["SOCKETIO_MESSAGE_QUEUE"] is not None:
+        return config["SOCKETIO_MESSAGE_QUEUE"]
+
+    if config["CELERY_BACKED_BY"].lower() == "redis":
+        return config["CELERY_BROKER"]
+
+    return None
+
 
 def _handle_migrations(flask_app: Flask) -> None:
     alembic_init = os.path.join(ALEMBIC_FOLDER, "alembic.ini")
@@ -195,7 +227,7 @@ def create_app(config=None, init_db=True, init_celery=True):
     # Initialize Flask Admin Panel
     ADMIN.add_view(orm.user.UserView(orm.user.UserSql, DATABASE.session, "Users"))
     ADMIN.add_view(ModelView(orm.beta_user.BetaUser, DATABASE.session, "Beta Users"))
-    ADMIN.add_view(ModelView(orm.setting.SettingsSql, DATABASE.session, "Settings"))
+    ADMIN.add_view(orm.setting.SettingsView(orm.setting.SettingsSql, DATABASE.session, "Settings"))
     ADMIN.add_view(orm.agent.AgentView(orm.agent.Agents, DATABASE.session, "Agents"))
     ADMIN.add_view(orm.monitor.MonitorView(orm.monitor.Monitor, DATABASE.session, "Monitors"))
     ADMIN.add_view(
@@ -271,7 +303,7 @@ def create_app(config=None, init_db=True, init_celery=True):
         _handle_default_records(flask_app)
 
     # Initialize SocketIO
-    SOCKETIO.init_app(flask_app)
+    SOCKETIO.init_app(flask_app, message_queue=_get_socketio_message_queue(flask_app.config))
 
     # Initialize OAuth Client
     OAUTH_CLIENT.client_id = flask_app.config["GOOGLE_CLIENT_ID"]
@@ -301,4 +333,12 @@ def create_worker(flask_app: Flask):
 
     CELERY.Task = ContextTask
 
+    # Buffered agent logs would otherwise be lost when the worker stops.
+    def _flush_agent_logs(**kwargs):
+        with flask_app.app_context():
+            agent_log_buffer.flush()
+
+    worker_process_shutdown.connect(_flush_agent_logs, weak=False)
+    worker_shutdown.connect(_flush_agent_logs, weak=False)
+
     return CELERY
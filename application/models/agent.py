@@ -1,5 +1,6 @@
 from datetime import datetime, timezone
 from flask_admin.contrib.sqla import ModelView
+from sqlalchemy import select, union
 
 from application.common import logger
 from application.common.constants import AGENT_SMITH_DEFAULT_PORT
@@ -8,6 +9,7 @@ from application.extensions import DATABASE
 from application.models.agent_group_member import AgentGroupMembers  # noqa: F401
 from application.models.agent_friend_member import AgentFriendMembers  # noqa: F401
 from application.models.group import Groups  # noqa: F401
+from application.models.group_member import GroupMembers
 
 
 class Agents(PaginatedApi, DATABASE.Model):
@@ -61,29 +63,13 @@ class Agents(PaginatedApi, DATABASE.Model):
         return self.get_users()
 
     def get_users(self, as_list=False):
-        unique_user_ids = []
-        group_member_id_list = [group.group_member_id for group in self.groups_with_access.all()]
-        friend_id_list = [friend.friend_member_id for friend in self.friends_with_access.all()]
-
-        for friend_id in friend_id_list:
-            if friend_id not in unique_user_ids:
-                unique_user_ids.append(friend_id)
-
-        # For each group_member_id in group_member_id_list, get the groups.
-        for group_member_id in group_member_id_list:
-            group_obj = Groups.query.filter_by(group_id=group_member_id).first()
-            members = group_obj.members.all()
-            for member in members:
-                member_id = member.member_id
-                if member_id not in unique_user_ids:
-                    unique_user_ids.append(member_id)
+        unique_user_ids = get_agent_user_ids([self.agent_id])[self.agent_id]
 
         # Do not count the agent owner user_id
-        if self.owner_id in unique_user_ids:
-            unique_user_ids.remove(self.owner_id)
+        unique_user_ids.discard(self.owner_id)
 
         if as_list:
-            return unique_user_ids
+            return sorted(unique_user_ids)
         else:
             return len(unique_user_ids)
 
@@ -108,6 +94,30 @@ class Agents(PaginatedApi, DATABASE.Model):
         }
 
 
+# Resolve the users that have access to each of the given agents, whether through a group that the
+# agent is shared with or by being shared the agent directly, with a single UNION query. Returns a
+# dictionary of agent_id to a set of user ids. Agent owners are not removed.
+def get_agent_user_ids(agent_ids: list) -> dict:
+    agent_users = {agent_id: set() for agent_id in agent_ids}
+
+    if len(agent_ids) == 0:
+        return agent_users
+
+    group_users = (
+        select(AgentGroupMembers.agent_id, GroupMembers.member_id.label("user_id"))
+        .join(GroupMembers, GroupMembers.group_id == AgentGroupMembers.group_member_id)
+        .where(AgentGroupMembers.agent_id.in_(agent_ids))
+    )
+    friend_users = select(
+        AgentFriendMembers.agent_id, AgentFriendMembers.friend_member_id.label("user_id")
+    ).where(AgentFriendMembers.agent_id.in_(agent_ids))
+
+    for agent_id, user_id in DATABASE.session.execute(union(group_users, friend_users)):
+        agent_users[agent_id].add(user_id)
+
+    return agent_users
+
+
 class AgentView(ModelView):
     column_display_pk = True
     column_hide_backrefs = False
@@ -29,8 +29,11 @@ class AgentLog(PaginatedApi, DATABASE.Model):
 
     message = DATABASE.Column(DATABASE.String(256), nullable=False)
 
+    # Load with joinedload when fetching many logs, so usernames come from the same query.
+    user = DATABASE.relationship(UserSql, foreign_keys=[user_id], viewonly=True)
+
     def to_dict(self, time_format_str=constants.DEFAULT_TIME_FORMAT_STR, timezone=None):
-        user_obj = UserSql.query.filter_by(user_id=self.user_id).first()
+        user_obj = self.user
 
         if timezone:
             local_tz = pytz.timezone(timezone)
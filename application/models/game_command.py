@@ -0,0 +1,53 @@
+from datetime import datetime, timezone
+
+from application.common.pagination import PaginatedApi
+from application.extensions import DATABASE
+
+
+class GameCommand(PaginatedApi, DATABASE.Model):
+    __tablename__ = "game_commands"
+
+    command_id = DATABASE.Column(DATABASE.Integer, primary_key=True)
+
+    agent_id = DATABASE.Column(
+        DATABASE.Integer, DATABASE.ForeignKey("agents.agent_id"), nullable=False
+    )
+
+    # The user who asked for the command, and who is told how it went.
+    user_id = DATABASE.Column(
+        DATABASE.Integer, DATABASE.ForeignKey("users.user_id"), nullable=False
+    )
+
+    game_name = DATABASE.Column(DATABASE.String(256), nullable=False)
+
+    # constants.GameCommandTypes and constants.GameCommandStates, by name.
+    command_type = DATABASE.Column(DATABASE.String(256), nullable=False)
+    status = DATABASE.Column(DATABASE.String(256), nullable=False)
+
+    # The server operation carrying out the command, once there is one.
+    operation_id = DATABASE.Column(
+        DATABASE.Integer, DATABASE.ForeignKey("server_operations.operation_id"), nullable=True
+    )
+
+    message = DATABASE.Column(DATABASE.String(256), nullable=True)
+
+    created_at = DATABASE.Column(
+        DATABASE.DateTime, default=datetime.now(timezone.utc), nullable=False
+    )
+    updated_at = DATABASE.Column(
+        DATABASE.DateTime, default=datetime.now(timezone.utc), nullable=False
+    )
+
+    def to_dict(self):
+        return {
+            "command_id": self.command_id,
+            "agent_id": self.agent_id,
+            "user_id": self.user_id,
+            "game_name": self.game_name,
+            "command_type": self.command_type,
+            "status": self.status,
+            "operation_id": self.operation_id,
+            "message": self.message,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
@@ -26,6 +26,9 @@ class Monitor(PaginatedApi, DATABASE.Model):
     next_check = DATABASE.Column(DATABASE.DateTime, nullable=True)
 
     task_id = DATABASE.Column(DATABASE.String(256), nullable=True)
+    # Bumped every time the scheduler dispatches this monitor. A run carrying an older value is
+    # stale and must not act on the monitor.
+    generation = DATABASE.Column(DATABASE.Integer, nullable=False, default=0)
     has_fault = DATABASE.Column(DATABASE.Boolean, nullable=False, default=False)
     active = DATABASE.Column(DATABASE.Boolean, nullable=False, default=True)
 
@@ -47,12 +50,27 @@ class Monitor(PaginatedApi, DATABASE.Model):
 
     @property
     def attributes(self):
+        # Loaded once per monitor object, then served from memory. Batched monitor runs load the
+        # attributes for every monitor in the batch up front. The monitor attribute controller
+        # invalidates this after changing an attribute.
+        cached_attributes = getattr(self, "_cached_attributes", None)
+        if cached_attributes is not None:
+            return cached_attributes
+
         all_attrs = MonitorAttribute.query.filter_by(monitor_id=self.monitor_id).all()
         output_dict = {}
         for attr in all_attrs:
             output_dict[attr.attribute_name] = attr.attribute_value
+
+        self._cached_attributes = output_dict
         return output_dict
 
+    def preload_attributes(self, attributes: dict) -> None:
+        self._cached_attributes = attributes
+
+    def invalidate_attributes(self) -> None:
+        self._cached_attributes = None
+
     def faults(self, time_format_str=constants.DEFAULT_TIME_FORMAT_STR):
         all_faults = MonitorFault.query.filter_by(monitor_id=self.monitor_id, active=True).all()
         fault_list = []
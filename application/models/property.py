@@ -1,3 +1,5 @@
+from datetime import datetime, timezone
+
 from application.common.pagination import PaginatedApi
 from application.extensions import DATABASE
 
@@ -18,3 +20,11 @@ class Property(PaginatedApi, DATABASE.Model):
         DATABASE.ForeignKey("default_properties.default_property_id"),
         nullable=False,
     )
+
+    # Moves with every change to the property, so that every process' property cache notices it.
+    updated_at = DATABASE.Column(
+        DATABASE.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=True,
+    )
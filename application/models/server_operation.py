@@ -0,0 +1,55 @@
+from datetime import datetime, timezone
+
+from application.common.pagination import PaginatedApi
+from application.extensions import DATABASE
+
+
+class ServerOperation(PaginatedApi, DATABASE.Model):
+    __tablename__ = "server_operations"
+
+    operation_id = DATABASE.Column(DATABASE.Integer, primary_key=True)
+
+    agent_id = DATABASE.Column(
+        DATABASE.Integer, DATABASE.ForeignKey("agents.agent_id"), nullable=False
+    )
+
+    server_name = DATABASE.Column(DATABASE.String(256), nullable=False)
+
+    # constants.ServerOperationTypes and constants.ServerOperationStates, by name.
+    operation_type = DATABASE.Column(DATABASE.String(256), nullable=False)
+    state = DATABASE.Column(DATABASE.String(256), nullable=False)
+
+    # Bumped by the worker that takes each step, provided it still holds the value the worker's
+    # task carries. A task carrying any other value is stale and must not act on the operation.
+    step = DATABASE.Column(DATABASE.Integer, nullable=False, default=0)
+    # Commands issued, or update checks made, in the current state.
+    attempts = DATABASE.Column(DATABASE.Integer, nullable=False, default=0)
+
+    # Whether the server is started once an update finishes.
+    start_after = DATABASE.Column(DATABASE.Boolean, nullable=False, default=True)
+    # The agent thread running the update.
+    thread_ident = DATABASE.Column(DATABASE.BigInteger, nullable=True)
+
+    message = DATABASE.Column(DATABASE.String(256), nullable=True)
+
+    created_at = DATABASE.Column(
+        DATABASE.DateTime, default=datetime.now(timezone.utc), nullable=False
+    )
+    updated_at = DATABASE.Column(
+        DATABASE.DateTime, default=datetime.now(timezone.utc), nullable=False
+    )
+
+    def to_dict(self):
+        return {
+            "operation_id": self.operation_id,
+            "agent_id": self.agent_id,
+            "server_name": self.server_name,
+            "operation_type": self.operation_type,
+            "state": self.state,
+            "step": self.step,
+            "attempts": self.attempts,
+            "start_after": self.start_after,
+            "message": self.message,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
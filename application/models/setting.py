@@ -1,3 +1,6 @@
+from datetime import datetime, timezone
+from flask_admin.contrib.sqla import ModelView
+
 from application.common.pagination import PaginatedApi
 from application.extensions import DATABASE
 
@@ -13,3 +16,25 @@ class SettingsSql(PaginatedApi, DATABASE.Model):
     description = DATABASE.Column(DATABASE.String(256), nullable=True)
     value = DATABASE.Column(DATABASE.String(256), nullable=True)
     data_type = DATABASE.Column(DATABASE.String(256), nullable=True)
+
+    # Moves with every change to the setting, so that every process' settings cache notices it.
+    updated_at = DATABASE.Column(
+        DATABASE.DateTime,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=True,
+    )
+
+
+class SettingsView(ModelView):
+    # Admin edits take effect right away rather than once the settings cache expires.
+    def after_model_change(self, form, model, is_created):
+        # Import here to avoid a circular import with the settings cache.
+        from application.common import settings_cache
+
+        settings_cache.invalidate()
+
+    def after_model_delete(self, model):
+        from application.common import settings_cache
+
+        settings_cache.invalidate()
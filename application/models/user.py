@@ -1,7 +1,7 @@
 from datetime import datetime
 from flask_admin.contrib.sqla import ModelView
 
-from application.common import logger
+from application.common import logger, message_count_cache, property_cache
 from application.common.pagination import PaginatedApi
 from application.extensions import DATABASE
 from application.models.message import Messages
@@ -123,11 +123,18 @@ class UserSql(PaginatedApi, DATABASE.Model):
 
     def new_direct_messages(self):
         last_read_time = self.last_message_read_time or datetime(1900, 1, 1)
-        return (
-            Messages.query.filter_by(recipient=self)
-            .filter(Messages.timestamp > last_read_time)
-            .count()
-        )
+
+        count = message_count_cache.get(self.user_id, message_count_cache.DIRECT, last_read_time)
+
+        if count is None:
+            count = (
+                Messages.query.filter_by(recipient=self)
+                .filter(Messages.timestamp > last_read_time)
+                .count()
+            )
+            message_count_cache.put(self.user_id, message_count_cache.DIRECT, last_read_time, count)
+
+        return count
 
     def new_global_messages(self):
         last_read_time = self.last_message_read_time or datetime(1900, 1, 1)
@@ -137,12 +144,18 @@ class UserSql(PaginatedApi, DATABASE.Model):
         # distinct categories
         if "NOTIFICATION_DM_GLOBAL_ENABLED" in self.properties:
             return 0
-        else:
-            return (
+
+        count = message_count_cache.get(self.user_id, message_count_cache.GLOBAL, last_read_time)
+
+        if count is None:
+            count = (
                 Messages.query.filter_by(is_global=True)
                 .filter(Messages.timestamp > last_read_time)
                 .count()
             )
+            message_count_cache.put(self.user_id, message_count_cache.GLOBAL, last_read_time, count)
+
+        return count
 
     def to_dict(self):
         return {
@@ -164,6 +177,14 @@ class UserSql(PaginatedApi, DATABASE.Model):
 
     @property
     def properties(self):
+        # Loaded at most once per request, and shared across requests until the user edits a
+        # property.
+        output_dict = property_cache.get_properties(self.user_id, self._load_properties)
+
+        # Hand out a copy so that callers cannot alter the cached dictionary.
+        return dict(output_dict)
+
+    def _load_properties(self):
         user_properties = (
             DATABASE.session.query(DefaultProperty, Property)
             .join(Property, DefaultProperty.default_property_id == Property.default_property_id)
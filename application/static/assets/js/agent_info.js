@@ -1,6 +1,13 @@
 var agent_info_socket = io("/system/agent/info");
 var agent_info_base_url = "/app/system/agent/info"
 
+// Game command changes are pushed by the server. Should none arrive for this long, e.g. because the
+// workers cannot reach Socket.IO, ask after the command. Every push starts the wait over.
+var game_command_quiet_ms = 15000;
+// A command still queued after this long has no worker to run it.
+var game_command_queued_timeout_ms = 2 * 60 * 1000;
+var pending_game_command = null;
+
 function reloadAgentInfo(agent_id) {
     document.location.href = agent_info_base_url + '/' + agent_id;
 }
@@ -173,99 +180,49 @@ $(document).ready(function () {
 
     });
 
-    agent_info_socket.on("respond_action_result", function (data) {
-
-        console.log("Result endpoint responded...");
+    // Game server commands report back to the user who sent them once they finish.
+    agent_info_socket.on('connect', function () {
+        agent_info_socket.emit("subscribe_game_commands");
+    });
 
-        var result = data['result'];
-        var attempt_limit = 10;
-        var wait_time = 5000;
+    agent_info_socket.on("game_command_changed", function (data) {
 
-        if (result == "Error" || result == "error") {
-            $("#gameServerActionInProgress").modal('hide');
-            $("#errorModal").modal('show');
+        // Only the command this page sent. Others on the agent report their own progress.
+        if (pending_game_command == null) {
             return
         }
 
-        var agent_id = data['agent_id'];
-        var action = data['action'];
-        var game_name = data['game_name'];
-        var attempt_number = Number(data['attempt_number']);
-
-        status = result['status']
-
-        if (attempt_number > attempt_limit) {
-            console.log("Result Attempt limit reached.");
-            reloadAgentInfo(agent_id);
+        if (String(data['command_id']) != String(pending_game_command["command_id"])) {
             return
         }
 
-        if (action == "startup" || action == "restart") {
+        var status = data['status'];
 
-            // Want the final state to be running...
-            if (status == "Running") {
-                console.log("Game Server has reached started state. Action is finished!")
-                $("#gameServerActionInProgress").modal('hide');
-                setTimeout(() =>
-                    reloadAgentInfo(agent_id),
-                    500
-                )
-            }
-            else {
-                setTimeout(() =>
-                    agent_info_socket.emit("get_action_result", {
-                        "agent_id": agent_id,
-                        "action": action,
-                        "game_name": game_name,
-                        "attempt_number": attempt_number + 1
-                    }
-                    ),
-                    wait_time)
-            }
+        console.log("Game command " + data['command_type'] + " for " + data['game_name'] + ": " + status);
 
+        if (status == "QUEUED" && isGameCommandStuck()) {
+            console.log("Game server command was never picked up!")
+            stopWatchingGameCommand();
+            $("#gameServerActionInProgress").modal('hide');
+            $("#errorModal").modal('show');
         }
-        else if (action == "shutdown") {
-            // Want the final state to be running...
-            if (status == "Not Running") {
-                console.log("Game Server has reached shutdown state. Action is finished!")
-                $("#gameServerActionInProgress").modal('hide');
-                setTimeout(() =>
-                    reloadAgentInfo(agent_id),
-                    500
-                )
-            }
-            else {
-                setTimeout(() =>
-                    agent_info_socket.emit("get_action_result", {
-                        "agent_id": agent_id,
-                        "action": action,
-                        "game_name": game_name,
-                        "attempt_number": attempt_number + 1
-                    }
-                    ),
-                    wait_time)
-            }
+        else if (status == "COMPLETED") {
+            console.log("Game server command has finished!")
+            stopWatchingGameCommand();
+            $("#gameServerActionInProgress").modal('hide');
+            setTimeout(() =>
+                reloadAgentInfo(agent_id),
+                500
+            )
         }
-        else if (action == "update") {
-            if (status == "complete") {
-                console.log("Game server update has completed updating. Action is finished!")
-                $("#gameServerActionInProgress").modal('hide');
-                setTimeout(() =>
-                    reloadAgentInfo(agent_id),
-                    500
-                )
-            }
-            else {
-                setTimeout(() =>
-                    agent_info_socket.emit("get_action_result", {
-                        "agent_id": agent_id,
-                        "action": action,
-                        "game_name": game_name,
-                        "attempt_number": attempt_number + 1
-                    }
-                    ),
-                    wait_time)
-            }
+        else if (status == "FAILED") {
+            console.log("Game server command failed: " + data['message'])
+            stopWatchingGameCommand();
+            $("#gameServerActionInProgress").modal('hide');
+            $("#errorModal").modal('show');
+        }
+        else {
+            armGameCommandCheck();
         }
     });
 });
@@ -319,9 +276,9 @@ function updateGameServer(game_name) {
         contentType: 'application/json',
         dataType: "json",
         data: JSON.stringify(json_data),
-        success: function () {
+        success: function (data) {
             console.log("Updating Game Server for " + game_name + ' on agent id: ' + agent_id);
-            handleActionResult(agent_id, "update", game_name);
+            handleActionResult(agent_id, "update", game_name, data["command_id"]);
         },
         error: function () {
             console.log('error!');
@@ -344,9 +301,9 @@ function startupGameServer(game_name) {
         contentType: 'application/json',
         dataType: "json",
         data: JSON.stringify(json_data),
-        success: function () {
+        success: function (data) {
             console.log("Starting Game Server for " + game_name + ' on agent id: ' + agent_id);
-            handleActionResult(agent_id, "startup", game_name);
+            handleActionResult(agent_id, "startup", game_name, data["command_id"]);
         },
         error: function () {
             console.log('error!');
@@ -368,9 +325,9 @@ function shutdownGameServer(game_name) {
         contentType: 'application/json',
         dataType: "json",
         data: JSON.stringify(json_data),
-        success: function () {
+        success: function (data) {
             console.log("Stopping Game Server for " + game_name + ' on agent id: ' + agent_id);
-            handleActionResult(agent_id, "shutdown", game_name);
+            handleActionResult(agent_id, "shutdown", game_name, data["command_id"]);
         },
         error: function () {
             console.log('error!');
@@ -393,9 +350,9 @@ function restartGameServer(game_name) {
         contentType: 'application/json',
         dataType: "json",
         data: JSON.stringify(json_data),
-        success: function () {
+        success: function (data) {
             console.log("Restarting Game Server for " + game_name + ' on agent id: ' + agent_id);
-            handleActionResult(agent_id, "restart", game_name);
+            handleActionResult(agent_id, "restart", game_name, data["command_id"]);
         },
         error: function () {
             console.log('error!');
@@ -405,7 +362,7 @@ function restartGameServer(game_name) {
     });
 };
 
-function handleActionResult(agent_id, action, game_name) {
+function handleActionResult(agent_id, action, game_name, command_id = null) {
 
     if (action == "error") {
         // Show modal with error...
@@ -414,29 +371,58 @@ function handleActionResult(agent_id, action, game_name) {
         return
     }
 
-    console.log("Sending get_action_result signal to websocket...")
+    // The command's progress is pushed by the server. See game_command_changed.
+    console.log("Waiting on " + action + " of " + game_name + "...")
 
-    var wait_time = 5000;  // 5 seconds
+    $("#gameServerActionInProgress").modal('show');
 
-    if (action == "restart") {
-        console.log("Waiting a little long than usual because its a restart.")
-        wait_time = 20000;
+    if (command_id != null) {
+        watchGameCommand(command_id);
     }
 
-    $("#gameServerActionInProgress").modal('show');
+};
 
-    setTimeout(() =>
-        agent_info_socket.emit("get_action_result", {
-            "agent_id": agent_id,
-            "action": action,
-            "game_name": game_name,
-            "attempt_number": 0
-        }
-        ),
-        wait_time  // Wait a bit to give the server a chance to do...
-    )
+function watchGameCommand(command_id) {
+    stopWatchingGameCommand();
 
-};
+    pending_game_command = {
+        "command_id": command_id,
+        "started": Date.now(),
+        "timer": null
+    };
+
+    armGameCommandCheck();
+}
+
+// Ask after the pending command once no change to it has arrived for a while. The answer comes back
+// as a game_command_changed event, which arms the check again.
+function armGameCommandCheck() {
+    if (pending_game_command == null) {
+        return
+    }
+
+    clearTimeout(pending_game_command["timer"]);
+
+    var command_id = pending_game_command["command_id"];
+
+    pending_game_command["timer"] = setTimeout(function () {
+        agent_info_socket.emit("get_game_command", { "command_id": command_id });
+        armGameCommandCheck();
+    }, game_command_quiet_ms);
+}
+
+function stopWatchingGameCommand() {
+    if (pending_game_command == null) {
+        return
+    }
+
+    clearTimeout(pending_game_command["timer"]);
+    pending_game_command = null;
+}
+
+function isGameCommandStuck() {
+    return Date.now() - pending_game_command["started"] > game_command_queued_timeout_ms;
+}
 
 $(".remove-group-from-agent").click(function () {
 
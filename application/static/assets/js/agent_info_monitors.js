@@ -1,5 +1,8 @@
 var agent_monitor_socket = io("/system/agent/monitor");
 
+// The monitor type whose status is currently on screen.
+var current_monitor_type = 'AGENT';
+
 $(document).ready(function () {
 
     var agent_id = $('meta[name=agent-id]').attr('content');
@@ -16,15 +19,29 @@ $(document).ready(function () {
     $(agent_activity_section).hide();
 
     agent_monitor_socket.on('connect', function () {
+        // Changes to this agent's monitors are pushed from now on, so there is no need to poll.
+        agent_monitor_socket.emit('subscribe_monitor_status', { "agent_id": agent_id });
+
         // For now assume the monitor to check is always the Agent Health Monitor
         setTimeout(() =>
             agent_monitor_socket.emit(
-                'get_monitor_status', { "agent_id": agent_id , 'monitor_type': 'AGENT' }
+                'get_monitor_status', { "agent_id": agent_id , 'monitor_type': current_monitor_type }
             ),
             100
         )
     });
 
+    // A monitor changed. Only the monitor on screen needs its status fetched again.
+    agent_monitor_socket.on("monitor_status_changed", function (data) {
+        if(data['monitor_type'] != current_monitor_type){
+            return;
+        }
+
+        agent_monitor_socket.emit(
+            'get_monitor_status', { "agent_id": agent_id , 'monitor_type': current_monitor_type }
+        );
+    });
+
     agent_monitor_socket.on("respond_monitor_status", function (data) {
 
         var status = data['status'];
@@ -301,6 +318,7 @@ function updateMonitorSection(current_monitor){
     $(update_monitoring_section).hide();
 
     if(current_monitor == "agent_health"){
+        current_monitor_type = 'AGENT';
         agent_monitor_socket.emit(
             'get_monitor_status', { "agent_id": agent_id , 'monitor_type': 'AGENT' }
         )
@@ -308,6 +326,7 @@ function updateMonitorSection(current_monitor){
         current_monitor_btn.innerHTML = "Agent Health";
     }
     else if(current_monitor == "ds_health"){
+        current_monitor_type = 'DEDICATED_SERVER';
         agent_monitor_socket.emit(
             'get_monitor_status', { "agent_id": agent_id , 'monitor_type': 'DEDICATED_SERVER' }
         )
@@ -315,6 +334,7 @@ function updateMonitorSection(current_monitor){
         current_monitor_btn.innerHTML = "Dedicated Server Health";
     }
     else if(current_monitor == "ds_updates"){
+        current_monitor_type = 'UPDATES';
         agent_monitor_socket.emit(
             'get_monitor_status', { "agent_id": agent_id , 'monitor_type': 'UPDATES' }
         )
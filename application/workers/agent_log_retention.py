@@ -0,0 +1,103 @@
+"""
+This module purges old automated agent logs.
+
+Automated monitor logs are written on every restart and never read back once they scroll out of
+view, so without a retention policy the agent_logs table only ever grows. Celery beat runs the
+purge periodically. Automated logs older than the retention period for the agent owner's tier are
+deleted in chunks, each chunk its own bulk DELETE and commit, so no single statement holds locks on
+a large part of the table. Logs of actions users took themselves are kept.
+
+The retention periods are the AGENT_LOG_RETENTION_DAYS_FREE and AGENT_LOG_RETENTION_DAYS_PAID system
+settings, which the admin may change.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from application.common import logger, constants, settings_cache
+from application.extensions import CELERY, DATABASE
+from application.models.agent import Agents
+from application.models.agent_log import AgentLog
+from application.models.user import UserSql
+
+
+# Get the retention period of a tier from the system settings. Falls back to the default when the
+# setting is missing, e.g. on a system seeded before the setting existed, or is not a valid number.
+def _get_retention_days(setting_name: str, default_days: int) -> int:
+    try:
+        days = int(settings_cache.get_setting(setting_name))
+    except (TypeError, ValueError):
+        logger.warning(f"Agent Log Retention: {setting_name} not set. Using {default_days} days.")
+        return default_days
+
+    return days if days > 0 else default_days
+
+
+# Get up to limit ids of automated logs older than the cutoff, on agents whose owner is in the
+# given tier.
+def _get_expired_log_ids(is_subscribed: bool, cutoff: datetime, limit: int) -> list:
+    rows = (
+        DATABASE.session.query(AgentLog.log_id)
+        .join(Agents, Agents.agent_id == AgentLog.agent_id)
+        .join(UserSql, UserSql.user_id == Agents.owner_id)
+        .filter(
+            UserSql.subscribed.is_(is_subscribed),
+            AgentLog.is_automated.is_(True),
+            AgentLog.timestamp < cutoff,
+        )
+        .limit(limit)
+        .all()
+    )
+
+    return [row.log_id for row in rows]
+
+
+# Delete the logs of one tier older than the cutoff. Returns the number of logs deleted.
+def _purge_tier(is_subscribed: bool, cutoff: datetime) -> int:
+    chunk_size = constants.AGENT_LOG_RETENTION_CHUNK_SIZE
+    num_deleted = 0
+
+    for _ in range(constants.AGENT_LOG_RETENTION_MAX_CHUNKS):
+        log_ids = _get_expired_log_ids(is_subscribed, cutoff, chunk_size)
+
+        if len(log_ids) == 0:
+            break
+
+        AgentLog.query.filter(AgentLog.log_id.in_(log_ids)).delete(synchronize_session=False)
+
+        try:
+            DATABASE.session.commit()
+        except Exception as e:
+            DATABASE.session.rollback()
+            raise e
+
+        num_deleted += len(log_ids)
+
+        if len(log_ids) < chunk_size:
+            break
+
+    return num_deleted
+
+
+@CELERY.task(bind=True)
+def purge_expired_agent_logs(self):
+    now = datetime.now(timezone.utc)
+
+    retention_days = {
+        False: _get_retention_days(
+            "AGENT_LOG_RETENTION_DAYS_FREE", constants.AGENT_LOG_RETENTION_DAYS_FREE
+        ),
+        True: _get_retention_days(
+            "AGENT_LOG_RETENTION_DAYS_PAID", constants.AGENT_LOG_RETENTION_DAYS_PAID
+        ),
+    }
+
+    num_deleted = 0
+
+    for is_subscribed, days in retention_days.items():
+        cutoff = now - timedelta(days=days)
+        num_deleted += _purge_tier(is_subscribed, cutoff)
+
+    logger.debug(f"Agent Log Retention: Purged {num_deleted} log(s) at {now}")
+
+    self.update_state(state="SUCCESS")
+    return {"status": f"Purged {num_deleted} agent log(s)."}
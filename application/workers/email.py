@@ -1,21 +1,150 @@
 import boto3
+import threading
+import time
 
 from botocore.config import Config
 from botocore.exceptions import ClientError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone, timedelta
 from flask import current_app
 
 from application.extensions import CELERY
-from application.common import logger
-from application.common.credentials import get_credentials
-from application.common.toolbox import _get_setting
+from application.common import constants, logger, settings_cache
+from application.common.credentials import get_credentials, get_expiration
 from application.models.default_property import DefaultProperty
 from application.models.property import Property
-from application.models.setting import SettingsSql
 from application.models.user import UserSql
 
 # Docs -
 # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/ses/client/send_email.html
 
+# The SES client is built once per worker process and reused until its credentials are about to
+# expire, or the configured region changes.
+_SES_LOCK = threading.Lock()
+_SES_CLIENT = {"client": None, "region": None, "expires_at": None}
+
+# Spaces out SES calls across all threads of the worker process to stay under the send rate.
+_RATE_LOCK = threading.Lock()
+_RATE_STATE = {"next_send_at": 0.0}
+
+
+def _get_ses_client(aws_region: str):
+    now = datetime.now(timezone.utc)
+
+    with _SES_LOCK:
+        client = _SES_CLIENT["client"]
+        expires_at = _SES_CLIENT["expires_at"]
+        refresh_at = (
+            None
+            if expires_at is None
+            else expires_at - timedelta(seconds=constants.SES_CREDENTIAL_REFRESH_SECONDS)
+        )
+
+        if (
+            client is not None
+            and _SES_CLIENT["region"] == aws_region
+            and (refresh_at is None or now < refresh_at)
+        ):
+            return client
+
+    # Get credentials, whether that be Role or User based..
+    credentials = get_credentials()
+
+    my_config = Config(
+        signature_version="v4",
+        region_name=aws_region,
+    )
+
+    client = boto3.client(
+        "ses",
+        config=my_config,
+        aws_access_key_id=credentials["AccessKeyId"],
+        aws_secret_access_key=credentials["SecretAccessKey"],
+        aws_session_token=credentials.get("Token"),
+    )
+
+    with _SES_LOCK:
+        _SES_CLIENT["client"] = client
+        _SES_CLIENT["region"] = aws_region
+        _SES_CLIENT["expires_at"] = get_expiration(credentials)
+
+    return client
+
+
+# Forget the cached client so the next email builds a new one with fresh credentials.
+def _reset_ses_client() -> None:
+    with _SES_LOCK:
+        _SES_CLIENT["client"] = None
+
+
+# Block until this thread may make the next SES call.
+def _wait_for_send_slot() -> None:
+    interval = 1.0 / constants.SES_MAX_SEND_RATE
+
+    with _RATE_LOCK:
+        now = time.monotonic()
+        send_at = max(now, _RATE_STATE["next_send_at"])
+        _RATE_STATE["next_send_at"] = send_at + interval
+
+    if send_at > now:
+        time.sleep(send_at - now)
+
+
+def _chunk_recipients(recipients: list, chunk_size: int) -> list:
+    return [recipients[i : i + chunk_size] for i in range(0, len(recipients), chunk_size)]
+
+
+def _send_batch(
+    ses, sender: str, subject: str, recipients: list, html: str, text: str, address_mode: str
+) -> bool:
+    _wait_for_send_slot()
+
+    try:
+        ses.send_email(
+            Source=sender,
+            Destination={address_mode: recipients},
+            Message={
+                "Subject": {"Data": subject},
+                "Body": {"Text": {"Data": text}, "Html": {"Data": html}},
+            },
+        )
+    except ClientError as error:
+        logger.error(f"Couldn't send email. Here's why: " f"{error.response['Error']['Message']}")
+
+        if error.response["Error"].get("Code") == "ExpiredToken":
+            _reset_ses_client()
+
+        return False
+
+    return True
+
+
+# Send to any number of recipients. SES accepts at most SES_MAX_RECIPIENTS destinations per call,
+# so larger lists are split into batches that are sent concurrently, subject to the rate limit.
+def _send_batches(
+    ses, sender: str, subject: str, recipients: list, html: str, text: str, address_mode: str
+) -> bool:
+    batches = _chunk_recipients(recipients, constants.SES_MAX_RECIPIENTS)
+
+    if len(batches) == 0:
+        logger.warning("emailer: No recipients to send to.")
+        return False
+
+    if len(batches) == 1:
+        return _send_batch(ses, sender, subject, batches[0], html, text, address_mode)
+
+    max_workers = min(constants.SES_SEND_CONCURRENCY, len(batches))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(
+            executor.map(
+                lambda batch: _send_batch(ses, sender, subject, batch, html, text, address_mode),
+                batches,
+            )
+        )
+
+    return all(results)
+
 
 def _send_email(
     sender: str,
@@ -25,70 +154,23 @@ def _send_email(
     text: str = "",
     address_mode="ToAddresses",
 ) -> bool:
-    aws_region = None
-    setting_objs = None
-
     try:
-        setting_objs = SettingsSql.query.filter_by(category="aws").all()
+        # Region is stored as database item.
+        aws_region = settings_cache.get_setting("AWS_REGION")
     except Exception as error:
         logger.critical("Unable to read database settings table.")
         logger.critical(error)
         return False
 
-    if setting_objs is None:
-        logger.critical("emailer: Not Settings Objects for AWS category.")
-        return False
-
     try:
-
-        # Region is stored as database item.
-        aws_region = _get_setting("AWS_REGION", setting_objs)
-
-        # Get credentials, whether that be Role or User based..
-        credentials = get_credentials()
-
-        aws_access_key = credentials["AccessKeyId"]
-        aws_secret_key = credentials["SecretAccessKey"]
-        aws_session_token = None
-
-        if "Token" in credentials:
-            aws_session_token = credentials["Token"]
-
-        my_config = Config(
-            signature_version="v4",
-            region_name=aws_region,
-        )
-
-        ses = boto3.client(
-            "ses",
-            config=my_config,
-            aws_access_key_id=aws_access_key,
-            aws_secret_access_key=aws_secret_key,
-            aws_session_token=aws_session_token,
-        )
-
-        try:
-            ses.send_email(
-                Source=sender,
-                Destination={address_mode: recipients},
-                Message={
-                    "Subject": {"Data": subject},
-                    "Body": {"Text": {"Data": text}, "Html": {"Data": html}},
-                },
-            )
-        except ClientError as error:
-            logger.error(
-                f"Couldn't send email. Here's why: " f"{error.response['Error']['Message']}"
-            )
-            return False
+        ses = _get_ses_client(aws_region)
+        return _send_batches(ses, sender, subject, recipients, html, text, address_mode)
 
     except Exception as error:
         logger.critical("There was an error")
         logger.critical(error)
         return False
 
-    return True
-
 
 @CELERY.task(bind=True)
 def send_global_email(self, subject: str, html: str):
@@ -1,106 +1,87 @@
-import time
-
 from application.extensions import CELERY
-from application.common import logger
-
-from operator_client import Operator
-
-
-@CELERY.task(bind=True)
-def startup_game_server(
-    self, hostname: str, port: str, verbose: bool, token: str, certificate: str, game_name: str
-):
-    logger.info(f"Staring up game: {game_name}")
-
+from application.common import logger, constants, operator_pool, game_commands
+from application.common.constants import GameCommandStates, ServerOperationTypes
+from application.models.agent import Agents
+from application.workers import monitor_server_utils, server_operations
+
+
+# Every command runs as a server operation, the same one the monitors use, which checks back on the
+# server until it reaches the state asked for instead of holding a worker. The operation keeps the
+# user's game command up to date as it goes.
+def _run_server_operation(
+    task,
+    agent_id: int,
+    game_name: str,
+    operation_type: ServerOperationTypes,
+    command_id: int,
+    start_after=True,
+) -> dict:
     try:
-        client = Operator(hostname, port, verbose, token=token, certificate=certificate)
-
-        args_list = client.game.get_argument_by_game_name(game_name)
-        arg_dict = {}
-
-        for arg in args_list:
-            arg_dict[arg["game_arg"]] = arg["game_arg_value"]
-
-        client.game.game_startup(game_name, input_args=arg_dict)
+        operation_id = server_operations.create_server_operation(
+            agent_id, game_name, operation_type, start_after=start_after, command_id=command_id
+        )
     except Exception as error:
         logger.critical(error)
-        self.update_state(state="FAILURE")
+        if command_id is not None:
+            game_commands.update_game_command(
+                command_id, GameCommandStates.FAILED, f"Could not {operation_type.name.lower()}."
+            )
+        task.update_state(state="FAILURE")
         return
 
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
-
-
-@CELERY.task(bind=True)
-def shutdown_game_server(
-    self, hostname: str, port: str, verbose: bool, token: str, certificate: str, game_name: str
-):
-    logger.info(f"Shutting down game: {game_name}")
+    if operation_id is None:
+        message = f"{game_name} is busy with another operation."
+        if command_id is not None:
+            game_commands.update_game_command(command_id, GameCommandStates.FAILED, message)
+        task.update_state(state="FAILURE")
+        return {"status": message}
 
-    try:
-        client = Operator(hostname, port, verbose, token=token, certificate=certificate)
-        client.game.game_shutdown(game_name)
-
-    except Exception as error:
-        logger.critical(error)
-        self.update_state(state="FAILURE")
-        return
-
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
+    task.update_state(state="SUCCESS")
+    return {"status": "Task Completed!", "operation_id": operation_id}
 
 
 @CELERY.task(bind=True)
-def restart_game_server(
-    self, hostname: str, port: str, verbose: bool, token: str, certificate: str, game_name: str
-):
-    logger.info(f"Restarting game: {game_name}")
-
-    try:
-        client = Operator(hostname, port, verbose, token=token, certificate=certificate)
+def startup_game_server(self, agent_id: int, game_name: str, command_id: int = None):
+    logger.info(f"Staring up game: {game_name}")
 
-        client.game.game_shutdown(game_name)
+    return _run_server_operation(self, agent_id, game_name, ServerOperationTypes.START, command_id)
 
-        time.sleep(10)  # TODO - Make this a constant
 
-        args_list = client.game.get_argument_by_game_name(game_name)
-        arg_dict = {}
+@CELERY.task(bind=True)
+def shutdown_game_server(self, agent_id: int, game_name: str, command_id: int = None):
+    logger.info(f"Shutting down game: {game_name}")
 
-        for arg in args_list:
-            arg_dict[arg["game_arg"]] = arg["game_arg_value"]
+    return _run_server_operation(self, agent_id, game_name, ServerOperationTypes.STOP, command_id)
 
-        client.game.game_startup(game_name, input_args=arg_dict)
 
-    except Exception as error:
-        logger.critical(error)
-        self.update_state(state="FAILURE")
-        return
+@CELERY.task(bind=True)
+def restart_game_server(self, agent_id: int, game_name: str, command_id: int = None):
+    logger.info(f"Restarting game: {game_name}")
 
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
+    return _run_server_operation(
+        self, agent_id, game_name, ServerOperationTypes.RESTART, command_id
+    )
 
 
+# The server is stopped for the update, and only started again if it was running beforehand.
 @CELERY.task(bind=True)
-def update_game_server(
-    self, hostname: str, port: str, verbose: bool, token: str, certificate: str, game_name: str
-):
+def update_game_server(self, agent_id: int, game_name: str, command_id: int = None):
     logger.info(f"Updating game: {game_name}")
 
-    try:
-        client = Operator(hostname, port, verbose, token=token, certificate=certificate)
-
-        steam_install_dir = client.app.get_setting_by_name("steam_install_dir")
-        game_info = client.game.get_game_by_name(game_name)
-
-        steam_id = game_info["items"][0]["game_steam_id"]
-        install_path = game_info["items"][0]["game_install_dir"]
-
-        client.steam.update_steam_app(steam_install_dir, steam_id, install_path)
+    agent_obj = Agents.query.filter_by(agent_id=agent_id).first()
 
+    try:
+        client = operator_pool.get_agent_client(agent_obj, timeout=constants.AGENT_SMITH_TIMEOUT)
+        is_running = monitor_server_utils._is_running(client, game_name)
     except Exception as error:
         logger.critical(error)
+        if command_id is not None:
+            game_commands.update_game_command(
+                command_id, GameCommandStates.FAILED, "Could not contact agent."
+            )
         self.update_state(state="FAILURE")
         return
 
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
+    return _run_server_operation(
+        self, agent_id, game_name, ServerOperationTypes.UPDATE, command_id, start_after=is_running
+    )
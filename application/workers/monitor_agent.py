@@ -1,57 +1,55 @@
-from datetime import datetime, timezone
-
 from application.api.controllers import messages
-from application.common import logger, constants, toolbox
-from application.extensions import CELERY
+from application.common import logger, constants
 from application.workers import monitor_constants, monitor_utils
-from operator_client import Operator
 
 
-@CELERY.task(bind=True)
-def agent_health_monitor(self, monitor_id: int):
-    logger.debug(f"Agent Health Monitor Task Running at {datetime.now(timezone.utc)}")
+# Evaluate one monitor using the objects already loaded into the batch. Returns a tuple of
+# whether the run succeeded and the status dictionary.
+def check_agent_health(batch: dict, monitor_id: int, generation: int) -> tuple:
+    logger.debug(f"Evaluating Agent Health Monitor ID {monitor_id}")
 
-    monitor_obj = monitor_utils._get_monitor_obj(monitor_id)
+    monitor_obj = batch["monitors"].get(monitor_id)
     monitor_active = False
 
     if monitor_obj is None:
         logger.error(f"Monitor ID {monitor_id} not found.")
-        self.update_state(state="FAILURE")
-        return {"status": "Monitor ID not found."}
+        return False, {"status": "Monitor ID not found."}
 
     monitor_active = monitor_obj.active
 
     if not monitor_active:
         logger.error(f"Monitor ID {monitor_id} - Monitor Not Active.")
         logger.debug("This means the monitor was disabled since the last run.")
-        self.update_state(state="FAILURE")
-        return {"status": "Monitor Not Active."}
+        return False, {"status": "Monitor Not Active."}
 
-    # Compare the task_id to the task_id in the monitor object. If they do not match, then
-    # this task is stale and should be revoked.
-    if monitor_obj.task_id != self.request.id:
+    # Compare the generation to the generation in the monitor object. If they do not match, then
+    # the scheduler has since dispatched a newer run, or the monitor was reset, and this run is
+    # stale.
+    if monitor_obj.generation != generation:
         logger.error(
             f"Monitor ID {monitor_id} - "
-            f"Task ID Mismatch: {monitor_obj.task_id} != {self.request.id}"
+            f"Generation Mismatch: {monitor_obj.generation} != {generation}"
         )
-        logger.debug("This means the container restarted and the revoked task list reset.")
-        self.update_state(state="FAILURE")
-        return {"status": "Task ID Mismatch."}
+        logger.debug("This means a newer run of this monitor superseded this one.")
+        return False, {"status": "Generation Mismatch."}
+
+    # Collects this run's changes to the monitor, written together once the run is over.
+    state = monitor_utils.get_state_update(batch, monitor_obj)
 
     # Get the agent object associated with the monitor
-    agent_obj = monitor_utils._get_agent_obj(monitor_obj.agent_id)
+    agent_obj = batch["agents"].get(monitor_obj.agent_id)
 
     if agent_obj is None:
         logger.error(f"Agent ID {monitor_obj.agent_id} not found.")
-        self.update_state(state="FAILURE")
-        return {"status": "Agent ID not found."}
+        state.stop()
+        return False, {"status": "Agent ID not found."}
 
     # Get the owner associated with the monitor
-    owner_obj = monitor_utils._get_monitor_owner(monitor_obj.monitor_id)
+    owner_obj = batch["owners"][agent_obj.owner_id]
 
     logger.debug(f"Agent Health Monitor owned by: {owner_obj.username}({owner_obj.user_id})")
 
-    if monitor_utils.is_monitor_testing_enabled():
+    if batch["is_testing"]:
         logger.debug("Monitor Testing is enabled. Using Default Test Interval Constant.")
         next_interval = constants.DEFAULT_MONITOR_TESTING_INTERVAL
     else:
@@ -67,25 +65,16 @@ def agent_health_monitor(self, monitor_id: int):
 
     logger.debug(f"Next Interval: {next_interval} seconds, and Alert Users: {alert_enable}")
 
-    # Create a client to communicate with the agent
-    client = Operator(
-        toolbox.format_url_prefix(agent_obj.hostname),
-        agent_obj.port,
-        verbose=False,
-        token=agent_obj.access_token,
-        certificate=agent_obj.ssl_public_cert,
-        timeout=constants.AGENT_SMITH_TIMEOUT,
-    )
-
-    # Get the health status of the agent
-    health_status = client.architect.get_health(secure_version=True)
+    # Get the health status of the agent, which was probed along with the rest of the batch.
+    health_status = batch["agent_health"].get(agent_obj.agent_id)
     fault_string = "Health Check Failed"
 
-    if monitor_utils.is_fault_description_matching(monitor_obj.monitor_id, fault_string):
-        logger.debug("Fault already exists for this Agent. Skipping.")
-        monitor_active = False
-        self.update_state(state="SUCCESS")
-        return {"status": "Agent has fault already."}
+    if monitor_utils.is_fault_description_matching(
+        monitor_obj.monitor_id, fault_string, batch["active_faults"]
+    ):
+        logger.debug("Fault already exists for this Agent. Stopping the monitor.")
+        state.stop()
+        return True, {"status": "Agent has fault already."}
 
     # If a fault is detected, create a fault object. Alert the users if the alert is enabled.
     # Also, disable the monitor.
@@ -96,7 +85,7 @@ def agent_health_monitor(self, monitor_id: int):
 
         logger.error(f"Agent ID {agent_obj.agent_id} - Detected Invalid Status: {health_status}")
 
-        monitor_utils.add_fault_and_disable(monitor_obj.monitor_id, fault_string)
+        state.add_fault_and_disable(fault_string, batch["active_faults"])
         monitor_active = False
 
         # Email users attached to agent.
@@ -116,24 +105,18 @@ def agent_health_monitor(self, monitor_id: int):
                 agent_obj.owner_id, user_list, message, subject, constants.MessageCategories.MONITOR
             )
 
-        self.update_state(state="SUCCESS")
-        return {"status": "Invalid Health Status."}
+        return True, {"status": "Invalid Health Status."}
 
     else:
         logger.debug(f"Agent ID {agent_obj.agent_id} - Health Status: {health_status} - Healthy!")
 
     if monitor_active:
+        # The scheduler picks the monitor back up once next_check comes due.
         logger.debug(f"Monitor ID {monitor_id} is active. Scheduling next health check.")
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id)
-        new_task = self.apply_async(
-            [monitor_id],
-            countdown=next_interval,
-        )
-        monitor_utils.update_monitor_task_id(monitor_obj.monitor_id, new_task.id)
+        state.update_check_times()
     else:
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id, is_stopped=True)
-        monitor_utils.update_monitor_task_id(monitor_obj.monitor_id, None)
+        state.update_check_times(is_stopped=True)
+        state.set_task_id(None)
         logger.debug(f"Monitor ID {monitor_id} is not active. Stopping further health checks..")
 
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
+    return True, {"status": "Task Completed!"}
@@ -0,0 +1,78 @@
+"""
+This module houses the batched monitor task.
+
+A single task evaluates many monitors. The monitors, their agents, agent owners, and monitor
+attributes are loaded with a handful of bulk queries up front and each monitor is then evaluated
+against those in-memory objects, so the per-task and per-monitor lookup overhead is paid once per
+batch instead of once per monitor.
+"""
+
+from datetime import datetime, timezone
+
+from application.common import logger, constants, agent_log_buffer
+from application.extensions import CELERY, DATABASE
+from application.workers import monitor_utils
+from application.workers.monitor_agent import check_agent_health
+from application.workers.monitor_dedicated_server import check_dedicated_servers
+from application.workers.monitor_dedicated_server_updates import check_dedicated_server_updates
+
+_MONITOR_CHECKS = {
+    constants.MonitorTypes.AGENT: check_agent_health,
+    constants.MonitorTypes.DEDICATED_SERVER: check_dedicated_servers,
+    constants.MonitorTypes.UPDATES: check_dedicated_server_updates,
+}
+
+
+@CELERY.task(bind=True)
+def run_monitor_batch(self, monitor_ids: list, generations: list):
+    """
+    Evaluate a batch of monitors.
+
+    Args:
+        monitor_ids: The monitors to evaluate.
+        generations: The generation each monitor was dispatched with, in the same order.
+    """
+    logger.debug(
+        f"Monitor Batch Task Running at {datetime.now(timezone.utc)} for "
+        f"{len(monitor_ids)} monitor(s)"
+    )
+
+    batch = monitor_utils.load_monitor_batch(monitor_ids, generations)
+    results = {}
+
+    for monitor_id, generation in zip(monitor_ids, generations):
+        monitor_obj = batch["monitors"].get(monitor_id)
+
+        if monitor_obj is None:
+            logger.error(f"Monitor ID {monitor_id} not found.")
+            results[monitor_id] = {"status": "Monitor ID not found."}
+            continue
+
+        monitor_type = constants.monitor_type_from_string(monitor_obj.monitor_type)
+
+        if monitor_type not in _MONITOR_CHECKS:
+            logger.critical(f"Monitor type {monitor_obj.monitor_type} not supported.")
+            results[monitor_id] = {"status": "Monitor type not supported."}
+            continue
+
+        # One misbehaving monitor must not take the rest of the batch down with it. Its changes
+        # are dropped, its lease simply expires, and the scheduler tries it again.
+        try:
+            _, result = _MONITOR_CHECKS[monitor_type](batch, monitor_id, generation)
+        except Exception as error:
+            logger.error(f"Monitor ID {monitor_id} - Run failed: {error}")
+            DATABASE.session.rollback()
+            monitor_utils.discard_state_update(batch, monitor_id)
+            result = {"status": "Monitor run failed."}
+
+        results[monitor_id] = result
+
+    # Write every monitor's changes at once, so the objects loaded for the batch stay loaded while
+    # the monitors run.
+    monitor_utils.commit_state_updates(batch)
+
+    # Write out the automated agent logs from the whole batch at once.
+    agent_log_buffer.flush()
+
+    self.update_state(state="SUCCESS")
+    return {"status": "Task Completed!", "results": results}
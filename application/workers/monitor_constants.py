@@ -62,3 +62,12 @@ ALERT_MESSAGES_FMT_STR = {
 
 MAX_COMMAND_RETRIES = 6
 COMMAND_WAIT_TIME = 10
+# A running server update is checked on this interval, and given up on after this long.
+UPDATE_POLL_TIME = 15
+UPDATE_MAX_WAIT_TIME = 2 * 60 * 60
+
+# Upper bound on the number of servers on a single agent whose status is checked at the same time.
+MAX_STATUS_CHECK_WORKERS = 8
+# An agent that does not support the bulk status/update calls is only asked again after this long,
+# in case it has since been upgraded.
+BULK_SUPPORT_RECHECK_SECONDS = 3600
@@ -1,67 +1,66 @@
-from datetime import datetime, timezone
-
 from application.api.controllers import messages
-from application.api.controllers.agent_logs import create_agent_log
-from application.common import logger, constants, toolbox
-from application.extensions import CELERY
+from application.common import logger, constants, operator_pool, agent_log_buffer
 from application.workers import monitor_constants, monitor_utils
-from application.workers import monitor_server_utils
-from operator_client import Operator
+from application.workers import monitor_server_utils, server_operations
 
 
-@CELERY.task(bind=True)
-def dedicated_server_update_monitor(self, monitor_id: int):
-    logger.debug(f"Dedicated Server Update Monitor Task Running at {datetime.now(timezone.utc)}")
+# Evaluate one monitor using the objects already loaded into the batch. Returns a tuple of
+# whether the run succeeded and the status dictionary.
+def check_dedicated_server_updates(batch: dict, monitor_id: int, generation: int) -> tuple:
+    logger.debug(f"Evaluating Dedicated Server Update Monitor ID {monitor_id}")
 
-    monitor_obj = monitor_utils._get_monitor_obj(monitor_id)
+    monitor_obj = batch["monitors"].get(monitor_id)
     owner_id = None
     final_server_state = None
     monitor_active = False
 
     if monitor_obj is None:
         logger.error(f"Monitor ID {monitor_id} not found.")
-        self.update_state(state="FAILURE")
-        return {"status": "Monitor ID not found."}
+        return False, {"status": "Monitor ID not found."}
 
     monitor_active = monitor_obj.active
 
     if not monitor_active:
         logger.error(f"Monitor ID {monitor_id} - Monitor Not Active.")
         logger.debug("This means the monitor was disabled since the last run.")
-        self.update_state(state="FAILURE")
-        return {"status": "Monitor Not Active."}
+        return False, {"status": "Monitor Not Active."}
 
-    # Compare the task_id to the task_id in the monitor object. If they do not match, then
-    # this task is stale and should be revoked.
-    if monitor_obj.task_id != self.request.id:
+    # Compare the generation to the generation in the monitor object. If they do not match, then
+    # the scheduler has since dispatched a newer run, or the monitor was reset, and this run is
+    # stale.
+    if monitor_obj.generation != generation:
         logger.error(
             f"Monitor ID {monitor_id} - "
-            f"Task ID Mismatch: {monitor_obj.task_id} != {self.request.id}"
+            f"Generation Mismatch: {monitor_obj.generation} != {generation}"
         )
-        logger.debug("This means the container restarted and the revoked task list reset.")
-        self.update_state(state="FAILURE")
-        return {"status": "Task ID Mismatch."}
+        logger.debug("This means a newer run of this monitor superseded this one.")
+        return False, {"status": "Generation Mismatch."}
+
+    # Collects this run's changes to the monitor, written together once the run is over.
+    state = monitor_utils.get_state_update(batch, monitor_obj)
 
     # Get the agent object associated with the monitor
-    agent_obj = monitor_utils._get_agent_obj(monitor_obj.agent_id)
+    agent_obj = batch["agents"].get(monitor_obj.agent_id)
 
     if agent_obj is None:
         logger.error(f"Agent ID {monitor_obj.agent_id} not found.")
-        self.update_state(state="FAILURE")
-        return {"status": "Agent ID not found."}
+        state.stop()
+        return False, {"status": "Agent ID not found."}
 
     # This cannot be None because the monitor record is created at the time of agent creation.
-    agent_health_monitor = monitor_utils._get_agent_health_monitor_obj(agent_obj.agent_id)
+    agent_health_monitor = batch["health_monitors"][agent_obj.agent_id]
 
     # Get the owner associated with the monitor
-    owner_obj = monitor_utils._get_monitor_owner(monitor_obj.monitor_id)
+    owner_obj = batch["owners"][agent_obj.owner_id]
 
     logger.debug(f"Agent Health Monitor owned by: {owner_obj.username}({owner_obj.user_id})")
 
     # Get the owner's maintenance window preference or assume the default.
     owner_id = agent_obj.owner_id
-    maintenance_hour = monitor_utils.get_user_property(owner_id, "USER_MAINTENANCE_HOUR")
-    user_tz_label = monitor_utils.get_user_property(owner_id, "USER_TIMEZONE")
+    maintenance_hour = monitor_utils.get_user_property(
+        owner_id, "USER_MAINTENANCE_HOUR", user_obj=owner_obj
+    )
+    user_tz_label = monitor_utils.get_user_property(owner_id, "USER_TIMEZONE", user_obj=owner_obj)
 
     if monitor_utils.has_monitor_attribute(monitor_obj, "final_server_state"):
         final_server_state_str = monitor_obj.attributes["final_server_state"]
@@ -69,7 +68,7 @@ def dedicated_server_update_monitor(self, monitor_id: int):
     else:
         final_server_state = constants.ServerStates.SAME
 
-    if monitor_utils.is_monitor_testing_enabled():
+    if batch["is_testing"]:
         logger.debug("Monitor Testing is enabled. Using Default Test Interval Constant.")
         next_interval = constants.DEFAULT_MONITOR_TESTING_INTERVAL
     else:
@@ -86,31 +85,26 @@ def dedicated_server_update_monitor(self, monitor_id: int):
     logger.debug(f"Next Interval: {next_interval} seconds, and Alert Users: {alert_enable}")
 
     # Create a client to communicate with the agent
-    client = Operator(
-        toolbox.format_url_prefix(agent_obj.hostname),
-        agent_obj.port,
-        verbose=False,
-        token=agent_obj.access_token,
-        certificate=agent_obj.ssl_public_cert,
-        timeout=constants.AGENT_SMITH_TIMEOUT,
-    )
+    client = operator_pool.get_agent_client(agent_obj, timeout=constants.AGENT_SMITH_TIMEOUT)
 
     # If the agent health monitor has a fault... back out now.
     if agent_health_monitor.has_fault:
         fault_string = "Agent Health Monitor has detected a fault. Disabling this monitor."
         logger.error(fault_string)
-        self.update_state(state="FAILURE")
 
-        if monitor_utils.is_fault_description_matching(monitor_obj.monitor_id, fault_string):
-            logger.debug("Fault already exists for this Agent. Skipping.")
+        if monitor_utils.is_fault_description_matching(
+            monitor_obj.monitor_id, fault_string, batch["active_faults"]
+        ):
+            logger.debug("Fault already exists for this Agent. Stopping the monitor.")
+            state.stop()
         else:
-            monitor_utils.add_fault_and_disable(monitor_obj.monitor_id, fault_string)
+            state.add_fault_and_disable(fault_string, batch["active_faults"])
 
         monitor_active = False
-        return {"status": "Agent Health Monitor Fault."}
+        return False, {"status": "Agent Health Monitor Fault."}
 
-    # Get the health status of the agent
-    health_status = client.architect.get_health(secure_version=True)
+    # Get the health status of the agent, which was probed along with the rest of the batch.
+    health_status = batch["agent_health"].get(agent_obj.agent_id)
 
     # If a fault is detected, create a fault object. Alert the users if the alert is enabled.
     # Also, disable the monitor.
@@ -122,30 +116,35 @@ def dedicated_server_update_monitor(self, monitor_id: int):
 
         fault_string = f"Health Check Failed: {health_status}"
 
-        if monitor_utils.is_fault_description_matching(monitor_obj.monitor_id, fault_string):
-            logger.debug("Fault already exists for this Agent. Skipping.")
+        if monitor_utils.is_fault_description_matching(
+            monitor_obj.monitor_id, fault_string, batch["active_faults"]
+        ):
+            logger.debug("Fault already exists for this Agent. Stopping the monitor.")
+            state.stop()
         else:
-            monitor_utils.add_fault_and_disable(monitor_obj.monitor_id, fault_string)
+            state.add_fault_and_disable(fault_string, batch["active_faults"])
 
         monitor_active = False
 
-        self.update_state(state="SUCCESS")
-        return {"status": "Invalid Agent Health Status."}
+        return True, {"status": "Invalid Agent Health Status."}
 
     else:
         logger.debug(
             f"Agent ID {agent_obj.agent_id} - Health Status for (DS): {health_status} - Healthy!"
         )
 
-        # Update the monitor check times
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id)
-
         # If the agent is healthy, then obtain all currently installed games on the agent.
         installed_servers = client.game.get_games()
         installed_servers = installed_servers["items"]  # This is the server list.
 
         alert_fmt_str_list = []  # One or more possible total message
 
+        # Check if the servers require an update, they do not have to be running to do this. This is
+        # a single bulk request when the agent supports it, and per-server requests otherwise.
+        server_update_infos = monitor_server_utils._get_servers_update_info(
+            client, agent_obj.agent_id, [server["game_id"] for server in installed_servers]
+        )
+
         # Loop through all the servers and check if they are running, and take actions if necessary.
         for server in installed_servers:
             server_id = server["game_id"]
@@ -155,8 +154,7 @@ def dedicated_server_update_monitor(self, monitor_id: int):
             fault_string_2 = f"Server {server_name} was updated."
             fault_string_3 = f"Server {server_name} will be updated at the next maintenance window."
 
-            # Check if the server requires an update, it does not have to be running to do this.
-            update_info = client.game.check_for_update(server_id)
+            update_info = server_update_infos[server_id]
 
             if update_info is None:
                 logger.error(f"Server {server_name} - Update Check Failed.")
@@ -196,7 +194,7 @@ def dedicated_server_update_monitor(self, monitor_id: int):
                         logger.debug("Outside Maintenance Window. Skipping Server Update.")
 
                         if monitor_utils.is_fault_description_matching(
-                            monitor_obj.monitor_id, fault_string_3
+                            monitor_obj.monitor_id, fault_string_3, batch["active_faults"]
                         ):
                             logger.debug(
                                 f"This monitor has already alerted that update is coming in next "
@@ -204,8 +202,8 @@ def dedicated_server_update_monitor(self, monitor_id: int):
                             )
                             continue
 
-                        monitor_utils.create_monitor_fault(monitor_obj.monitor_id, fault_string_3)
-                        monitor_utils.set_monitor_fault_flag(monitor_obj.monitor_id, has_fault=True)
+                        state.add_fault(fault_string_3, batch["active_faults"])
+                        state.set_fault_flag(True)
                         alert_fmt_inputs["format_string_dict"] = (
                             monitor_constants.ALERT_MESSAGES_FMT_STR["DS_UPDATE_3"]
                         )
@@ -214,7 +212,7 @@ def dedicated_server_update_monitor(self, monitor_id: int):
                         logger.debug("Inside Maintenance Window. Updating Server.")
 
                         if monitor_utils.is_fault_description_matching(
-                            monitor_obj.monitor_id, fault_string_2
+                            monitor_obj.monitor_id, fault_string_2, batch["active_faults"]
                         ):
                             logger.debug(
                                 "This monitor as already attempted to update "
@@ -222,48 +220,44 @@ def dedicated_server_update_monitor(self, monitor_id: int):
                             )
                             continue
 
-                        # Prior to startup, is the server running?
+                        # Prior to the update, is the server running?
                         is_server_running = monitor_server_utils._is_server_running(
                             client, server_pid, server_name
                         )
 
-                        # Run shutdown subroutine - If server is already offline, can't hurt to do
-                        # this anyway.
-                        shutdown_result = monitor_server_utils._stop_server(client, server_name)
-
-                        # Now issue the update command.
-                        update_result = monitor_server_utils._update_server(client, server_name)
-
-                        # Finally, startup the server.
                         if final_server_state == constants.ServerStates.ONLINE:
                             # User wants final state to be online no matter what.
-                            startup_result = monitor_server_utils._start_server(client, server_name)
-                        elif (
-                            final_server_state == constants.ServerStates.SAME and is_server_running
-                        ):
-                            # Server was running to begin with and user wants it to resume its
-                            # last state, so start it back up.
-                            startup_result = monitor_server_utils._start_server(client, server_name)
+                            start_after = True
+                        elif final_server_state == constants.ServerStates.SAME:
+                            # Server resumes its last state.
+                            start_after = is_server_running
                         else:
-                            startup_result = False
+                            start_after = False
+
+                        # Stop, update, and start the server in the background. If the server is
+                        # already offline, the stop is skipped.
+                        operation_id = server_operations.create_server_operation(
+                            agent_obj.agent_id,
+                            server_name,
+                            constants.ServerOperationTypes.UPDATE,
+                            start_after=start_after,
+                        )
 
                         logger.debug(
-                            f"Server {server_name} - Shutdown: {shutdown_result}, "
-                            f"Update: {update_result}, Startup: {startup_result}"
+                            f"Server {server_name} - Update Operation: {operation_id}, "
+                            f"Start After: {start_after}"
                         )
 
                         # Set the fault flag on the monitor overall.
-                        monitor_utils.create_monitor_fault(monitor_obj.monitor_id, fault_string_2)
-                        monitor_utils.set_monitor_fault_flag(monitor_obj.monitor_id, has_fault=True)
+                        state.add_fault(fault_string_2, batch["active_faults"])
+                        state.set_fault_flag(True)
                         alert_fmt_inputs["format_string_dict"] = (
                             monitor_constants.ALERT_MESSAGES_FMT_STR["DS_UPDATE_2"]
                         )
                         alert_fmt_str_list.append(alert_fmt_inputs)
 
                         log_message = f"Monitor: Auto-Update: {server_name}"
-                        create_agent_log(
-                            agent_obj.owner_id, agent_obj.agent_id, log_message, is_automated=True
-                        )
+                        agent_log_buffer.add(agent_obj.owner_id, agent_obj.agent_id, log_message)
 
                 # Otherwise, the user has not enabled auto-Update, and the server is left alone.
                 # Only create a fault/alert.
@@ -272,7 +266,7 @@ def dedicated_server_update_monitor(self, monitor_id: int):
 
                     # This prevents spamming the same fault/action over and over.
                     if monitor_utils.is_fault_description_matching(
-                        monitor_obj.monitor_id, fault_string_1
+                        monitor_obj.monitor_id, fault_string_1, batch["active_faults"]
                     ):
                         logger.debug(
                             f"This monitor as already identified the server: {server_name}. "
@@ -282,10 +276,10 @@ def dedicated_server_update_monitor(self, monitor_id: int):
 
                     # The server is not running, and the user has not enabled auto-Update.
                     # Therefore, create a fault and alert the user.
-                    monitor_utils.create_monitor_fault(monitor_obj.monitor_id, fault_string_1)
+                    state.add_fault(fault_string_1, batch["active_faults"])
 
                     # Set the fault flag on the monitor overall.
-                    monitor_utils.set_monitor_fault_flag(monitor_obj.monitor_id, has_fault=True)
+                    state.set_fault_flag(True)
                     alert_fmt_inputs["format_string_dict"] = (
                         monitor_constants.ALERT_MESSAGES_FMT_STR["DS_UPDATE_1"]
                     )
@@ -316,17 +310,12 @@ def dedicated_server_update_monitor(self, monitor_id: int):
             )
 
     if monitor_active:
+        # The scheduler picks the monitor back up once next_check comes due.
         logger.debug(f"Monitor ID {monitor_id} is active. Scheduling next health check.")
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id)
-        new_task = self.apply_async(
-            [monitor_id],
-            countdown=next_interval,
-        )
-        monitor_utils.update_monitor_task_id(monitor_obj.monitor_id, new_task.id)
+        state.update_check_times()
     else:
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id, is_stopped=True)
-        monitor_utils.update_monitor_task_id(monitor_obj.monitor_id, None)
+        state.update_check_times(is_stopped=True)
+        state.set_task_id(None)
         logger.debug(f"Monitor ID {monitor_id} is not active. Stopping further health checks..")
 
-    self.update_state(state="SUCCESS")
-    return {"status": "Task Completed!"}
+    return True, {"status": "Task Completed!"}
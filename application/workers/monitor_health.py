@@ -0,0 +1,61 @@
+"""This module is for probing the health of many agents at once."""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from application.common import logger, constants, operator_pool, toolbox
+
+
+# Probe a single agent. Any error talking to the agent is reported the same way as an agent that
+# never answered.
+def _get_agent_health(agent_info: dict) -> str:
+    client = operator_pool.get_client(
+        toolbox.format_url_prefix(agent_info["hostname"]),
+        agent_info["port"],
+        False,
+        token=agent_info["access_token"],
+        certificate=agent_info["ssl_public_cert"],
+        timeout=constants.AGENT_SMITH_TIMEOUT,
+    )
+
+    try:
+        return client.architect.get_health(secure_version=True)
+    except Exception as error:
+        logger.error(f"Agent ID {agent_info['agent_id']} - Health probe failed: {error}")
+        return None
+
+
+def probe_agents_health(agents: list) -> dict:
+    """
+    Check the health of many agents concurrently.
+
+    Each probe is bounded by the agent timeout, and at most AGENT_HEALTH_PROBE_CONCURRENCY probes
+    are in flight at once, so a batch full of dead agents costs roughly one timeout per
+    AGENT_HEALTH_PROBE_CONCURRENCY agents rather than one timeout per agent.
+
+    Args:
+        agents: The agent objects to probe.
+
+    Returns:
+        A dictionary of agent_id to health status, where None means the agent was unreachable.
+    """
+    if len(agents) == 0:
+        return {}
+
+    # Copy out what the probes need so that no ORM object is touched off the main thread.
+    agent_infos = [
+        {
+            "agent_id": agent.agent_id,
+            "hostname": agent.hostname,
+            "port": agent.port,
+            "access_token": agent.access_token,
+            "ssl_public_cert": agent.ssl_public_cert,
+        }
+        for agent in agents
+    ]
+
+    max_workers = min(constants.AGENT_HEALTH_PROBE_CONCURRENCY, len(agent_infos))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        health_statuses = list(executor.map(_get_agent_health, agent_infos))
+
+    return {info["agent_id"]: health for info, health in zip(agent_infos, health_statuses)}
@@ -0,0 +1,87 @@
+"""
+This module houses the monitor scheduler.
+
+Rather than having every monitor re-queue itself with a countdown, which leaves one pending ETA
+message per monitor sitting in the broker, celery beat runs the scheduler on a short, fixed
+interval. The monitors table, ordered by the indexed next_check column, acts as the time-ordered
+heap of pending checks. Only monitors that are due get dispatched, and they are dispatched in
+batches, so the broker never holds more than a few batch messages regardless of how many monitors
+exist.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from application.common import logger, constants
+from application.extensions import CELERY, DATABASE
+from application.models.monitor import Monitor
+from application.workers.monitor_batch import run_monitor_batch
+
+
+# Query the next batch of active monitors whose next_check has passed, most overdue first. The rows
+# stay locked until the lease is committed, so a monitor enabled, disabled, or reset meanwhile is
+# changed after the lease rather than under it, and the generation dispatched is the one leased.
+# Rows another scheduler has locked are skipped rather than waited on.
+def _get_due_monitors_query(now: datetime, batch_size: int):
+    return (
+        DATABASE.session.query(Monitor.monitor_id, Monitor.generation)
+        .filter(Monitor.active.is_(True), Monitor.next_check <= now)
+        .order_by(Monitor.next_check)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def _get_due_monitors(now: datetime, batch_size: int) -> list:
+    return _get_due_monitors_query(now, batch_size).all()
+
+
+# Take a lease on the monitors, in the transaction that locked them. The generation bump
+# invalidates any run that is still in flight and pushing next_check out keeps the scheduler from
+# dispatching the monitor again while this run is in progress. Should the run be lost, the monitor
+# is due again when the lease expires.
+def _lease_monitors(monitor_ids: list, now: datetime) -> None:
+    lease_expiry = now + timedelta(seconds=constants.MONITOR_LEASE_SECONDS)
+
+    Monitor.query.filter(Monitor.monitor_id.in_(monitor_ids)).update(
+        {"generation": Monitor.generation + 1, "next_check": lease_expiry},
+        synchronize_session=False,
+    )
+
+    try:
+        DATABASE.session.commit()
+    except Exception as e:
+        DATABASE.session.rollback()
+        raise e
+
+
+@CELERY.task(bind=True)
+def dispatch_due_monitors(self):
+    now = datetime.now(timezone.utc)
+
+    due_monitors = _get_due_monitors(now, constants.MONITOR_SCHEDULER_BATCH_SIZE)
+
+    if len(due_monitors) == 0:
+        DATABASE.session.rollback()
+        return {"status": "No monitors due."}
+
+    logger.debug(f"Monitor Scheduler: {len(due_monitors)} monitor(s) due at {now}")
+
+    _lease_monitors([monitor.monitor_id for monitor in due_monitors], now)
+
+    num_batches = 0
+    batch_size = constants.MONITOR_RUN_BATCH_SIZE
+
+    for index in range(0, len(due_monitors), batch_size):
+        chunk = due_monitors[index : index + batch_size]
+
+        # The generation was bumped by one when the lease was taken.
+        run_monitor_batch.apply_async(
+            [
+                [monitor.monitor_id for monitor in chunk],
+                [monitor.generation + 1 for monitor in chunk],
+            ]
+        )
+        num_batches += 1
+
+    self.update_state(state="SUCCESS")
+    return {"status": f"Dispatched {len(due_monitors)} monitor(s) in {num_batches} batch(es)."}
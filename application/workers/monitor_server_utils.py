@@ -1,12 +1,20 @@
 """This module is for utility functions for monitors interacting with dedicated servers."""
 
+import threading
 import time
 
+from concurrent.futures import ThreadPoolExecutor
+
 from application.common import logger
 from application.workers import monitor_constants
 
 from operator_client import Operator
 
+# (Agent ID, bulk method name) to the time at which the agent was found not to support that call.
+# Each bulk call is tracked separately, as an agent may support one and not the other.
+_BULK_UNSUPPORTED_LOCK = threading.Lock()
+_BULK_UNSUPPORTED = {}
+
 
 def _is_server_running(client: Operator, server_pid: str, server_name: str) -> bool:
     server_status = client.game.get_game_status(server_name)
@@ -15,70 +23,112 @@ def _is_server_running(client: Operator, server_pid: str, server_name: str) -> b
     return is_running and is_pid
 
 
-# A sub-routine to start the server.
-def _start_server(client: Operator, server_name: str) -> bool:
-    # Start the server. Issue the start command regardless.
-    game_arguments = client.game.get_argument_by_game_name(server_name)
+# Call a function once per item over a bounded thread pool, so the wait tracks the slowest call
+# rather than the sum of all of them.
+def _fan_out(func, items: list) -> dict:
+    if len(items) == 0:
+        return {}
 
-    # First attempt
-    arg_dict = {}
-    for arg in game_arguments:
-        arg_dict[arg["game_arg"]] = arg["game_arg_value"]
+    max_workers = min(monitor_constants.MAX_STATUS_CHECK_WORKERS, len(items))
 
-    client.game.game_startup(server_name, input_args=arg_dict)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(func, items))
 
-    # Check that the server actually is running.
-    retry_count = 1
-    server_status = client.game.get_game_status(server_name)
-    is_running = server_status["is_running"]
+    return dict(zip(items, results))
 
-    while not is_running and (retry_count <= monitor_constants.MAX_COMMAND_RETRIES):
-        logger.debug(
-            f"Server {server_name} is not running. Retrying startup. Attempt: {retry_count}"
-        )
-        client.game.game_startup(server_name, input_args=arg_dict)
-        time.sleep(monitor_constants.COMMAND_WAIT_TIME)
-        server_status = client.game.get_game_status(server_name)
-        is_running = server_status["is_running"]
-        retry_count += 1
-
-    if not is_running:
-        logger.error(f"Server {server_name} failed to start.")
-        return False
 
-    return True
+# Ask the agent for information on all of its games in one request, if it supports it. Returns
+# None when the bulk call is unavailable so the caller falls back to asking per server.
+def _call_bulk(client: Operator, agent_id: int, method_name: str) -> dict:
+    with _BULK_UNSUPPORTED_LOCK:
+        unsupported_at = _BULK_UNSUPPORTED.get((agent_id, method_name))
 
+        if unsupported_at is not None:
+            if time.monotonic() - unsupported_at < monitor_constants.BULK_SUPPORT_RECHECK_SECONDS:
+                return None
+            del _BULK_UNSUPPORTED[(agent_id, method_name)]
+
+    bulk_method = getattr(client.game, method_name, None)
+    result = None
+
+    if bulk_method is not None:
+        try:
+            result = bulk_method()
+        except Exception as error:
+            logger.debug(f"Agent ID {agent_id} - Bulk call {method_name} failed: {error}")
+
+    if not isinstance(result, dict):
+        logger.debug(f"Agent ID {agent_id} - Bulk call {method_name} unsupported. Falling back.")
+        with _BULK_UNSUPPORTED_LOCK:
+            _BULK_UNSUPPORTED[(agent_id, method_name)] = time.monotonic()
+        return None
+
+    return result
+
+
+# Answer as much as possible from the bulk response, and ask per server for whatever is missing.
+def _get_per_server(client: Operator, agent_id: int, method_name: str, func, keys: list) -> dict:
+    if len(keys) == 0:
+        return {}
+
+    bulk_result = _call_bulk(client, agent_id, method_name) or {}
+    results = {}
+
+    for key in keys:
+        # JSON object keys are always strings.
+        if str(key) in bulk_result:
+            results[key] = bulk_result[str(key)]
+
+    missing = [key for key in keys if key not in results]
+    results.update(_fan_out(func, missing))
+
+    return results
+
+
+# Get the status of many servers on one agent, keyed by server name.
+def _get_servers_status(client: Operator, agent_id: int, server_names: list) -> dict:
+    return _get_per_server(
+        client, agent_id, "get_games_status", client.game.get_game_status, server_names
+    )
+
+
+# Get the update information for many servers on one agent, keyed by server ID.
+def _get_servers_update_info(client: Operator, agent_id: int, server_ids: list) -> dict:
+    return _get_per_server(
+        client, agent_id, "check_for_updates", client.game.check_for_update, server_ids
+    )
 
-# A sub-routine to stop the server.
-def _stop_server(client: Operator, server_name: str) -> bool:
-    # Stop the server. Issue the stop command regardless.
-    client.game.game_shutdown(server_name)
 
-    # Check that the server actually is shutdown.
-    retry_count = 1
+# The commands below each make a single, short request of the agent and never wait on the result.
+# Waiting for a server to come up, go down, or finish updating is left to the server operations
+# worker, which checks back later instead of holding a worker while it waits.
+
+
+# Determine whether or not the agent reports the server as running.
+def _is_running(client: Operator, server_name: str) -> bool:
     server_status = client.game.get_game_status(server_name)
-    is_running = server_status["is_running"]
+    return server_status["is_running"]
 
-    while is_running and (retry_count <= monitor_constants.MAX_COMMAND_RETRIES):
-        logger.debug(
-            f"Server {server_name} is still running. Retrying shutdown. Attempt: {retry_count}"
-        )
-        client.game.game_shutdown(server_name)
-        time.sleep(monitor_constants.COMMAND_WAIT_TIME)
-        server_status = client.game.get_game_status(server_name)
-        is_running = server_status["is_running"]
-        retry_count += 1
-
-    if not is_running:
-        logger.error(f"Server {server_name} failed to start.")
-        return False
 
-    return True
+# Issue the startup command, with the server's configured arguments.
+def _issue_startup(client: Operator, server_name: str) -> None:
+    game_arguments = client.game.get_argument_by_game_name(server_name)
+
+    arg_dict = {}
+    for arg in game_arguments:
+        arg_dict[arg["game_arg"]] = arg["game_arg_value"]
+
+    client.game.game_startup(server_name, input_args=arg_dict)
 
 
-# A sub-routine to update the server.
-def _update_server(client: Operator, server_name: str):
-    # Obtain some requisite information
+# Issue the shutdown command.
+def _issue_shutdown(client: Operator, server_name: str) -> None:
+    client.game.game_shutdown(server_name)
+
+
+# Get what the steam calls need to know about the server: the steam install directory, and the
+# server's game ID, steam ID, and install path.
+def _get_steam_info(client: Operator, server_name: str) -> tuple:
     steam_install_dir = client.app.get_setting_by_name("steam_install_dir")
     game_info = client.game.get_game_by_name(server_name)
 
@@ -86,19 +136,34 @@ def _update_server(client: Operator, server_name: str):
     steam_id = game_info["items"][0]["game_steam_id"]
     install_path = game_info["items"][0]["game_install_dir"]
 
+    return steam_install_dir, game_id, steam_id, install_path
+
+
+# Kick off the steam update of the server. Returns the ident of the agent thread running it.
+def _begin_server_update(client: Operator, server_name: str) -> int:
+    steam_install_dir, _, steam_id, install_path = _get_steam_info(client, server_name)
+
     thread_ident = client.steam.update_steam_app(steam_install_dir, steam_id, install_path)
-    thread_alive = client.app.is_thread_alive(thread_ident)
 
-    logger.debug(f"Update Thread Ident: {thread_ident}, Alive: {thread_alive}")
+    logger.debug(f"Server {server_name} - Update Thread Ident: {thread_ident}")
+
+    return thread_ident
 
-    while thread_alive:
-        logger.debug("Waiting for update to finish....")
-        thread_alive = client.app.is_thread_alive(thread_ident)
-        time.sleep(1)
+
+# Determine whether or not the update running on the agent thread is still going.
+def _is_update_running(client: Operator, thread_ident: int) -> bool:
+    return client.app.is_thread_alive(thread_ident)
+
+
+# Record the new steam build of the server, once the update has finished.
+def _finish_server_update(client: Operator, server_name: str) -> bool:
+    steam_install_dir, game_id, steam_id, install_path = _get_steam_info(client, server_name)
 
     steam_build_id = client.steam.get_steam_app_build_id(steam_install_dir, install_path, steam_id)
 
-    if steam_build_id:
-        client.game.update_game_data(game_id, game_steam_build_id=steam_build_id)
-    else:
+    if not steam_build_id:
         logger.error(f"Failed to get Steam Build ID for {server_name}")
+        return False
+
+    client.game.update_game_data(game_id, game_steam_build_id=steam_build_id)
+    return True
@@ -16,14 +16,17 @@ def test_task(self, monitor_id: int):
         return {"status": "Monitor ID not found."}
 
     next_interval = constants.DEFAULT_MONITOR_TESTING_INTERVAL
+    state = monitor_utils.MonitorStateUpdate(monitor_obj, is_testing=True)
 
     if monitor_obj.active:
         logger.debug(f"Monitor ID {monitor_id} is active. Scheduling next health check.")
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id)
+        state.update_check_times()
+        state.commit()
         self.apply_async(
             [monitor_id],
             countdown=next_interval,
         )
     else:
-        monitor_utils.update_monitor_check_times(monitor_obj.monitor_id, is_stopped=True)
+        state.update_check_times(is_stopped=True)
+        state.commit()
         logger.debug(f"Monitor ID {monitor_id} is not active. Stopping further health checks..")
@@ -2,22 +2,15 @@ import pytz
 
 from datetime import datetime, timezone, timedelta
 
-from application.common import constants, logger, timezones
+from application.common import constants, logger, monitor_events, settings_cache, timezones
 from application.extensions import DATABASE
-from application.models.agent import Agents
+from application.models.agent import Agents, get_agent_user_ids
 from application.models.default_property import DefaultProperty
-from application.models.group import Groups
 from application.models.monitor import Monitor
+from application.models.monitor_attribute import MonitorAttribute
 from application.models.monitor_fault import MonitorFault
-from application.models.setting import SettingsSql
 from application.models.user import UserSql
-
-
-# Add a user to a list if they are not already in the list.
-def _add_user_to_list(user_id: int, user_list: list) -> list:
-    if user_id not in user_list:
-        user_list.append(user_id)
-    return user_list
+from application.workers import monitor_health
 
 
 # Get user object from Id
@@ -55,9 +48,71 @@ def _get_monitor_owner(monitor_id: int) -> UserSql:
     return _get_user_object(agent_obj.owner_id)
 
 
+# Load everything that a batch of monitor runs needs with one query per table rather than a
+# handful of queries per monitor. The generations are the ones the monitors were dispatched with,
+# in the same order.
+def load_monitor_batch(monitor_ids: list, generations: list) -> dict:
+    monitors = Monitor.query.filter(Monitor.monitor_id.in_(monitor_ids)).all()
+    agent_ids = {monitor.agent_id for monitor in monitors}
+
+    agents = Agents.query.filter(Agents.agent_id.in_(agent_ids)).all()
+    owner_ids = {agent.owner_id for agent in agents}
+
+    owners = UserSql.query.filter(UserSql.user_id.in_(owner_ids)).all()
+
+    # The dedicated server monitors defer to the agent health monitor of the same agent.
+    health_monitors = Monitor.query.filter(
+        Monitor.agent_id.in_(agent_ids),
+        Monitor.monitor_type == constants.monitor_type_to_string(constants.MonitorTypes.AGENT),
+    ).all()
+
+    attributes = {monitor.monitor_id: {} for monitor in monitors}
+    all_attrs = MonitorAttribute.query.filter(MonitorAttribute.monitor_id.in_(monitor_ids)).all()
+    for attr in all_attrs:
+        attributes[attr.monitor_id][attr.attribute_name] = attr.attribute_value
+
+    for monitor in monitors:
+        monitor.preload_attributes(attributes[monitor.monitor_id])
+
+    # Duplicate fault suppression checks against these rather than querying per fault string.
+    active_faults = {monitor.monitor_id: set() for monitor in monitors}
+    fault_rows = (
+        DATABASE.session.query(MonitorFault.monitor_id, MonitorFault.fault_description)
+        .filter(MonitorFault.monitor_id.in_(monitor_ids), MonitorFault.active.is_(True))
+        .all()
+    )
+    for fault in fault_rows:
+        active_faults[fault.monitor_id].add(fault.fault_description)
+
+    # Probe the agents concurrently, rather than one blocking call per monitor. Only monitors that
+    # are still active and on the generation they were dispatched with go on to look at the agent's
+    # health; stale and superseded runs bail out first, so their agents are not probed.
+    dispatched_generations = dict(zip(monitor_ids, generations))
+    probe_agent_ids = {
+        monitor.agent_id
+        for monitor in monitors
+        if monitor.active and monitor.generation == dispatched_generations.get(monitor.monitor_id)
+    }
+    agent_health = monitor_health.probe_agents_health(
+        [agent for agent in agents if agent.agent_id in probe_agent_ids]
+    )
+
+    return {
+        "monitors": {monitor.monitor_id: monitor for monitor in monitors},
+        "agents": {agent.agent_id: agent for agent in agents},
+        "owners": {owner.user_id: owner for owner in owners},
+        "health_monitors": {monitor.agent_id: monitor for monitor in health_monitors},
+        "agent_health": agent_health,
+        "active_faults": active_faults,
+        "is_testing": is_monitor_testing_enabled(),
+        "state_updates": {},
+    }
+
+
 # Get the value of a user preference based on the user_id and preference name.
-def get_user_property(user_id: int, property_name: str) -> str:
-    user_obj = _get_user_object(user_id)
+def get_user_property(user_id: int, property_name: str, user_obj: UserSql = None) -> str:
+    if user_obj is None:
+        user_obj = _get_user_object(user_id)
     user_properties = user_obj.properties
     property_value = None
 
@@ -73,9 +128,7 @@ def get_user_property(user_id: int, property_name: str) -> str:
 
 # Determine if the admin put the system in testing mode for monitors.
 def is_monitor_testing_enabled() -> bool:
-    setting = SettingsSql.query.filter_by(name="MONITOR_TEST_MODE").first()
-    setting_test = setting.value.lower()
-    return True if setting_test == "true" else False
+    return settings_cache.is_setting_true("MONITOR_TEST_MODE")
 
 
 # Check if the attribute string representation of a bool is True or False
@@ -91,89 +144,207 @@ def has_monitor_attribute(monitor: Monitor, attribute: str) -> bool:
     return True if attribute in monitor.attributes else False
 
 
-# Update Monitor object to disable the monitor.
-def disable_monitor(monitor_id: int) -> None:
-    monitor = Monitor.query.filter_by(monitor_id=monitor_id).first()
-
-    monitor.active = False
-
-    try:
-        DATABASE.session.commit()
-    except Exception as e:
-        DATABASE.session.rollback()
-        raise e
-
+class MonitorStateUpdate:
+    """
+    Collects the state changes made during one monitor run and writes them in one transaction.
+
+    Every change to the monitor row becomes part of a single UPDATE, and new faults are inserted
+    in the same transaction, rather than each change re-reading the monitor and committing on its
+    own. Nothing is written until the update is staged and committed. The changes are kept off the
+    ORM object, so commits made by other code during the run (e.g. when messaging users) do not
+    write them early.
+
+    The UPDATE only applies while the monitor is still on the generation the run was dispatched
+    with. Should the user have disabled or reset the monitor in the meantime, the run's changes are
+    dropped rather than overwriting the user's.
+    """
+
+    def __init__(self, monitor: Monitor, is_testing: bool) -> None:
+        self.monitor_id = monitor.monitor_id
+        self.generation = monitor.generation
+        self._monitor = monitor
+        self._is_testing = is_testing
+        self._monitor_info = monitor_events.get_monitor_info(monitor)
+        self._values = {}
+        self._new_faults = []
+
+    def set_fault_flag(self, has_fault: bool) -> None:
+        self._values["has_fault"] = has_fault
+
+    def set_task_id(self, task_id: str) -> None:
+        self._values["task_id"] = task_id
+
+    def disable(self) -> None:
+        self._values["active"] = False
+
+    # Set last_check to now, and next_check one interval from now, or to None when there is not
+    # going to be a next check.
+    def update_check_times(self, is_stopped: bool = False) -> None:
+        if self._is_testing:
+            interval = constants.DEFAULT_MONITOR_TESTING_INTERVAL
+        else:
+            if has_monitor_attribute(self._monitor, "interval"):
+                interval = int(self._monitor.attributes["interval"])
+            else:
+                interval = constants.DEFAULT_MONITOR_INTERVAL
+
+        now = datetime.now(timezone.utc)
+
+        self._values["last_check"] = now
+        self._values["next_check"] = None if is_stopped else now + timedelta(seconds=interval)
 
-# Set the fault flag on the monitor.
-def set_monitor_fault_flag(monitor_id: int, has_fault: bool) -> None:
-    monitor = Monitor.query.filter_by(monitor_id=monitor_id).first()
-    monitor.has_fault = has_fault
+    # Record a new fault. When given the active faults preloaded for a batch, the new fault is
+    # recorded there as well.
+    def add_fault(self, fault: str, active_faults: dict = None) -> None:
+        self._new_faults.append((fault, datetime.now(timezone.utc)))
+
+        if active_faults is not None:
+            active_faults.setdefault(self.monitor_id, set()).add(fault)
+
+    # Stop checking the monitor. The monitor does not come back until the user turns it back on.
+    def stop(self) -> None:
+        self.update_check_times(is_stopped=True)
+        self.set_task_id(None)
+        self.disable()
+
+    # Throw the fault and bail out.
+    def add_fault_and_disable(self, fault: str, active_faults: dict = None) -> None:
+        self.add_fault(fault, active_faults)
+        self.set_fault_flag(True)
+        self.stop()
+
+    def has_changes(self) -> bool:
+        return len(self._values) > 0 or len(self._new_faults) > 0
+
+    def stage(self) -> bool:
+        """
+        Add the collected changes to the session, without committing them.
+
+        Returns:
+            True if the changes were staged, False if the monitor has moved on to a newer
+            generation and the changes were dropped.
+        """
+        # With nothing to change on the monitor row, a no-op UPDATE still tells whether the
+        # generation matches before any faults are added.
+        values = self._values if len(self._values) > 0 else {"generation": self.generation}
+
+        num_updated = Monitor.query.filter(
+            Monitor.monitor_id == self.monitor_id, Monitor.generation == self.generation
+        ).update(values, synchronize_session=False)
+
+        if num_updated == 0:
+            logger.debug(
+                f"Monitor ID {self.monitor_id} - No longer on generation {self.generation}. "
+                "Dropping this run's changes."
+            )
+            return False
+
+        DATABASE.session.add_all(
+            [
+                MonitorFault(
+                    monitor_id=self.monitor_id,
+                    fault_time=fault_time,
+                    active=True,
+                    fault_description=fault,
+                )
+                for fault, fault_time in self._new_faults
+            ]
+        )
+
+        return True
+
+    def publish(self) -> None:
+        """Publish the collected changes to anyone viewing the monitor, once they are committed."""
+        changes = {key: value for key, value in self._values.items() if key != "task_id"}
+
+        if len(self._new_faults) > 0:
+            changes["new_faults"] = [fault for fault, _ in self._new_faults]
+
+        monitor_events.publish_monitor_change(self._monitor_info, **changes)
+
+    def commit(self) -> None:
+        """Write the collected changes in their own transaction, then publish them."""
+        if not self.has_changes():
+            return
+
+        is_staged = self.stage()
+
+        try:
+            DATABASE.session.commit()
+        except Exception as e:
+            logger.error(f"Monitor ID {self.monitor_id} - Error updating monitor state: {e}")
+            DATABASE.session.rollback()
+            raise e
+
+        if is_staged:
+            self.publish()
+
+        self._values = {}
+        self._new_faults = []
+
+
+# Get the state update collecting the changes of a monitor's run in the batch.
+def get_state_update(batch: dict, monitor: Monitor) -> MonitorStateUpdate:
+    state_updates = batch["state_updates"]
+
+    if monitor.monitor_id not in state_updates:
+        state_updates[monitor.monitor_id] = MonitorStateUpdate(monitor, batch["is_testing"])
+
+    return state_updates[monitor.monitor_id]
+
+
+# Write the monitor state changes every run in the batch made, in one transaction. Committing
+# expires the objects loaded for the batch, so this is done once, after the last monitor has run.
+# The changes are only collected until then, so work that commits on its own during the batch, e.g.
+# the server operations started by auto-restart and auto-update or a full agent log buffer, does
+# not write them early. Should the transaction fail, each monitor's changes are written on their
+# own so one bad write does not cost the rest of the batch theirs.
+def commit_state_updates(batch: dict) -> None:
+    state_updates = [
+        state_update
+        for state_update in batch["state_updates"].values()
+        if state_update.has_changes()
+    ]
+    batch["state_updates"] = {}
+
+    if len(state_updates) == 0:
+        return
 
     try:
+        staged_updates = [state_update for state_update in state_updates if state_update.stage()]
         DATABASE.session.commit()
-    except Exception as e:
+    except Exception as error:
+        logger.error(f"Error updating the state of the monitor batch: {error}")
         DATABASE.session.rollback()
-        raise e
 
+        for state_update in state_updates:
+            try:
+                state_update.commit()
+            except Exception as error:
+                logger.error(
+                    f"Monitor ID {state_update.monitor_id} - Error updating the state: {error}"
+                )
+                DATABASE.session.rollback()
 
-# Update the monitor object task_id field.
-def update_monitor_task_id(monitor_id: int, task_id: str) -> None:
-    monitor = Monitor.query.filter_by(monitor_id=monitor_id).first()
-    monitor.task_id = task_id
-
-    try:
-        DATABASE.session.commit()
-    except Exception as e:
-        DATABASE.session.rollback()
-        raise e
+        return
 
+    for state_update in staged_updates:
+        state_update.publish()
 
-# Update the Monitor object next_check and last_check fields.
-def update_monitor_check_times(monitor_id: int, is_stopped=False) -> None:
-    monitor = Monitor.query.filter_by(monitor_id=monitor_id).first()
 
-    if is_monitor_testing_enabled():
-        interval = constants.DEFAULT_MONITOR_TESTING_INTERVAL
-    else:
-        if has_monitor_attribute(monitor, "interval"):
-            interval = int(monitor.attributes["interval"])
-        else:
-            interval = constants.DEFAULT_MONITOR_INTERVAL
+# Forget the changes a monitor's run in the batch made, e.g. because the run failed.
+def discard_state_update(batch: dict, monitor_id: int) -> None:
+    batch["state_updates"].pop(monitor_id, None)
 
-    monitor.last_check = datetime.now(timezone.utc)
 
-    # If there is not going to be a next check, set the next_check field to None.
-    if not is_stopped:
-        monitor.next_check = datetime.now(timezone.utc) + timedelta(seconds=interval)
-    else:
-        monitor.next_check = None
+# Check for a matching, active, fault with the same description. Uses the active faults preloaded
+# for a batch when given, and the database otherwise.
+def is_fault_description_matching(
+    monitor_id: int, fault_description: str, active_faults: dict = None
+) -> bool:
+    if active_faults is not None:
+        return fault_description in active_faults.get(monitor_id, set())
 
-    try:
-        DATABASE.session.commit()
-    except Exception as e:
-        logger.error(f"Error updating monitor check times: {e}")
-        DATABASE.session.rollback()
-
-
-# Create a MonitorFault object and add it to the database.
-def create_monitor_fault(monitor_id: int, fault: str) -> None:
-    new_fault = MonitorFault(
-        monitor_id=monitor_id,
-        fault_time=datetime.now(timezone.utc),
-        active=True,
-        fault_description=fault,
-    )
-
-    try:
-        DATABASE.session.add(new_fault)
-        DATABASE.session.commit()
-    except Exception as e:
-        DATABASE.session.rollback()
-        raise e
-
-
-# Check database for a matching, active, fault with the same description.
-def is_fault_description_matching(monitor_id: int, fault_description: str) -> bool:
     fault_obj = MonitorFault.query.filter_by(
         monitor_id=monitor_id, fault_description=fault_description, active=True
     ).first()
@@ -183,29 +354,7 @@ def is_fault_description_matching(monitor_id: int, fault_description: str) -> bo
 
 # Get a list of all users that have access to the agent via groups or friendship.
 def get_agent_users(agent_id: int, return_objects=False) -> list:
-    agent = Agents.query.filter_by(agent_id=agent_id).first()
-
-    if agent is None:
-        return []
-
-    agent_users = []
-
-    # Get all groups that the agent is a member of
-    agent_group_members = agent.groups_with_access.all()
-
-    for member in agent_group_members:
-        group_member_id = member.group_member_id
-        group_obj = Groups.query.filter_by(group_id=group_member_id).first()
-        group_members = group_obj.members.all()
-
-        for member in group_members:
-            agent_users = _add_user_to_list(member.member_id, agent_users)
-
-    # Get all friends of the agent
-    friend_members = agent.friends_with_access.all()
-
-    for member in friend_members:
-        agent_users = _add_user_to_list(member.friend_member_id, agent_users)
+    agent_users = sorted(get_agent_user_ids([agent_id])[agent_id])
 
     if return_objects:
         return _get_user_objects(agent_users)
@@ -213,25 +362,6 @@ def get_agent_users(agent_id: int, return_objects=False) -> list:
         return agent_users
 
 
-# A function to group function calls.  Throw faults and bail out.
-def add_fault_and_disable(monitor_id: int, fault_string: str) -> None:
-
-    # Create the fault object
-    create_monitor_fault(monitor_id, fault_string)
-
-    # Set the fault flag
-    set_monitor_fault_flag(monitor_id, has_fault=True)
-
-    # Update the monitor check times
-    update_monitor_check_times(monitor_id, is_stopped=True)
-
-    # Null out the task id. Not coming back until user turns back on.
-    update_monitor_task_id(monitor_id, None)
-
-    # Disabled the monitor automatically
-    disable_monitor(monitor_id)
-
-
 # Determine whether or not the current time is within the maintenance window.
 def is_inside_maintenance_hour(maintenance_hour: int, user_timezone_label: str) -> bool:
     # Write a function that returns a timezone based on UTC offset.
@@ -0,0 +1,321 @@
+"""
+This module drives multi-step operations on dedicated servers: starting, restarting, and updating.
+
+Starting a server, stopping it, or waiting on a SteamCMD update can each take anywhere from seconds
+to tens of minutes. Rather than holding a worker for all of that, each operation is stored as a
+ServerOperation row and moves through its states one short step at a time:
+
+    UPDATE:  STOPPING -> UPDATING -> WAITING_FOR_UPDATE -> STARTING -> COMPLETED
+    RESTART: STOPPING -> STARTING -> COMPLETED
+    START:   STARTING -> COMPLETED
+    STOP:    STOPPING -> COMPLETED
+
+Each step makes one or two quick requests of the agent, records where the operation got to, and
+schedules the next step with a countdown. Any step can end in FAILED. A small worker pool can
+therefore drive many operations at once. Should a scheduled step be lost, e.g. because its worker
+restarted, the sweep picks the operation back up where it left off.
+
+Operations started for a user's game command bring that command along at every step, so the user
+hears how the operation is going without asking the agent themselves.
+"""
+
+from datetime import datetime, timezone, timedelta
+
+from application.common import logger, constants, operator_pool, game_commands
+from application.common.constants import GameCommandStates
+from application.common.constants import ServerOperationStates, ServerOperationTypes
+from application.extensions import CELERY, DATABASE
+from application.models.agent import Agents
+from application.models.server_operation import ServerOperation
+from application.workers import monitor_constants, monitor_server_utils
+
+_FINISHED_STATES = [ServerOperationStates.COMPLETED.name, ServerOperationStates.FAILED.name]
+
+
+def _commit() -> None:
+    try:
+        DATABASE.session.commit()
+    except Exception as e:
+        DATABASE.session.rollback()
+        raise e
+
+
+def _finish(operation: ServerOperation, state: ServerOperationStates, message: str) -> None:
+    logger.debug(f"Server Operation {operation.operation_id} - {state.name}: {message}")
+    operation.state = state.name
+    operation.message = message
+
+
+def _move_to(operation: ServerOperation, state: ServerOperationStates) -> int:
+    operation.state = state.name
+    operation.attempts = 0
+    return 0
+
+
+# Each step below handles one state. It does at most a couple of quick agent requests, moves the
+# operation along, and returns how many seconds until the next step, or None once it is finished.
+
+
+def _step_stopping(client, operation: ServerOperation) -> int:
+    if not monitor_server_utils._is_running(client, operation.server_name):
+        if operation.operation_type == ServerOperationTypes.UPDATE.name:
+            return _move_to(operation, ServerOperationStates.UPDATING)
+        elif operation.operation_type == ServerOperationTypes.STOP.name:
+            _finish(operation, ServerOperationStates.COMPLETED, "Server stopped.")
+            return None
+        else:
+            return _move_to(operation, ServerOperationStates.STARTING)
+
+    if operation.attempts > monitor_constants.MAX_COMMAND_RETRIES:
+        _finish(operation, ServerOperationStates.FAILED, "Server failed to stop.")
+        return None
+
+    monitor_server_utils._issue_shutdown(client, operation.server_name)
+    operation.attempts += 1
+    return monitor_constants.COMMAND_WAIT_TIME
+
+
+def _step_updating(client, operation: ServerOperation) -> int:
+    thread_ident = monitor_server_utils._begin_server_update(client, operation.server_name)
+
+    operation.thread_ident = thread_ident
+    _move_to(operation, ServerOperationStates.WAITING_FOR_UPDATE)
+    return monitor_constants.UPDATE_POLL_TIME
+
+
+def _step_waiting_for_update(client, operation: ServerOperation) -> int:
+    # The thread is unknown if the sweep picked the operation up mid request. Once the sweep runs
+    # the update has long had time to finish, so go on to check the result.
+    if operation.thread_ident is not None and monitor_server_utils._is_update_running(
+        client, operation.thread_ident
+    ):
+        operation.attempts += 1
+
+        waited = operation.attempts * monitor_constants.UPDATE_POLL_TIME
+
+        if waited > monitor_constants.UPDATE_MAX_WAIT_TIME:
+            _finish(operation, ServerOperationStates.FAILED, "Server update did not finish.")
+            return None
+
+        return monitor_constants.UPDATE_POLL_TIME
+
+    if not monitor_server_utils._finish_server_update(client, operation.server_name):
+        _finish(operation, ServerOperationStates.FAILED, "Server update failed.")
+        return None
+
+    if not operation.start_after:
+        _finish(operation, ServerOperationStates.COMPLETED, "Server updated.")
+        return None
+
+    return _move_to(operation, ServerOperationStates.STARTING)
+
+
+def _step_starting(client, operation: ServerOperation) -> int:
+    if monitor_server_utils._is_running(client, operation.server_name):
+        _finish(operation, ServerOperationStates.COMPLETED, "Server running.")
+        return None
+
+    if operation.attempts > monitor_constants.MAX_COMMAND_RETRIES:
+        _finish(operation, ServerOperationStates.FAILED, "Server failed to start.")
+        return None
+
+    monitor_server_utils._issue_startup(client, operation.server_name)
+    operation.attempts += 1
+    return monitor_constants.COMMAND_WAIT_TIME
+
+
+_STEPS = {
+    ServerOperationStates.STOPPING.name: _step_stopping,
+    ServerOperationStates.UPDATING.name: _step_updating,
+    ServerOperationStates.WAITING_FOR_UPDATE.name: _step_waiting_for_update,
+    ServerOperationStates.STARTING.name: _step_starting,
+}
+
+
+# Hand the operation to a worker for its next step.
+def _dispatch(operation_id: int, step: int, countdown: int = 0) -> None:
+    advance_server_operation.apply_async([operation_id, step], countdown=countdown)
+
+
+# Take the step for the worker running it. The step only moves on if it is still the one the task
+# was dispatched with, in one conditional UPDATE, so should the same step be handed to two workers,
+# e.g. by the sweep, only one of them acts on the operation.
+def _claim_step(operation_id: int, step: int) -> bool:
+    num_updated = ServerOperation.query.filter(
+        ServerOperation.operation_id == operation_id, ServerOperation.step == step
+    ).update(
+        {"step": ServerOperation.step + 1, "updated_at": datetime.now(timezone.utc)},
+        synchronize_session=False,
+    )
+
+    _commit()
+
+    return num_updated == 1
+
+
+def create_server_operation(
+    agent_id: int,
+    server_name: str,
+    operation_type: ServerOperationTypes,
+    start_after=True,
+    command_id: int = None,
+) -> int:
+    """
+    Start an operation on a dedicated server. Returns right away; the operation runs in the
+    background.
+
+    Args:
+        agent_id: The agent the server is on.
+        server_name: The name of the server.
+        operation_type: What to do to the server.
+        start_after: For updates, whether or not to start the server once it is updated.
+        command_id: The game command the operation carries out, if a user asked for it.
+
+    Returns:
+        The ID of the new operation, or None if the server already has one running.
+    """
+    # Lock the agent until the new operation is committed, so two requests for the same server
+    # cannot both find it idle.
+    agent_obj = Agents.query.filter_by(agent_id=agent_id).with_for_update().first()
+
+    if agent_obj is None:
+        logger.error(f"Agent ID {agent_id} not found. Not starting a {operation_type.name}.")
+        return None
+
+    running_operation = ServerOperation.query.filter(
+        ServerOperation.agent_id == agent_id,
+        ServerOperation.server_name == server_name,
+        ServerOperation.state.notin_(_FINISHED_STATES),
+    ).first()
+
+    if running_operation is not None:
+        logger.debug(
+            f"Server {server_name} already has operation {running_operation.operation_id} "
+            f"running. Not starting a {operation_type.name}."
+        )
+        DATABASE.session.rollback()
+        return None
+
+    if operation_type == ServerOperationTypes.START:
+        first_state = ServerOperationStates.STARTING
+    else:
+        first_state = ServerOperationStates.STOPPING
+
+    now = datetime.now(timezone.utc)
+
+    operation = ServerOperation(
+        agent_id=agent_id,
+        server_name=server_name,
+        operation_type=operation_type.name,
+        state=first_state.name,
+        step=0,
+        attempts=0,
+        start_after=start_after,
+        created_at=now,
+        updated_at=now,
+    )
+
+    DATABASE.session.add(operation)
+    _commit()
+
+    operation_id = operation.operation_id
+
+    logger.debug(f"Server {server_name} - Started {operation_type.name} operation {operation_id}")
+
+    # Link the command before the first step runs, so no step can finish without it.
+    if command_id is not None:
+        game_commands.update_game_command(
+            command_id, GameCommandStates.RUNNING, operation_id=operation_id
+        )
+
+    _dispatch(operation_id, 0)
+
+    return operation_id
+
+
+@CELERY.task(bind=True)
+def advance_server_operation(self, operation_id: int, step: int):
+    operation = ServerOperation.query.filter_by(operation_id=operation_id).first()
+
+    if operation is None:
+        logger.error(f"Server Operation {operation_id} not found.")
+        return {"status": "Operation not found."}
+
+    if operation.step != step:
+        logger.debug(f"Server Operation {operation_id} - Step {step} is stale. Skipping.")
+        return {"status": "Stale step."}
+
+    if operation.state in _FINISHED_STATES:
+        return {"status": f"Operation {operation.state}."}
+
+    if not _claim_step(operation_id, step):
+        logger.debug(f"Server Operation {operation_id} - Step {step} already taken. Skipping.")
+        return {"status": "Stale step."}
+
+    agent_obj = Agents.query.filter_by(agent_id=operation.agent_id).first()
+
+    if agent_obj is None:
+        _finish(operation, ServerOperationStates.FAILED, "Agent not found.")
+        countdown = None
+    else:
+        client = operator_pool.get_agent_client(agent_obj, timeout=constants.AGENT_SMITH_TIMEOUT)
+
+        try:
+            countdown = _STEPS[operation.state](client, operation)
+        except Exception as error:
+            logger.error(f"Server Operation {operation_id} - {operation.state} failed: {error}")
+            _finish(operation, ServerOperationStates.FAILED, f"{operation.state} failed.")
+            countdown = None
+
+    command_infos = game_commands.track_operation(operation)
+
+    operation.updated_at = datetime.now(timezone.utc)
+    _commit()
+
+    if countdown is not None:
+        _dispatch(operation_id, step + 1, countdown)
+
+    game_commands.publish_command_changes(command_infos)
+
+    self.update_state(state="SUCCESS")
+    return {"status": "Step Completed!"}
+
+
+@CELERY.task(bind=True)
+def resume_stalled_server_operations(self):
+    now = datetime.now(timezone.utc)
+    stalled_before = now - timedelta(seconds=constants.SERVER_OPERATION_STALL_SECONDS)
+
+    stalled_operations = ServerOperation.query.filter(
+        ServerOperation.state.notin_(_FINISHED_STATES),
+        ServerOperation.updated_at < stalled_before,
+    ).all()
+
+    resumed_steps = []
+
+    for operation in stalled_operations:
+        logger.debug(f"Server Operation {operation.operation_id} stalled. Resuming.")
+
+        values = {"updated_at": now}
+
+        # The agent may already have been asked for the update, so never ask it again.
+        if operation.state == ServerOperationStates.UPDATING.name:
+            values.update({"state": ServerOperationStates.WAITING_FOR_UPDATE.name, "attempts": 0})
+
+        # Leave the operation be if a worker took its step since it was loaded.
+        num_updated = ServerOperation.query.filter(
+            ServerOperation.operation_id == operation.operation_id,
+            ServerOperation.step == operation.step,
+        ).update(values, synchronize_session=False)
+
+        if num_updated == 1:
+            resumed_steps.append((operation.operation_id, operation.step))
+
+    _commit()
+
+    # Should the lost step turn up after all, only one of the two ever takes it.
+    for operation_id, step in resumed_steps:
+        _dispatch(operation_id, step)
+
+    self.update_state(state="SUCCESS")
+    return {"status": f"Resumed {len(resumed_steps)} operation(s)."}
@@ -8,6 +8,8 @@ from application.config.config import DefaultConfig
 from application.extensions import DATABASE as _db
 from application.factory import create_app
 from application.common.seed_data import _handle_default_records
+from application.models.agent import Agents
+from application.models.user import UserSql
 
 # @fixture(scope="module")
 # def client():
@@ -96,6 +98,31 @@ def session(app, db, request):
     session.remove()
 
 
+@fixture(scope="function")
+def create_agent(session):
+    """Returns a function that creates an agent, owned by a new user of the same name"""
+
+    def _create_agent(name: str, subscribed: bool = False) -> Agents:
+        owner = UserSql()
+        owner.username = name
+        owner.email = f"{name}@test.com"
+        owner.password = "password"
+        owner.subscribed = subscribed
+
+        session.add(owner)
+        session.commit()
+
+        agent = Agents(
+            name=name, hostname="localhost", ssl_public_cert="cert", owner_id=owner.user_id
+        )
+        session.add(agent)
+        session.commit()
+
+        return agent
+
+    return _create_agent
+
+
 # Used in system tests
 @fixture(params=["firefox"], scope="class")
 def selenium_local_driver(request):
@@ -0,0 +1,76 @@
+from application.common import agent_log_buffer, constants
+from application.models.agent import Agents
+from application.models.agent_log import AgentLog
+
+
+def _get_messages(agent: Agents) -> list:
+    return sorted(log.message for log in AgentLog.query.filter_by(agent_id=agent.agent_id).all())
+
+
+class TestAgentLogBuffer:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_flush_writes_pending_logs(self, app, session, mocker, create_agent):
+        agent = create_agent("buffer_flush")
+        agent_log_buffer.flush()
+        mocker.patch.object(constants, "AGENT_LOG_BUFFER_FLUSH_SECONDS", 60)
+
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "first")
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "second")
+
+        assert agent_log_buffer.pending() == 2
+        assert _get_messages(agent) == []
+
+        assert agent_log_buffer.flush() == 2
+        assert agent_log_buffer.pending() == 0
+        assert _get_messages(agent) == ["first", "second"]
+        assert all(
+            log.is_automated for log in AgentLog.query.filter_by(agent_id=agent.agent_id).all()
+        )
+
+    def test_add_flushes_when_full(self, app, session, mocker, create_agent):
+        agent = create_agent("buffer_full")
+        agent_log_buffer.flush()
+        mocker.patch.object(constants, "AGENT_LOG_BUFFER_FLUSH_SECONDS", 60)
+        mocker.patch.object(constants, "AGENT_LOG_BUFFER_MAX_RECORDS", 3)
+
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "first")
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "second")
+        assert _get_messages(agent) == []
+
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "third")
+
+        assert agent_log_buffer.pending() == 0
+        assert _get_messages(agent) == ["first", "second", "third"]
+
+    def test_add_flushes_when_oldest_is_due(self, app, session, mocker, create_agent):
+        agent = create_agent("buffer_due")
+        agent_log_buffer.flush()
+        monotonic = mocker.patch.object(agent_log_buffer.time, "monotonic", return_value=100.0)
+
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "first")
+        assert _get_messages(agent) == []
+
+        monotonic.return_value = 100.0 + constants.AGENT_LOG_BUFFER_FLUSH_SECONDS
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "second")
+
+        assert agent_log_buffer.pending() == 0
+        assert _get_messages(agent) == ["first", "second"]
+
+    def test_flush_drops_only_bad_logs(self, app, session, mocker, create_agent):
+        agent = create_agent("buffer_fallback")
+        agent_log_buffer.flush()
+        mocker.patch.object(constants, "AGENT_LOG_BUFFER_FLUSH_SECONDS", 60)
+
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "first")
+        agent_log_buffer.add(None, agent.agent_id, "no user")
+        agent_log_buffer.add(agent.owner_id, agent.agent_id, "second")
+
+        assert agent_log_buffer.flush() == 2
+        assert _get_messages(agent) == ["first", "second"]
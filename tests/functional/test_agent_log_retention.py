@@ -0,0 +1,88 @@
+from datetime import datetime, timezone, timedelta
+
+from application.common import seed_data, settings_cache
+from application.models.agent import Agents
+from application.models.agent_log import AgentLog
+from application.models.setting import SettingsSql
+from application.workers import agent_log_retention
+
+
+def _add_log(session, agent: Agents, days_old: int, is_automated: bool) -> int:
+    log = AgentLog(
+        agent_id=agent.agent_id,
+        user_id=agent.owner_id,
+        timestamp=datetime.now(timezone.utc) - timedelta(days=days_old),
+        is_automated=is_automated,
+        message=f"{days_old} days old",
+    )
+    session.add(log)
+    session.commit()
+
+    return log.log_id
+
+
+def _get_remaining_log_ids(agent_id: int) -> set:
+    return {log.log_id for log in AgentLog.query.filter_by(agent_id=agent_id).all()}
+
+
+class TestAgentLogRetention:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_purges_expired_automated_logs(self, app, session, mocker, create_agent):
+        mocker.patch.object(agent_log_retention.purge_expired_agent_logs, "update_state")
+        settings_cache.invalidate()
+
+        free_agent = create_agent("retention_free", subscribed=False)
+        paid_agent = create_agent("retention_paid", subscribed=True)
+
+        free_expired = _add_log(session, free_agent, 31, is_automated=True)
+        free_manual = _add_log(session, free_agent, 31, is_automated=False)
+        free_recent = _add_log(session, free_agent, 29, is_automated=True)
+        paid_kept = _add_log(session, paid_agent, 31, is_automated=True)
+        paid_expired = _add_log(session, paid_agent, 366, is_automated=True)
+
+        agent_log_retention.purge_expired_agent_logs.run()
+
+        assert free_expired not in _get_remaining_log_ids(free_agent.agent_id)
+        assert {free_manual, free_recent} <= _get_remaining_log_ids(free_agent.agent_id)
+        assert paid_kept in _get_remaining_log_ids(paid_agent.agent_id)
+        assert paid_expired not in _get_remaining_log_ids(paid_agent.agent_id)
+
+    def test_retention_read_from_settings(self, app, session, mocker, create_agent):
+        mocker.patch.object(agent_log_retention.purge_expired_agent_logs, "update_state")
+        mocker.patch.object(
+            settings_cache,
+            "get_setting",
+            side_effect=lambda name: {"AGENT_LOG_RETENTION_DAYS_FREE": "10"}.get(name),
+        )
+
+        free_agent = create_agent("retention_setting", subscribed=False)
+        free_expired = _add_log(session, free_agent, 11, is_automated=True)
+        free_recent = _add_log(session, free_agent, 9, is_automated=True)
+
+        agent_log_retention.purge_expired_agent_logs.run()
+
+        assert _get_remaining_log_ids(free_agent.agent_id) == {free_recent}
+        assert free_expired not in _get_remaining_log_ids(free_agent.agent_id)
+
+    def test_retention_settings_added_to_seeded_database(self, app, session):
+        setting_names = ["AGENT_LOG_RETENTION_DAYS_FREE", "AGENT_LOG_RETENTION_DAYS_PAID"]
+
+        # A database seeded before the retention settings existed.
+        SettingsSql.query.filter(SettingsSql.name.in_(setting_names)).delete()
+        session.commit()
+        assert SettingsSql.query.filter_by(name="IS_SEEDED").first() is not None
+
+        seed_data._handle_default_records(app)
+        session.expire_all()
+
+        for setting_name in setting_names:
+            setting = SettingsSql.query.filter_by(name=setting_name).first()
+            assert setting.value == str(app.config[setting_name])
+            assert settings_cache.get_setting(setting_name) == setting.value
@@ -0,0 +1,160 @@
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+from application.api.controllers import agents as agent_control
+from application.extensions import DATABASE
+from application.models.agent import Agents
+from application.models.agent_friend_member import AgentFriendMembers
+from application.models.agent_group_member import AgentGroupMembers
+from application.models.friend import Friends
+from application.models.game_command import GameCommand
+from application.models.group import Groups
+from application.models.group_member import GroupMembers
+from application.models.server_operation import ServerOperation
+from application.models.user import UserSql
+
+
+def _create_user(session, name: str) -> UserSql:
+    user = UserSql()
+    user.username = name
+    user.email = f"{name}@test.com"
+    user.password = "password"
+
+    session.add(user)
+    session.commit()
+
+    return user
+
+
+def _create_data(session) -> tuple:
+    viewer = _create_user(session, "viewer")
+    friend = _create_user(session, "friend")
+    group_owner = _create_user(session, "group_owner")
+
+    session.add(Friends(initiator_id=viewer.user_id, receiver_id=friend.user_id))
+
+    group = Groups(name="test_group", owner_id=group_owner.user_id)
+    session.add(group)
+    session.commit()
+
+    session.add(GroupMembers(group_id=group.group_id, member_id=viewer.user_id))
+    session.commit()
+
+    return viewer, friend, group_owner, group
+
+
+def _add_shared_agents(session, viewer, friend, group_owner, group, count: int) -> None:
+    for index in range(count):
+        friend_agent = Agents(
+            name=f"friend_agent_{index}",
+            hostname="localhost",
+            ssl_public_cert="cert",
+            owner_id=friend.user_id,
+        )
+        group_agent = Agents(
+            name=f"group_agent_{index}",
+            hostname="localhost",
+            ssl_public_cert="cert",
+            owner_id=group_owner.user_id,
+        )
+        session.add_all([friend_agent, group_agent])
+        session.commit()
+
+        session.add(
+            AgentFriendMembers(agent_id=friend_agent.agent_id, friend_member_id=viewer.user_id)
+        )
+        session.add(
+            AgentFriendMembers(agent_id=friend_agent.agent_id, friend_member_id=group_owner.user_id)
+        )
+        session.add(
+            AgentGroupMembers(agent_id=group_agent.agent_id, group_member_id=group.group_id)
+        )
+        session.commit()
+
+
+def _count_queries(func) -> tuple:
+    statements = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(DATABASE.engine, "before_cursor_execute", _on_execute)
+    try:
+        result = func()
+    finally:
+        event.remove(DATABASE.engine, "before_cursor_execute", _on_execute)
+
+    return result, len(statements)
+
+
+class TestAgents:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_associated_agents_query_count(self, app, session, mocker):
+        viewer, friend, group_owner, group = _create_data(session)
+        mocker.patch.object(agent_control, "current_user", viewer)
+
+        _add_shared_agents(session, viewer, friend, group_owner, group, 1)
+        agents, small_count = _count_queries(agent_control.get_associated_agents)
+        assert len(agents) == 2
+
+        _add_shared_agents(session, viewer, friend, group_owner, group, 10)
+        agents, large_count = _count_queries(agent_control.get_associated_agents)
+        assert len(agents) == 22
+
+        for agent in agents:
+            is_friend_agent = agent["owner_id"] == friend.user_id
+            assert agent["num_users"] == (2 if is_friend_agent else 1)
+            assert agent["num_groups"] == (0 if is_friend_agent else 1)
+
+        assert small_count == large_count
+
+    def test_deactivate_agent_with_game_commands(self, app, session):
+        owner = _create_user(session, "deactivate_owner")
+        agent = Agents(
+            name="deactivate_agent",
+            hostname="localhost",
+            ssl_public_cert="cert",
+            owner_id=owner.user_id,
+        )
+        session.add(agent)
+        session.commit()
+
+        now = datetime.now(timezone.utc)
+        operation = ServerOperation(
+            agent_id=agent.agent_id,
+            server_name="Test Server",
+            operation_type="START",
+            state="COMPLETED",
+            created_at=now,
+            updated_at=now,
+        )
+        session.add(operation)
+        session.commit()
+
+        session.add(
+            GameCommand(
+                agent_id=agent.agent_id,
+                user_id=owner.user_id,
+                game_name="Test Server",
+                command_type="START",
+                status="COMPLETED",
+                operation_id=operation.operation_id,
+                created_at=now,
+                updated_at=now,
+            )
+        )
+        session.commit()
+
+        agent_id = agent.agent_id
+
+        assert agent_control.deactivate_agent(agent_id) is True
+        assert Agents.query.filter_by(agent_id=agent_id).first() is None
+        assert ServerOperation.query.filter_by(agent_id=agent_id).count() == 0
+        assert GameCommand.query.filter_by(agent_id=agent_id).count() == 0
@@ -0,0 +1,124 @@
+from datetime import datetime, timezone
+
+from application.common import game_commands
+from application.common.constants import GameCommandStates, GameCommandTypes
+from application.common.constants import ServerOperationStates, ServerOperationTypes
+from application.models.agent import Agents
+from application.models.game_command import GameCommand
+from application.models.server_operation import ServerOperation
+
+
+def _create_operation(session, agent: Agents) -> ServerOperation:
+    now = datetime.now(timezone.utc)
+
+    operation = ServerOperation(
+        agent_id=agent.agent_id,
+        server_name="Test Server",
+        operation_type=ServerOperationTypes.UPDATE.name,
+        state=ServerOperationStates.STOPPING.name,
+        created_at=now,
+        updated_at=now,
+    )
+    session.add(operation)
+    session.commit()
+
+    return operation
+
+
+class TestGameCommands:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_create_game_command(self, app, session, create_agent):
+        agent = create_agent("command_create")
+
+        command_id = game_commands.create_game_command(
+            agent.owner_id, agent.agent_id, "Test Server", GameCommandTypes.UPDATE
+        )
+
+        command = GameCommand.query.filter_by(command_id=command_id).first()
+        assert command.agent_id == agent.agent_id
+        assert command.user_id == agent.owner_id
+        assert command.command_type == GameCommandTypes.UPDATE.name
+        assert command.status == GameCommandStates.QUEUED.name
+        assert command.operation_id is None
+
+    def test_update_game_command(self, app, session, mocker, create_agent):
+        agent = create_agent("command_update")
+        operation = _create_operation(session, agent)
+        publish = mocker.patch.object(game_commands, "publish_command_changes")
+
+        command_id = game_commands.create_game_command(
+            agent.owner_id, agent.agent_id, "Test Server", GameCommandTypes.UPDATE
+        )
+
+        assert game_commands.update_game_command(
+            command_id, GameCommandStates.RUNNING, operation_id=operation.operation_id
+        )
+
+        command = GameCommand.query.filter_by(command_id=command_id).first()
+        assert command.status == GameCommandStates.RUNNING.name
+        assert command.operation_id == operation.operation_id
+
+        (command_infos,), _ = publish.call_args
+        assert len(command_infos) == 1
+        assert command_infos[0]["command_id"] == command_id
+        assert command_infos[0]["user_id"] == agent.owner_id
+        assert command_infos[0]["status"] == GameCommandStates.RUNNING.name
+
+    def test_update_missing_game_command(self, app, session, mocker):
+        publish = mocker.patch.object(game_commands, "publish_command_changes")
+
+        assert game_commands.update_game_command(-1, GameCommandStates.FAILED) is False
+        publish.assert_not_called()
+
+    def test_track_operation(self, app, session, create_agent):
+        agent = create_agent("command_track")
+        operation = _create_operation(session, agent)
+
+        command_id = game_commands.create_game_command(
+            agent.owner_id, agent.agent_id, "Test Server", GameCommandTypes.UPDATE
+        )
+        game_commands.update_game_command(
+            command_id, GameCommandStates.RUNNING, operation_id=operation.operation_id
+        )
+
+        expected_statuses = [
+            (ServerOperationStates.WAITING_FOR_UPDATE, GameCommandStates.RUNNING),
+            (ServerOperationStates.COMPLETED, GameCommandStates.COMPLETED),
+            (ServerOperationStates.FAILED, GameCommandStates.FAILED),
+        ]
+
+        for operation_state, command_status in expected_statuses:
+            operation.state = operation_state.name
+            operation.message = operation_state.name.lower()
+
+            command_infos = game_commands.track_operation(operation)
+            session.commit()
+
+            command = GameCommand.query.filter_by(command_id=command_id).first()
+            assert command.status == command_status.name
+            assert command.message == operation.message
+
+            assert len(command_infos) == 1
+            assert command_infos[0]["status"] == command_status.name
+            assert command_infos[0]["progress"] == operation_state.name
+
+    def test_get_command_info_only_for_its_user(self, app, session, create_agent):
+        agent = create_agent("command_info")
+        other_user = create_agent("command_info_other").owner_id
+
+        command_id = game_commands.create_game_command(
+            agent.owner_id, agent.agent_id, "Test Server", GameCommandTypes.STARTUP
+        )
+
+        command_info = game_commands.get_command_info(command_id, agent.owner_id)
+
+        assert command_info["command_id"] == command_id
+        assert command_info["status"] == GameCommandStates.QUEUED.name
+        assert game_commands.get_command_info(command_id, other_user) is None
@@ -0,0 +1,163 @@
+from application.common import game_commands, operator_pool
+from application.common.constants import GameCommandStates, GameCommandTypes
+from application.common.constants import ServerOperationStates, ServerOperationTypes
+from application.models.agent import Agents
+from application.models.game_command import GameCommand
+from application.models.server_operation import ServerOperation
+from application.workers import game_server_control, monitor_server_utils
+from application.workers.server_operations import advance_server_operation
+
+SERVER_NAME = "Test Server"
+
+
+def _create_command(agent: Agents, command_type: GameCommandTypes) -> int:
+    return game_commands.create_game_command(
+        agent.owner_id, agent.agent_id, SERVER_NAME, command_type
+    )
+
+
+def _patch_tasks(mocker) -> None:
+    mocker.patch.object(advance_server_operation, "apply_async")
+    mocker.patch.object(operator_pool, "get_agent_client", return_value=mocker.Mock())
+
+    for task in [
+        game_server_control.startup_game_server,
+        game_server_control.shutdown_game_server,
+        game_server_control.restart_game_server,
+        game_server_control.update_game_server,
+    ]:
+        mocker.patch.object(task, "update_state")
+
+
+class TestGameServerControl:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_restart_runs_operation_for_command(self, app, session, mocker, create_agent):
+        agent = create_agent("control_restart")
+        command_id = _create_command(agent, GameCommandTypes.RESTART)
+        _patch_tasks(mocker)
+
+        result = game_server_control.restart_game_server.run(
+            agent.agent_id, SERVER_NAME, command_id
+        )
+
+        operation = ServerOperation.query.filter_by(operation_id=result["operation_id"]).first()
+        command = GameCommand.query.filter_by(command_id=command_id).first()
+
+        assert operation.operation_type == ServerOperationTypes.RESTART.name
+        assert operation.state == ServerOperationStates.STOPPING.name
+        assert command.status == GameCommandStates.RUNNING.name
+        assert command.operation_id == operation.operation_id
+
+    def test_busy_server_fails_command(self, app, session, mocker, create_agent):
+        agent = create_agent("control_busy")
+        _patch_tasks(mocker)
+
+        game_server_control.startup_game_server.run(
+            agent.agent_id, SERVER_NAME, _create_command(agent, GameCommandTypes.STARTUP)
+        )
+
+        command_id = _create_command(agent, GameCommandTypes.SHUTDOWN)
+        result = game_server_control.shutdown_game_server.run(
+            agent.agent_id, SERVER_NAME, command_id
+        )
+
+        command = GameCommand.query.filter_by(command_id=command_id).first()
+
+        assert "operation_id" not in result
+        assert command.status == GameCommandStates.FAILED.name
+        assert command.message == f"{SERVER_NAME} is busy with another operation."
+
+    def test_update_starts_server_only_if_it_was_running(self, app, session, mocker, create_agent):
+        _patch_tasks(mocker)
+
+        for is_running in [True, False]:
+            agent = create_agent(f"control_update_{is_running}")
+            mocker.patch.object(monitor_server_utils, "_is_running", return_value=is_running)
+
+            result = game_server_control.update_game_server.run(
+                agent.agent_id, SERVER_NAME, _create_command(agent, GameCommandTypes.UPDATE)
+            )
+
+            operation = ServerOperation.query.filter_by(operation_id=result["operation_id"]).first()
+
+            assert operation.operation_type == ServerOperationTypes.UPDATE.name
+            assert operation.start_after is is_running
+
+    def test_update_fails_command_when_agent_unreachable(self, app, session, mocker, create_agent):
+        agent = create_agent("control_update_unreachable")
+        command_id = _create_command(agent, GameCommandTypes.UPDATE)
+        _patch_tasks(mocker)
+        mocker.patch.object(
+            monitor_server_utils, "_is_running", side_effect=Exception("Agent unreachable")
+        )
+
+        game_server_control.update_game_server.run(agent.agent_id, SERVER_NAME, command_id)
+
+        command = GameCommand.query.filter_by(command_id=command_id).first()
+
+        assert command.status == GameCommandStates.FAILED.name
+        assert command.message == "Could not contact agent."
+        assert ServerOperation.query.filter_by(agent_id=agent.agent_id).count() == 0
+
+    def test_update_stops_updates_and_restarts_running_server(
+        self, app, session, mocker, create_agent
+    ):
+        agent = create_agent("control_update_running")
+        command_id = _create_command(agent, GameCommandTypes.UPDATE)
+        _patch_tasks(mocker)
+        mocker.patch.object(advance_server_operation, "update_state")
+        dispatch = advance_server_operation.apply_async
+
+        # Running when the update is asked for, stopped once shut down, running once started.
+        is_running = mocker.patch.object(
+            monitor_server_utils, "_is_running", side_effect=[True, True, False, False, True]
+        )
+        shutdown = mocker.patch.object(monitor_server_utils, "_issue_shutdown")
+        begin_update = mocker.patch.object(
+            monitor_server_utils, "_begin_server_update", return_value=1234
+        )
+        mocker.patch.object(monitor_server_utils, "_is_update_running", return_value=False)
+        mocker.patch.object(monitor_server_utils, "_finish_server_update", return_value=True)
+        startup = mocker.patch.object(monitor_server_utils, "_issue_startup")
+
+        game_server_control.update_game_server.run(agent.agent_id, SERVER_NAME, command_id)
+
+        for _ in range(10):
+            command = GameCommand.query.filter_by(command_id=command_id).first()
+            if command.status == GameCommandStates.COMPLETED.name:
+                break
+            args, _ = dispatch.call_args
+            advance_server_operation.run(*args[0])
+            session.expire_all()
+
+        assert command.status == GameCommandStates.COMPLETED.name
+        shutdown.assert_called_once()
+        begin_update.assert_called_once()
+        startup.assert_called_once()
+        assert is_running.call_count == 5
+
+    def test_update_uses_configured_verbose(self, app, session, mocker, create_agent):
+        agent = create_agent("control_update_verbose")
+        get_agent_client = operator_pool.get_agent_client
+        _patch_tasks(mocker)
+        get_client = mocker.patch.object(operator_pool, "get_client")
+        mocker.patch.object(operator_pool, "get_agent_client", wraps=get_agent_client)
+        mocker.patch.object(monitor_server_utils, "_is_running", return_value=False)
+
+        app.config["OPERATOR_CLIENT_VERBOSE"] = True
+        try:
+            game_server_control.update_game_server.run(
+                agent.agent_id, SERVER_NAME, _create_command(agent, GameCommandTypes.UPDATE)
+            )
+        finally:
+            app.config["OPERATOR_CLIENT_VERBOSE"] = False
+
+        args, _ = get_client.call_args
+        assert args[2] is True
@@ -0,0 +1,87 @@
+from datetime import datetime, timezone, timedelta
+from sqlalchemy.dialects import mysql
+
+from application.common import constants
+from application.models.agent import Agents
+from application.models.monitor import Monitor
+from application.workers import monitor_scheduler
+from application.workers.monitor_scheduler import dispatch_due_monitors, run_monitor_batch
+
+
+def _create_monitor(session, agent: Agents, next_check: datetime, active: bool = True):
+    monitor = Monitor(
+        agent_id=agent.agent_id,
+        monitor_type=constants.monitor_type_to_string(constants.MonitorTypes.AGENT),
+        active=active,
+        next_check=next_check,
+    )
+    session.add(monitor)
+    session.commit()
+
+    return monitor
+
+
+def _get_dispatched(dispatch) -> dict:
+    dispatched = {}
+
+    for args, _ in dispatch.call_args_list:
+        monitor_ids, generations = args[0]
+        dispatched.update(zip(monitor_ids, generations))
+
+    return dispatched
+
+
+class TestMonitorScheduler:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_dispatch_leases_due_monitors(self, app, session, mocker, create_agent):
+        agent = create_agent("scheduler_owner")
+        now = datetime.now(timezone.utc)
+
+        due = _create_monitor(session, agent, now - timedelta(minutes=1))
+        not_due = _create_monitor(session, agent, now + timedelta(hours=1))
+        inactive = _create_monitor(session, agent, now - timedelta(minutes=1), active=False)
+        generation = due.generation
+
+        mocker.patch.object(dispatch_due_monitors, "update_state")
+        dispatch = mocker.patch.object(run_monitor_batch, "apply_async")
+
+        dispatch_due_monitors.run()
+        session.expire_all()
+
+        dispatched = _get_dispatched(dispatch)
+
+        assert dispatched[due.monitor_id] == generation + 1
+        assert not_due.monitor_id not in dispatched
+        assert inactive.monitor_id not in dispatched
+
+        assert due.generation == generation + 1
+        lease_expiry = now + timedelta(seconds=constants.MONITOR_LEASE_SECONDS)
+        assert due.next_check.replace(tzinfo=timezone.utc) >= lease_expiry
+        assert not_due.generation == generation
+
+    def test_leased_monitor_not_dispatched_again(self, app, session, mocker, create_agent):
+        agent = create_agent("scheduler_lease_owner")
+        due = _create_monitor(session, agent, datetime.now(timezone.utc) - timedelta(minutes=1))
+
+        mocker.patch.object(dispatch_due_monitors, "update_state")
+        dispatch = mocker.patch.object(run_monitor_batch, "apply_async")
+
+        dispatch_due_monitors.run()
+        assert due.monitor_id in _get_dispatched(dispatch)
+
+        dispatch.reset_mock()
+        dispatch_due_monitors.run()
+        assert due.monitor_id not in _get_dispatched(dispatch)
+
+    def test_due_monitors_locked_until_leased(self, app, session):
+        query = monitor_scheduler._get_due_monitors_query(datetime.now(timezone.utc), 10)
+        statement = str(query.statement.compile(dialect=mysql.dialect()))
+
+        assert statement.endswith("FOR UPDATE SKIP LOCKED")
@@ -0,0 +1,236 @@
+from datetime import datetime, timezone
+from sqlalchemy import event
+
+from application.api.controllers import monitor_attributes
+from application.common import constants
+from application.extensions import DATABASE
+from application.models.agent import Agents
+from application.models.monitor import Monitor
+from application.models.monitor_fault import MonitorFault
+from application.workers import monitor_health, monitor_utils
+from application.workers.monitor_batch import run_monitor_batch
+
+
+def _create_monitor(session, agent: Agents, monitor_type: constants.MonitorTypes, **kwargs):
+    monitor = Monitor(
+        agent_id=agent.agent_id,
+        monitor_type=constants.monitor_type_to_string(monitor_type),
+        active=True,
+        next_check=datetime.now(timezone.utc),
+        **kwargs,
+    )
+    session.add(monitor)
+    session.commit()
+
+    return monitor
+
+
+def _add_fault(session, monitor: Monitor, fault_description: str) -> None:
+    session.add(
+        MonitorFault(
+            monitor_id=monitor.monitor_id,
+            fault_time=datetime.now(timezone.utc),
+            fault_description=fault_description,
+            active=True,
+        )
+    )
+    session.commit()
+
+
+def _get_batch_args(monitors: list) -> list:
+    return [
+        [monitor.monitor_id for monitor in monitors],
+        [monitor.generation for monitor in monitors],
+    ]
+
+
+def _run_batch(session, mocker, monitors: list, count_selects: bool = False) -> int:
+    # There is no result backend to report the task state to.
+    mocker.patch.object(run_monitor_batch, "update_state")
+
+    batch_args = _get_batch_args(monitors)
+    statements = []
+
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    if count_selects:
+        event.listen(DATABASE.engine, "before_cursor_execute", _on_execute)
+    try:
+        run_monitor_batch.run(*batch_args)
+    finally:
+        if count_selects:
+            event.remove(DATABASE.engine, "before_cursor_execute", _on_execute)
+
+    session.expire_all()
+    return len(statements)
+
+
+class TestMonitors:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_agent_monitor_with_existing_fault_stops(self, app, session, mocker, create_agent):
+        agent = create_agent("agent_fault_owner")
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.AGENT)
+        _add_fault(session, monitor, "Health Check Failed")
+
+        mocker.patch.object(
+            monitor_health, "probe_agents_health", return_value={agent.agent_id: "green"}
+        )
+
+        _run_batch(session, mocker, [monitor])
+
+        assert monitor.active is False
+        assert monitor.next_check is None
+
+    def test_server_monitor_with_agent_fault_stops(self, app, session, mocker, create_agent):
+        agent = create_agent("server_fault_owner")
+        _create_monitor(session, agent, constants.MonitorTypes.AGENT, has_fault=True)
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.DEDICATED_SERVER)
+        _add_fault(
+            session, monitor, "Agent Health Monitor has detected a fault. Disabling this monitor."
+        )
+
+        mocker.patch.object(monitor_health, "probe_agents_health", return_value={})
+
+        _run_batch(session, mocker, [monitor])
+
+        assert monitor.active is False
+        assert monitor.next_check is None
+
+    def test_batch_select_count_is_constant(self, app, session, mocker, create_agent):
+        def _create_healthy_monitors(prefix: str, count: int) -> list:
+            monitors = []
+            for index in range(count):
+                agent = create_agent(f"{prefix}_{index}")
+                monitors.append(_create_monitor(session, agent, constants.MonitorTypes.AGENT))
+            return monitors
+
+        small_batch = _create_healthy_monitors("small_batch", 2)
+        large_batch = _create_healthy_monitors("large_batch", 10)
+
+        mocker.patch.object(
+            monitor_health,
+            "probe_agents_health",
+            side_effect=lambda agents: {agent.agent_id: "green" for agent in agents},
+        )
+
+        small_count = _run_batch(session, mocker, small_batch, count_selects=True)
+        large_count = _run_batch(session, mocker, large_batch, count_selects=True)
+
+        assert small_count == large_count
+
+        for monitor in small_batch + large_batch:
+            assert monitor.active is True
+            assert monitor.last_check is not None
+            assert monitor.next_check > monitor.last_check
+
+    def test_state_update_dropped_after_generation_change(self, app, session, create_agent):
+        agent = create_agent("generation_owner")
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.AGENT)
+        next_check = monitor.next_check
+
+        state = monitor_utils.MonitorStateUpdate(monitor, is_testing=False)
+        state.add_fault_and_disable("Health Check Failed")
+
+        # The user resets the monitor while the run is in flight.
+        monitor.generation += 1
+        session.commit()
+
+        state.commit()
+        session.expire_all()
+
+        assert monitor.active is True
+        assert monitor.has_fault is False
+        assert monitor.next_check == next_check
+        assert MonitorFault.query.filter_by(monitor_id=monitor.monitor_id).count() == 0
+
+    def test_failed_state_update_does_not_drop_others(self, app, session, mocker, create_agent):
+        good_monitor = _create_monitor(
+            session, create_agent("fallback_good"), constants.MonitorTypes.AGENT
+        )
+        bad_monitor = _create_monitor(
+            session, create_agent("fallback_bad"), constants.MonitorTypes.AGENT
+        )
+
+        batch = {"state_updates": {}}
+        for monitor in [bad_monitor, good_monitor]:
+            state = monitor_utils.MonitorStateUpdate(monitor, is_testing=False)
+            state.set_fault_flag(True)
+            batch["state_updates"][monitor.monitor_id] = state
+
+        mocker.patch.object(
+            batch["state_updates"][bad_monitor.monitor_id],
+            "stage",
+            side_effect=Exception("Lost connection"),
+        )
+        log_error = mocker.patch.object(monitor_utils.logger, "error")
+
+        monitor_utils.commit_state_updates(batch)
+        session.expire_all()
+
+        assert good_monitor.has_fault is True
+        assert bad_monitor.has_fault is False
+        assert any(str(bad_monitor.monitor_id) in str(call) for call in log_error.call_args_list)
+
+    def test_superseded_run_does_not_probe_agent(self, app, session, mocker, create_agent):
+        agent = create_agent("superseded_owner")
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.AGENT)
+        batch_args = _get_batch_args([monitor])
+
+        # The scheduler dispatches a newer run before this one starts.
+        monitor.generation += 1
+        session.commit()
+
+        mocker.patch.object(run_monitor_batch, "update_state")
+        probe = mocker.patch.object(monitor_health, "probe_agents_health", return_value={})
+
+        result = run_monitor_batch.run(*batch_args)
+
+        probe.assert_called_once_with([])
+        assert result["results"][monitor.monitor_id] == {"status": "Generation Mismatch."}
+
+    def test_attributes_loaded_once(self, app, session, create_agent):
+        agent = create_agent("attributes_owner")
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.DEDICATED_SERVER)
+        statements = []
+
+        def _on_execute(conn, cursor, statement, parameters, context, executemany):
+            if "monitor_attributes" in statement:
+                statements.append(statement)
+
+        event.listen(DATABASE.engine, "before_cursor_execute", _on_execute)
+        try:
+            for _ in range(3):
+                assert monitor.attributes == {}
+        finally:
+            event.remove(DATABASE.engine, "before_cursor_execute", _on_execute)
+
+        assert len(statements) == 1
+
+    def test_attribute_changes_invalidate_cache(self, app, session, create_agent):
+        agent = create_agent("attributes_change_owner")
+        monitor = _create_monitor(session, agent, constants.MonitorTypes.DEDICATED_SERVER)
+        monitor_type = monitor.monitor_type
+        payload = {"attribute_name": "server_auto_restart", "attribute_value": "true"}
+
+        assert monitor.attributes == {}
+
+        assert monitor_attributes.attach_attribute_to_monitor(agent.agent_id, monitor_type, payload)
+        assert monitor.attributes == {"server_auto_restart": "true"}
+
+        payload["attribute_value"] = "false"
+        assert monitor_attributes.update_monitor_attribute(agent.agent_id, monitor_type, payload)
+        assert monitor.attributes == {"server_auto_restart": "false"}
+
+        assert monitor_attributes.remove_attribute_from_monitor(
+            agent.agent_id, monitor_type, payload
+        )
+        assert monitor.attributes == {}
@@ -0,0 +1,83 @@
+from application.common import constants, property_cache, ttl_cache
+from application.models.default_property import DefaultProperty
+from application.models.property import Property
+from application.models.user import UserSql
+
+
+def _create_user_with_hour_format(session, name: str, hour_format: str) -> UserSql:
+    user = UserSql()
+    user.username = name
+    user.email = f"{name}@test.com"
+    user.password = "password"
+
+    session.add(user)
+    session.commit()
+
+    default_property = DefaultProperty.query.filter_by(property_name="USER_HOUR_FORMAT").first()
+    session.add(
+        Property(
+            user_id=user.user_id,
+            default_property_id=default_property.default_property_id,
+            property_value=hour_format,
+        )
+    )
+    session.commit()
+
+    return user
+
+
+class TestPropertyCache:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_edit_by_other_process_is_picked_up(self, app, session, mocker):
+        now = [1000.0]
+        mocker.patch.object(ttl_cache.time, "monotonic", side_effect=lambda: now[0])
+
+        user = _create_user_with_hour_format(session, "property_cache_edit", "12")
+        property_cache.invalidate(user.user_id)
+
+        assert user.properties["USER_HOUR_FORMAT"] == "12"
+
+        # Another process edits the property. Nothing invalidates this process' cache.
+        Property.query.filter_by(user_id=user.user_id).update({"property_value": "24"})
+        session.commit()
+
+        assert user.properties["USER_HOUR_FORMAT"] == "12"
+
+        now[0] += constants.USER_PROPERTIES_CACHE_CHECK_SECONDS + 1
+        assert user.properties["USER_HOUR_FORMAT"] == "24"
+
+    def test_delete_by_other_process_is_picked_up(self, app, session, mocker):
+        now = [1000.0]
+        mocker.patch.object(ttl_cache.time, "monotonic", side_effect=lambda: now[0])
+
+        user = _create_user_with_hour_format(session, "property_cache_delete", "12")
+        property_cache.invalidate(user.user_id)
+
+        assert "USER_HOUR_FORMAT" in user.properties
+
+        Property.query.filter_by(user_id=user.user_id).delete()
+        session.commit()
+
+        now[0] += constants.USER_PROPERTIES_CACHE_CHECK_SECONDS + 1
+        assert "USER_HOUR_FORMAT" not in user.properties
+
+    def test_unchanged_properties_are_not_reloaded(self, app, session, mocker):
+        now = [1000.0]
+        mocker.patch.object(ttl_cache.time, "monotonic", side_effect=lambda: now[0])
+
+        user = _create_user_with_hour_format(session, "property_cache_unchanged", "12")
+        property_cache.invalidate(user.user_id)
+        load_properties = mocker.spy(user, "_load_properties")
+
+        user.properties
+        now[0] += constants.USER_PROPERTIES_CACHE_CHECK_SECONDS + 1
+        user.properties
+
+        assert load_properties.call_count == 1
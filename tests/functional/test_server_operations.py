@@ -0,0 +1,339 @@
+from datetime import datetime, timezone, timedelta
+
+from application.common import constants, operator_pool
+from application.common.constants import ServerOperationStates, ServerOperationTypes
+from application.models.agent import Agents
+from application.models.server_operation import ServerOperation
+from application.workers import monitor_constants, monitor_server_utils, server_operations
+from application.workers.server_operations import advance_server_operation
+
+SERVER_NAME = "Test Server"
+
+
+def _patch_agent(mocker, **agent_calls) -> dict:
+    """
+    Stand in for the agent. Each keyword names a monitor_server_utils call and gives its
+    return_value, or a list to use as its side_effect.
+    """
+    mocker.patch.object(operator_pool, "get_agent_client", return_value=mocker.Mock())
+    mocker.patch.object(advance_server_operation, "update_state")
+
+    mocks = {"dispatch": mocker.patch.object(advance_server_operation, "apply_async")}
+
+    for name in [
+        "_is_running",
+        "_issue_shutdown",
+        "_issue_startup",
+        "_begin_server_update",
+        "_is_update_running",
+        "_finish_server_update",
+    ]:
+        value = agent_calls.get(name)
+        if isinstance(value, list):
+            mocks[name] = mocker.patch.object(monitor_server_utils, name, side_effect=value)
+        else:
+            mocks[name] = mocker.patch.object(monitor_server_utils, name, return_value=value)
+
+    return mocks
+
+
+def _run_until_finished(session, dispatch, operation_id: int, max_steps: int = 50):
+    for _ in range(max_steps):
+        operation = ServerOperation.query.filter_by(operation_id=operation_id).first()
+
+        if operation.state in server_operations._FINISHED_STATES:
+            return operation
+
+        args, _ = dispatch.call_args
+        advance_server_operation.run(*args[0])
+        session.expire_all()
+
+    raise AssertionError(f"Server Operation {operation_id} did not finish.")
+
+
+def _create_stalled_operation(session, agent: Agents, state: ServerOperationStates, **kwargs):
+    stalled_at = datetime.now(timezone.utc) - timedelta(
+        seconds=constants.SERVER_OPERATION_STALL_SECONDS + 60
+    )
+
+    operation = ServerOperation(
+        agent_id=agent.agent_id,
+        server_name=SERVER_NAME,
+        operation_type=ServerOperationTypes.UPDATE.name,
+        state=state.name,
+        step=1,
+        attempts=0,
+        start_after=False,
+        created_at=stalled_at,
+        updated_at=stalled_at,
+        **kwargs,
+    )
+    session.add(operation)
+    session.commit()
+
+    return operation
+
+
+class TestServerOperations:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_start(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_start")
+        mocks = _patch_agent(mocker, _is_running=[False, True])
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        assert operation.message == "Server running."
+        mocks["_issue_startup"].assert_called_once()
+        mocks["_issue_shutdown"].assert_not_called()
+
+    def test_stop_when_already_stopped(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_stop")
+        mocks = _patch_agent(mocker, _is_running=False)
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.STOP
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        assert operation.message == "Server stopped."
+        mocks["_issue_shutdown"].assert_not_called()
+
+    def test_restart(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_restart")
+        mocks = _patch_agent(mocker, _is_running=[True, False, False, True])
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.RESTART
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        mocks["_issue_shutdown"].assert_called_once()
+        mocks["_issue_startup"].assert_called_once()
+
+    def test_update_and_start(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_update_start")
+        mocks = _patch_agent(
+            mocker,
+            _is_running=[False, False, True],
+            _begin_server_update=1234,
+            _is_update_running=[True, False],
+            _finish_server_update=True,
+        )
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.UPDATE, start_after=True
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        assert operation.message == "Server running."
+        assert operation.thread_ident == 1234
+        mocks["_begin_server_update"].assert_called_once()
+        assert mocks["_is_update_running"].call_count == 2
+        mocks["_finish_server_update"].assert_called_once()
+        mocks["_issue_startup"].assert_called_once()
+
+    def test_update_without_start(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_update_only")
+        mocks = _patch_agent(
+            mocker,
+            _is_running=False,
+            _begin_server_update=1234,
+            _is_update_running=False,
+            _finish_server_update=True,
+        )
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.UPDATE, start_after=False
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        assert operation.message == "Server updated."
+        mocks["_issue_startup"].assert_not_called()
+
+    def test_update_fails_when_build_not_recorded(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_update_fail")
+        mocks = _patch_agent(
+            mocker,
+            _is_running=False,
+            _begin_server_update=1234,
+            _is_update_running=False,
+            _finish_server_update=False,
+        )
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.UPDATE, start_after=True
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.FAILED.name
+        assert operation.message == "Server update failed."
+        mocks["_issue_startup"].assert_not_called()
+
+    def test_update_fails_when_it_runs_too_long(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_update_timeout")
+        mocks = _patch_agent(
+            mocker, _is_running=False, _begin_server_update=1234, _is_update_running=True
+        )
+        max_polls = monitor_constants.UPDATE_MAX_WAIT_TIME // monitor_constants.UPDATE_POLL_TIME
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.UPDATE
+        )
+        operation = _run_until_finished(
+            session, mocks["dispatch"], operation_id, max_steps=max_polls + 10
+        )
+
+        assert operation.state == ServerOperationStates.FAILED.name
+        assert operation.message == "Server update did not finish."
+        mocks["_finish_server_update"].assert_not_called()
+
+    def test_start_fails_after_retries(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_start_fail")
+        mocks = _patch_agent(mocker, _is_running=False)
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.FAILED.name
+        assert operation.message == "Server failed to start."
+        assert mocks["_issue_startup"].call_count == monitor_constants.MAX_COMMAND_RETRIES + 1
+
+    def test_stop_fails_after_retries(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_stop_fail")
+        mocks = _patch_agent(mocker, _is_running=True)
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.STOP
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.FAILED.name
+        assert operation.message == "Server failed to stop."
+        assert mocks["_issue_shutdown"].call_count == monitor_constants.MAX_COMMAND_RETRIES + 1
+
+    def test_agent_error_fails_operation(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_agent_error")
+        mocks = _patch_agent(mocker, _is_running=[Exception("Agent unreachable")])
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        operation = _run_until_finished(session, mocks["dispatch"], operation_id)
+
+        assert operation.state == ServerOperationStates.FAILED.name
+        assert operation.message == "STARTING failed."
+
+    def test_stale_step_is_skipped(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_stale")
+        mocks = _patch_agent(mocker, _is_running=False)
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        args, _ = mocks["dispatch"].call_args
+        _, step = args[0]
+
+        result = advance_server_operation.run(operation_id, step - 1)
+
+        assert result == {"status": "Stale step."}
+        mocks["_is_running"].assert_not_called()
+
+    def test_same_step_is_taken_once(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_same_step")
+        mocks = _patch_agent(mocker, _is_running=False)
+
+        server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        args, _ = mocks["dispatch"].call_args
+
+        # The sweep resent the step, and the step it thought was lost turned up too.
+        first_result = advance_server_operation.run(*args[0])
+        second_result = advance_server_operation.run(*args[0])
+
+        assert first_result == {"status": "Step Completed!"}
+        assert second_result == {"status": "Stale step."}
+        mocks["_issue_startup"].assert_called_once()
+
+    def test_step_claimed_once(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_claim")
+        _patch_agent(mocker)
+
+        operation_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+
+        # Both workers loaded the operation before either took the step.
+        assert server_operations._claim_step(operation_id, 0) is True
+        assert server_operations._claim_step(operation_id, 0) is False
+        assert ServerOperation.query.filter_by(operation_id=operation_id).first().step == 1
+
+    def test_one_operation_per_server(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_one_per_server")
+        _patch_agent(mocker)
+
+        first_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.START
+        )
+        second_id = server_operations.create_server_operation(
+            agent.agent_id, SERVER_NAME, ServerOperationTypes.STOP
+        )
+
+        assert first_id is not None
+        assert second_id is None
+        assert ServerOperation.query.filter_by(agent_id=agent.agent_id).count() == 1
+
+    def test_sweep_resumes_stalled_operation(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_sweep")
+        mocks = _patch_agent(mocker, _is_running=False)
+        mocker.patch.object(server_operations.resume_stalled_server_operations, "update_state")
+
+        stalled = _create_stalled_operation(session, agent, ServerOperationStates.STARTING)
+        recent_id = server_operations.create_server_operation(
+            agent.agent_id, "Recent Server", ServerOperationTypes.START
+        )
+        mocks["dispatch"].reset_mock()
+
+        server_operations.resume_stalled_server_operations.run()
+        session.expire_all()
+
+        mocks["dispatch"].assert_called_once_with([stalled.operation_id, 1], countdown=0)
+        assert stalled.state == ServerOperationStates.STARTING.name
+        assert stalled.step == 1
+        assert ServerOperation.query.filter_by(operation_id=recent_id).first().step == 0
+
+    def test_sweep_does_not_request_update_twice(self, app, session, mocker, create_agent):
+        agent = create_agent("operation_sweep_update")
+        mocks = _patch_agent(mocker, _is_update_running=False, _finish_server_update=True)
+        mocker.patch.object(server_operations.resume_stalled_server_operations, "update_state")
+
+        stalled = _create_stalled_operation(session, agent, ServerOperationStates.UPDATING)
+
+        server_operations.resume_stalled_server_operations.run()
+        session.expire_all()
+
+        assert stalled.state == ServerOperationStates.WAITING_FOR_UPDATE.name
+
+        operation = _run_until_finished(session, mocks["dispatch"], stalled.operation_id)
+
+        assert operation.state == ServerOperationStates.COMPLETED.name
+        mocks["_begin_server_update"].assert_not_called()
+        mocks["_is_update_running"].assert_not_called()
+        mocks["_finish_server_update"].assert_called_once()
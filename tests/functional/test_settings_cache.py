@@ -0,0 +1,44 @@
+from application.common import constants, settings_cache, ttl_cache
+from application.models.setting import SettingsSql
+
+
+class TestSettingsCache:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_edit_by_other_process_is_picked_up(self, app, db, session, mocker):
+        now = [1000.0]
+        mocker.patch.object(ttl_cache.time, "monotonic", side_effect=lambda: now[0])
+
+        settings_cache.invalidate()
+        app_name = settings_cache.get_setting("APP_NAME")
+
+        # Another process edits the setting. Nothing invalidates this process' cache.
+        setting_query = SettingsSql.query.filter_by(name="APP_NAME")
+        setting_query.update({"value": "RenamedArchitect"})
+        session.commit()
+
+        try:
+            assert settings_cache.get_setting("APP_NAME") == app_name
+
+            now[0] += constants.SETTINGS_CACHE_CHECK_SECONDS + 1
+            assert settings_cache.get_setting("APP_NAME") == "RenamedArchitect"
+        finally:
+            setting_query.update({"value": app_name})
+            session.commit()
+            settings_cache.invalidate()
+
+    def test_unchanged_settings_are_not_reloaded(self, app, db, session, mocker):
+        now = [1000.0]
+        mocker.patch.object(ttl_cache.time, "monotonic", side_effect=lambda: now[0])
+
+        settings_cache.invalidate()
+        settings = settings_cache.get_settings()
+
+        now[0] += constants.SETTINGS_CACHE_CHECK_SECONDS + 1
+        assert settings_cache.get_settings() is settings
@@ -0,0 +1,56 @@
+import boto3
+
+from botocore.stub import Stubber
+
+from application.workers import email
+
+
+def _create_ses_client():
+    return boto3.client(
+        "ses",
+        region_name="us-east-1",
+        aws_access_key_id="testing",
+        aws_secret_access_key="testing",
+    )
+
+
+class TestEmail:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_chunk_recipients(self):
+        recipients = [f"user{index}@test.com" for index in range(120)]
+        batches = email._chunk_recipients(recipients, 50)
+
+        assert [len(batch) for batch in batches] == [50, 50, 20]
+        assert sum(batches, []) == recipients
+
+    def test_send_batches(self):
+        ses = _create_ses_client()
+        recipients = [f"user{index}@test.com" for index in range(120)]
+
+        with Stubber(ses) as stubber:
+            for _ in range(3):
+                stubber.add_response("send_email", {"MessageId": "test"})
+
+            assert email._send_batches(
+                ses, "sender@test.com", "subject", recipients, "html", "", "BccAddresses"
+            )
+
+            stubber.assert_no_pending_responses()
+
+    def test_send_batches_error(self):
+        ses = _create_ses_client()
+        recipients = ["user@test.com"]
+
+        with Stubber(ses) as stubber:
+            stubber.add_client_error("send_email", "MessageRejected", "Rejected")
+
+            assert not email._send_batches(
+                ses, "sender@test.com", "subject", recipients, "html", "", "ToAddresses"
+            )
@@ -0,0 +1,35 @@
+from datetime import datetime
+
+from application.common import message_count_cache
+
+
+class TestMessageCountCache:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_count_keyed_by_read_time(self):
+        read_time = datetime(2024, 1, 1)
+
+        message_count_cache.put(1, message_count_cache.DIRECT, read_time, 3)
+
+        assert message_count_cache.get(1, message_count_cache.DIRECT, read_time) == 3
+        assert message_count_cache.get(1, message_count_cache.DIRECT, datetime(2024, 1, 2)) is None
+        assert message_count_cache.get(1, message_count_cache.GLOBAL, read_time) is None
+
+    def test_reset_and_invalidate_global(self):
+        read_time = datetime(2024, 1, 1)
+
+        message_count_cache.put(2, message_count_cache.GLOBAL, read_time, 5)
+        message_count_cache.invalidate_global()
+
+        assert message_count_cache.get(2, message_count_cache.GLOBAL, read_time) is None
+
+        message_count_cache.reset(2, read_time)
+
+        assert message_count_cache.get(2, message_count_cache.DIRECT, read_time) == 0
+        assert message_count_cache.get(2, message_count_cache.GLOBAL, read_time) == 0
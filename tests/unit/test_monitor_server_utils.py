@@ -0,0 +1,37 @@
+from application.workers import monitor_server_utils
+
+
+class _Games:
+    def get_games_status(self):
+        raise Exception("Not Found")
+
+    def check_for_updates(self):
+        return {"my_server": {"update_required": False}}
+
+
+class _Client:
+    game = _Games()
+
+
+class TestMonitorServerUtils:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_bulk_support_tracked_per_call(self):
+        client = _Client()
+        agent_id = 1
+
+        monitor_server_utils._BULK_UNSUPPORTED.clear()
+
+        assert monitor_server_utils._call_bulk(client, agent_id, "get_games_status") is None
+        assert monitor_server_utils._call_bulk(client, agent_id, "check_for_updates") == {
+            "my_server": {"update_required": False}
+        }
+
+        assert (agent_id, "get_games_status") in monitor_server_utils._BULK_UNSUPPORTED
+        assert (agent_id, "check_for_updates") not in monitor_server_utils._BULK_UNSUPPORTED
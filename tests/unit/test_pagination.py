@@ -1,5 +1,34 @@
 import pytest
-from application.common.pagination import Pagination, PaginatedApi
+import sqlalchemy as db
+
+from datetime import datetime, timedelta
+from sqlalchemy.orm import Session, declarative_base
+
+from application.common.pagination import KeysetPagination, Pagination, PaginatedApi
+
+Base = declarative_base()
+
+
+class LogRow(Base):
+    __tablename__ = "log_rows"
+
+    log_id = db.Column(db.Integer, primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)
+
+
+def _create_session(num_rows: int) -> Session:
+    engine = db.create_engine("sqlite:///:memory:")
+    Base.metadata.create_all(engine)
+    session = Session(engine)
+
+    start = datetime(2024, 1, 1)
+
+    # Pairs of rows share a timestamp, so the id has to break the tie.
+    for index in range(num_rows):
+        session.add(LogRow(log_id=index + 1, timestamp=start + timedelta(minutes=index // 2)))
+
+    session.commit()
+    return session
 
 
 class TestPagination:
@@ -31,3 +60,46 @@ class TestPagination:
         assert pagination.pages == 10
         assert pagination.has_prev == False
         assert pagination.has_next == True
+
+    def test_cursor_round_trip(self):
+        values = [datetime(2024, 1, 2, 3, 4, 5), 42]
+        cursor = KeysetPagination.encode_cursor(values)
+
+        assert KeysetPagination.decode_cursor(cursor) == values
+
+        with pytest.raises(ValueError):
+            KeysetPagination.decode_cursor("not a cursor")
+
+    def test_paginate_keyset(self):
+        session = _create_session(25)
+        query = session.query(LogRow)
+        keys = [LogRow.timestamp, LogRow.log_id]
+
+        seen = []
+        cursor = None
+        pages = []
+
+        while True:
+            page = KeysetPagination.paginate(query, keys, 10, cursor=cursor, with_count=False)
+            pages.append(page)
+            seen += [row.log_id for row in page.items]
+
+            if not page.has_next:
+                break
+
+            cursor = page.next_cursor
+
+        assert seen == list(range(25, 0, -1))
+        assert pages[0].has_prev is False
+        assert pages[0].total is None
+        assert pages[-1].next_cursor is None
+
+        # Walk back from the last page to the one before it.
+        page = KeysetPagination.paginate(
+            query, keys, 10, cursor=pages[-1].prev_cursor, direction="prev"
+        )
+
+        assert [row.log_id for row in page.items] == list(range(15, 5, -1))
+        assert page.total == 25
+        assert page.has_next is True
+        assert page.has_prev is True
@@ -0,0 +1,59 @@
+from application.common import ttl_cache
+from application.common.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    @classmethod
+    def setup_class(cls):
+        pass
+
+    @classmethod
+    def teardown_class(cls):
+        pass
+
+    def test_entries_expire(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+
+        cache = TTLCache(10)
+        cache.put("key", "value")
+
+        now[0] += 10
+        assert cache.get("key") == "value"
+
+        now[0] += 1
+        assert cache.get("key") is None
+        assert cache.peek("key") == "value"
+
+    def test_max_entries(self, monkeypatch):
+        now = [100.0]
+        monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+
+        cache = TTLCache(10, max_entries=2)
+        cache.put("first", 1)
+        cache.put("second", 2)
+
+        # Full of live entries, so the new one is not cached.
+        cache.put("third", 3)
+        assert cache.get("third") is None
+        assert cache.get("first") == 1
+
+        # Once the others expire, they make room.
+        now[0] += 11
+        cache.put("third", 3)
+        assert cache.get("third") == 3
+        assert cache.peek("first") is None
+
+    def test_pop(self):
+        cache = TTLCache(10)
+        cache.put((1, "direct"), 1)
+        cache.put((1, "global"), 2)
+        cache.put((2, "global"), 3)
+
+        cache.pop_matching(lambda key: key[1] == "global")
+        assert cache.get((1, "direct")) == 1
+        assert cache.get((1, "global")) is None
+        assert cache.get((2, "global")) is None
+
+        cache.pop((1, "direct"))
+        assert cache.get((1, "direct")) is None